@@ -1,20 +1,31 @@
 from game_elements.cluedo_player import CluedoPlayer
 from game_elements.board import Board, ROOM_LOCATIONS
 from game_elements.action import Action
-from collections import defaultdict
-import itertools
-import copy
-import random
+from game_elements.turn_events import SuggestionEvent, AccusationEvent
+from collections import deque
+import numpy as np
 
 SUSPECT = 0
 WEAPON = 1
 ROOM = 2
 
-TYPE = 0
-CARD = 1
-SUGGESTION = 1
-ACCUSATION = 1
-PLAYER = 2
+# The axis of each card type in the possible solutions tensor
+TYPE_AXES = {'suspect': SUSPECT, 'weapon': WEAPON, 'room': ROOM}
+
+# Kinds of the facts in the agenda. A fact is packed into an int: its kind in the lowest FACT_KIND_BITS bits, then
+# its cards (their indices in KRAgent.cards, FACT_CARD_BITS bits each, a suggestion/accusation has 3), then its player
+SOLUTION_FACT = 0 # (card) is in the solution
+HELD_BY_PLAYER_FACT = 1 # (card, player) the player holds the card
+NOT_HELD_BY_PLAYER_FACT = 2 # (card, player) the player doesn't hold the card
+COULD_NOT_DISPROVE_FACT = 3 # (card, player) the player couldn't disprove a suggestion with the card
+DISPROVED_FACT = 4 # (suggestion, player) the player disproved the suggestion
+NOT_DISPROVED_FACT = 5 # (suggestion) no one could disprove the agent's suggestion
+INCORRECT_ACCUSATION_FACT = 6 # (accusation) an accusation was wrong
+NOT_SOLUTION_FACT = 7 # (card) is not in the solution
+FACT_KIND_BITS = 3
+FACT_CARD_BITS = 5 # up to 32 cards
+FACT_PLAYER_SHIFT = FACT_KIND_BITS + 3 * FACT_CARD_BITS
+NEW_FACT = object() # the old value recorded in the trail for a fact added to the agenda during a trial
 
 
 class KRAgent(CluedoPlayer):
@@ -31,7 +42,15 @@ class KRAgent(CluedoPlayer):
         self.target_room_location = None
         self.past_suggestions = []
 
-        self.all_possible_solutions = list(itertools.product(self.suspect_cards, self.weapon_cards, self.room_cards))
+        # card -> its index on the axis of its type in all_possible_solutions (its position in the card list of its type)
+        self._card_indices = {card: index for cards in (suspect_cards, weapon_cards, room_cards)
+                              for index, card in enumerate(cards)}
+        # all_possible_solutions[s, w, r] is True while (suspect s, weapon w, room r) can still be the solution, the
+        # facts remove solutions with slice assignments, and possible_solutions_num counts the remaining ones
+        self.all_possible_solutions = np.ones((len(suspect_cards), len(weapon_cards), len(room_cards)), dtype=bool)
+        self.possible_solutions_num = self.all_possible_solutions.size
+        self._unknown_hand = dict.fromkeys(self.cards) # a hand with all its cards unknown, for resetting players_hands
+        self._card_ids = {card: card_id for card_id, card in enumerate(self.cards)} # card -> its index in the facts
 
         # Maps cards to True or False (or None if unknown) to track which cards are in the solution and which can't be
         self.card_values = {
@@ -45,15 +64,22 @@ class KRAgent(CluedoPlayer):
         self.players_hands = {player: {card: None for card in self.cards} for player in self.players_idx}
         # {player 1: {card 1: True, card 2: None, ...}, player 2: {card 1: False, card 2: True, ...}}
 
-        # Maps players to a list of suggestions they disproved, as a list of cards in the suggestion
+        # Maps players to a list of suggestions they disproved, as masks of the cards in the suggestion (1 << the card's
+        # index in the facts) that they can hold. A disproof record keeps its index, it's set to 0 once resolved
         self.possible_disproofs = {player: [] for player in self.players_idx}
-        # {player 1: [[suspect, weapon, room], [suspect, weapon, room]], player 2: [[suspect, weapon, room]]}
+        # {player 1: [0b1001000010, 0b110], player 2: [0b100100001]}
+
+        # Maps players to the disproof records of every card (by its index in the facts), as a mask of the records'
+        # indices in possible_disproofs, so a card is removed from the records that contain it only
+        self.disproofs_with_card = {player: [0] * len(self.cards) for player in self.players_idx}
 
         self.solution_found = False  # Tracks whether the AI is ready to make an accusation
 
-        self.agenda = []  # Tracks facts that need to be inferred from
-        self.inferred = defaultdict(lambda: False)  # Tracks facts that have been inferred from and processed
-        # [('solution', card), ('held_by_player', card, player), ('not_held_by_player', card, player), ...]
+        self.agenda = deque()  # Tracks facts that need to be inferred from, packed into ints (see add_fact)
+        self.added_facts = set()  # Tracks the facts added to the agenda in this game, each is inferred from only once
+
+        # While a trial runs (see checkpoint), the (container, key, old value) of every change to the knowledge base
+        self._trail = None
 
     def init_knowledge(self, num_players):
         """
@@ -62,11 +88,13 @@ class KRAgent(CluedoPlayer):
         """
         self.players_idx = list(range(num_players))
         self.reset_knowledge()
+        my_cards = self.get_cards()
+        my_index = self.get_index()
         for card in self.cards:
-            if card in self.get_cards():
-                self.agenda.append(('held_by_player', card, self.get_index()))
+            if card in my_cards:
+                self.add_fact(HELD_BY_PLAYER_FACT, [card], my_index)
             else:
-                self.agenda.append(('not_held_by_player', card, self.get_index()))
+                self.add_fact(NOT_HELD_BY_PLAYER_FACT, [card], my_index)
 
     def reset_knowledge(self):
         """
@@ -75,18 +103,106 @@ class KRAgent(CluedoPlayer):
         self.unexplored_rooms = ROOM_LOCATIONS.copy()
         self.target_room_location = None
         self.past_suggestions = []
-        self.all_possible_solutions = list(itertools.product(self.suspect_cards, self.weapon_cards, self.room_cards))
-
-        self.card_values = {
-            'suspect': {suspect: None for suspect in self.suspect_cards},
-            'weapon': {weapon: None for weapon in self.weapon_cards},
-            'room': {room: None for room in self.room_cards}
-        }
-        self.players_hands = {player: {card: None for card in self.cards} for player in self.players_idx}
-        self.possible_disproofs = {player: [] for player in self.players_idx}
+        self.all_possible_solutions.fill(True)
+        self.possible_solutions_num = self.all_possible_solutions.size
+
+        for values in self.card_values.values():
+            for card in values:
+                values[card] = None
+        if self.players_hands.keys() == set(self.players_idx):
+            # Same players as in the previous game, reuse their dicts
+            for hand in self.players_hands.values():
+                hand.update(self._unknown_hand)
+            for disproofs in self.possible_disproofs.values():
+                disproofs.clear()
+            for disproofs_with_card in self.disproofs_with_card.values():
+                disproofs_with_card[:] = [0] * len(self.cards)
+        else:
+            self.players_hands = {player: self._unknown_hand.copy() for player in self.players_idx}
+            self.possible_disproofs = {player: [] for player in self.players_idx}
+            self.disproofs_with_card = {player: [0] * len(self.cards) for player in self.players_idx}
         self.solution_found = False
-        self.agenda = []
-        self.inferred = defaultdict(lambda: False)
+        self.agenda.clear()
+        self.added_facts.clear()
+
+    def add_fact(self, kind, cards, player=0):
+        """
+        Adds a fact to the agenda, packed into an int, unless the same fact was already added in this game.
+        :param kind: One of the *_FACT kinds.
+        :param cards: The card, or the 3 cards of the suggestion/accusation, of the fact.
+        :param player: The player of the fact (if it has one).
+        """
+        fact = kind
+        shift = FACT_KIND_BITS
+        for card in cards:
+            fact |= self._card_ids[card] << shift
+            shift += FACT_CARD_BITS
+        fact |= player << FACT_PLAYER_SHIFT
+        if fact not in self.added_facts:
+            if self._trail is not None:
+                self._trail.append((self.added_facts, fact, NEW_FACT))
+            self.added_facts.add(fact)
+            self.agenda.append(fact)
+
+    def get_fact_card(self, fact, position=0):
+        """
+        :return: The card at the given position of a packed fact.
+        """
+        return self.cards[(fact >> (FACT_KIND_BITS + position * FACT_CARD_BITS)) & ((1 << FACT_CARD_BITS) - 1)]
+
+    def get_fact_cards(self, fact):
+        """
+        :return: The (suspect, weapon, room) of a packed suggestion/accusation fact.
+        """
+        return self.get_fact_card(fact, SUSPECT), self.get_fact_card(fact, WEAPON), self.get_fact_card(fact, ROOM)
+
+    def checkpoint(self):
+        """
+        Starts a trial: from now on every change to the knowledge base is recorded in the trail (like the trail of a SAT
+        solver), so that inferring in place can be undone by rollback.
+        :return: The checkpoint to roll back to.
+        """
+        if self._trail is None:
+            self._trail = []
+        checkpoint = len(self._trail), self.agenda
+        self.agenda = deque(self.agenda)
+        return checkpoint
+
+    def rollback(self, checkpoint):
+        """
+        Undoes the changes to the knowledge base since the checkpoint, newest first, and ends the trial if it's the
+        first checkpoint.
+        """
+        position, agenda = checkpoint
+        trail = self._trail
+        while len(trail) > position:
+            container, key, value = trail.pop()
+            if value is NEW_FACT:
+                container.discard(key)
+            else:
+                container[key] = value
+        self.agenda = agenda
+        if position == 0:
+            self._trail = None
+
+    def record(self, container, key):
+        """
+        Records container[key] in the trail before it changes, if a trial runs. key can be a slice, to record a list or
+        an array.
+        """
+        if self._trail is not None:
+            value = container[key]
+            if isinstance(value, np.ndarray):
+                value = value.copy() # not a view
+            self._trail.append((container, key, value))
+
+    def set_hand(self, player, card, value):
+        self.record(self.players_hands[player], card)
+        self.players_hands[player][card] = value
+
+    def set_card_value(self, card, value):
+        self.record(self.card_values[card.get_type()], card)
+        self.card_values[card.get_type()][card] = value
 
     def forward_chaining_inference(self):
         """
@@ -96,108 +212,93 @@ class KRAgent(CluedoPlayer):
         num_facts_derived = 0
 
         while self.agenda:
-            fact = self.agenda.pop(0)  # Get the next fact to be inferred
-
-            if self.inferred[fact]:
-                continue  # Fact has already been processed
-
-            self.inferred[fact] = True
+            fact = self.agenda.popleft()  # Get the next fact to be inferred
+            kind = fact & ((1 << FACT_KIND_BITS) - 1)
+            player = fact >> FACT_PLAYER_SHIFT
 
             # Apply Rule: If a card is known to be in the solution, then it can't be in the hand of any player,
                                                               # and any solution that doesn't contain it is not valid
-            if fact[TYPE] == 'solution':
-                card = fact[CARD]
+            if kind == SOLUTION_FACT:
+                card = self.get_fact_card(fact)
                 for player in self.players_idx:
                     # Update the player's hand to show they don't have the card
-                    self.players_hands[player][card] = False
+                    self.set_hand(player, card, False)
                     num_facts_derived += 1
                     # Add the fact to the agenda
-                    self.agenda.append(('not_held_by_player', card, player))
+                    self.add_fact(NOT_HELD_BY_PLAYER_FACT, [card], player)
 
-                for solution in self.all_possible_solutions[:]:
-                    if card not in solution:
-                        # Remove any solution that doesn't contain the card
-                        self.all_possible_solutions.remove(solution)
-                        num_facts_derived += 1
+                # Remove any solution that doesn't contain the card
+                num_facts_derived += self.remove_solutions_without(card)
 
             # Apply Rule: If a card is known to be held by a player, then it can't be in the solution,
                                                             # and none of the other players can hold it
-            elif fact[TYPE] == 'held_by_player':
-                card, player = fact[CARD], fact[PLAYER]
+            elif kind == HELD_BY_PLAYER_FACT:
+                card = self.get_fact_card(fact)
                 # Update the knowledge base to show the card is not in the solution
-                self.card_values[card.get_type()][card] = False
+                self.set_card_value(card, False)
 
-                for solution in self.all_possible_solutions[:]:  # Iterate over a copy of the list
-                    if card in solution:
-                        self.all_possible_solutions.remove(solution)
-                        num_facts_derived += 1
+                num_facts_derived += self.remove_solutions_with(card)
 
                 for p in self.players_idx:
                     if p == player:
-                        self.players_hands[p][card] = True
+                        self.set_hand(p, card, True)
                     elif p != player:
                         # Update the other player's hand to show they don't have the card
-                        self.players_hands[p][card] = False
+                        self.set_hand(p, card, False)
                         num_facts_derived += 1
                         # Add the fact to the agenda
-                        self.agenda.append(('not_held_by_player', card, p))
+                        self.add_fact(NOT_HELD_BY_PLAYER_FACT, [card], p)
 
                 # Check if now only one card in the category is unknown, and if so, it must be in the solution
                 category = card.get_type()
                 unknown = [card for card in self.card_values[category] if self.card_values[category][card] is None]
                 if len(unknown) == 1:
                     # Update the knowledge base to show the last unknown card is in the solution
-                    self.card_values[category][unknown[0]] = True
+                    self.set_card_value(unknown[0], True)
                     num_facts_derived += 1
                     # Add the fact to the agenda
-                    self.agenda.append(('solution', unknown[0]))
+                    self.add_fact(SOLUTION_FACT, [unknown[0]])
 
             # Apply Rule: If a card is not held by a player, then they could not disprove a suggestion with that card
-            elif fact[TYPE] == 'not_held_by_player':
-                card, player = fact[CARD], fact[PLAYER]
-                self.update_disproofs(card, player, 'remove')
+            elif kind == NOT_HELD_BY_PLAYER_FACT:
+                self.update_disproofs(self.get_fact_card(fact), player, 'remove')
                 num_facts_derived += 1
 
             # Apply Rule: If a player could not disprove a suggestion, then they don't hold any of the cards in it
-            elif fact[TYPE] == 'could_not_disprove':
-                card, player = fact[CARD], fact[PLAYER]
+            elif kind == COULD_NOT_DISPROVE_FACT:
+                card = self.get_fact_card(fact)
                 # Update the player's hand to show they don't have the card
-                self.players_hands[player][card] = False
+                self.set_hand(player, card, False)
                 num_facts_derived += 1
                 # Add the fact to the agenda
-                self.agenda.append(('not_held_by_player', card, player))
+                self.add_fact(NOT_HELD_BY_PLAYER_FACT, [card], player)
 
             # Apply Rule: If a player disproved a suggestion, then they must hold one of the cards in it,
                                                             # and the suggestion is not the solution
-            elif fact[TYPE] == 'disproved':
-                suggestion, player = fact[SUGGESTION], fact[PLAYER]
+            elif kind == DISPROVED_FACT:
+                suggestion = self.get_fact_cards(fact)
                 # Update the player's disprove list with the suggestion to indicate they hold one of the cards
                 self.update_disproofs(suggestion, player, 'add')
                 num_facts_derived += 1
-                # Remove the suggestion from the list of possible solutions
-                if suggestion in self.all_possible_solutions:
-                    self.all_possible_solutions.remove(suggestion)
-                    num_facts_derived += 1
+                # Remove the suggestion from the possible solutions
+                num_facts_derived += self.remove_solution(suggestion)
 
             # Apply Rule: If a suggestion made by the agent couldn't be disproved,
             # and the agent doesn't hold its cards, then they are the solution
-            elif fact[TYPE] == 'not_disproved':
-                suggestion = fact[SUGGESTION]
-                for card in suggestion:
+            elif kind == NOT_DISPROVED_FACT:
+                for card in self.get_fact_cards(fact):
                     if self.players_hands[self.get_index()][card] is not True:
                         # Update the knowledge base to show the card is in the solution
-                        self.card_values[card.get_type()][card] = True
+                        self.set_card_value(card, True)
                         # Add the fact to the agenda
-                        self.agenda.append(('solution', card))
+                        self.add_fact(SOLUTION_FACT, [card])
                 num_facts_derived += float('inf')  # Solution is revealed, so the fact is infinitely important
 
             # Apply Rule: If an accusation is incorrect, then the trio is not the solution - one of the 3 is wrong
-            elif fact[TYPE] == 'incorrect_accusation':
-                accusation = fact[ACCUSATION]
-                if accusation in self.all_possible_solutions:
-                    # Remove the incorrect accusation from the list of possible solutions
-                    self.all_possible_solutions.remove(accusation)
-                    num_facts_derived += 1
+            elif kind == INCORRECT_ACCUSATION_FACT:
+                accusation = self.get_fact_cards(fact)
+                # Remove the incorrect accusation from the possible solutions
+                num_facts_derived += self.remove_solution(accusation)
 
                 # If two of the three cards are known to be in the solution, the third is not
                 cards = {'suspect': accusation[SUSPECT], 'weapon': accusation[WEAPON], 'room': accusation[ROOM]}
@@ -208,20 +309,74 @@ class KRAgent(CluedoPlayer):
                     if self.card_values[other_types[0]][cards[other_types[0]]] is True and \
                             self.card_values[other_types[1]][cards[other_types[1]]] is True:
                         # Update the knowledge base to show the current card is not in the solution
-                        self.card_values[card_type][card] = False
+                        self.set_card_value(card, False)
                         num_facts_derived += 1
-                        self.agenda.append((card, 'not_solution'))
+                        self.add_fact(NOT_SOLUTION_FACT, [card])
 
             # Apply Rule: If a card is known to not be in the solution, then any solution containing it is not valid
-            elif fact[TYPE] == 'not_solution':
-                card = fact[CARD]
-                for solution in self.all_possible_solutions[:]:
-                    if card in solution:
-                        self.all_possible_solutions.remove(solution)
-                        num_facts_derived += 1
+            elif kind == NOT_SOLUTION_FACT:
+                num_facts_derived += self.remove_solutions_with(self.get_fact_card(fact))
 
         return num_facts_derived
 
+    def remove_solutions_with(self, card):
+        """
+        Removes the possible solutions that contain the card.
+        :return: The number of solutions removed.
+        """
+        solutions = np.moveaxis(self.all_possible_solutions, TYPE_AXES[card.get_type()], 0)[self._card_indices[card]]
+        removed = np.count_nonzero(solutions)
+        if removed:
+            self.record(solutions, Ellipsis)
+            self.record(self.__dict__, 'possible_solutions_num')
+            solutions[...] = False
+            self.possible_solutions_num -= removed
+        return removed
+
+    def remove_solutions_without(self, card):
+        """
+        Removes the possible solutions that don't contain the card.
+        :return: The number of solutions removed.
+        """
+        solutions = np.moveaxis(self.all_possible_solutions, TYPE_AXES[card.get_type()], 0)
+        index = self._card_indices[card]
+        remaining = np.count_nonzero(solutions[index])
+        removed = self.possible_solutions_num - remaining
+        if removed:
+            self.record(self.all_possible_solutions, Ellipsis)
+            self.record(self.__dict__, 'possible_solutions_num')
+            solutions[:index] = False
+            solutions[index + 1:] = False
+            self.possible_solutions_num = remaining
+        return removed
+
+    def remove_solution(self, solution):
+        """
+        Removes a (suspect, weapon, room) tuple from the possible solutions.
+        :return: 1 if it was a possible solution, else 0.
+        """
+        indices = (self._card_indices[solution[SUSPECT]], self._card_indices[solution[WEAPON]],
+                   self._card_indices[solution[ROOM]])
+        if not self.all_possible_solutions[indices]:
+            return 0
+        self.record(self.all_possible_solutions, indices)
+        self.record(self.__dict__, 'possible_solutions_num')
+        self.all_possible_solutions[indices] = False
+        self.possible_solutions_num -= 1
+        return 1
+
+    def get_possible_solutions(self, room_index=None):
+        """
+        :param room_index: If given, only the solutions with this room (by its index in room_cards).
+        :return: A list of the possible (suspect, weapon, room) tuples, in the order of the cards' indices.
+        """
+        if room_index is None:
+            return [(self.suspect_cards[s], self.weapon_cards[w], self.room_cards[r])
+                    for s, w, r in np.argwhere(self.all_possible_solutions)]
+        room = self.room_cards[room_index]
+        return [(self.suspect_cards[s], self.weapon_cards[w], room)
+                for s, w in np.argwhere(self.all_possible_solutions[:, :, room_index])]
+
     def update_disproofs(self, information, player, action):
         """
         Makes an update to the possible disproofs list based on new information.
@@ -235,30 +390,49 @@ class KRAgent(CluedoPlayer):
         """
         if action == 'add':
             # Convert the suggestion from a tuple to a list of cards to make it mutable:
-            suggestion = [information[SUSPECT], information[WEAPON], information[ROOM]]
-            for card in suggestion:
-                if self.players_hands[player][card] is False:
-                    # Already known that the player doesn't have the card, so it can't be the card that disproved the suggestion
-                    suggestion.remove(card)
+            # Already known that the player doesn't have a card, so it can't be the card that disproved the suggestion
+            suggestion = [card for card in information if self.players_hands[player][card] is not False]
             if len(suggestion) == 1:
                 # If only one card remains in the suggestion, it must be the card the player showed to disprove it
-                self.agenda.append(('held_by_player', suggestion[0], player))
+                self.add_fact(HELD_BY_PLAYER_FACT, [suggestion[0]], player)
                 return
-            else:
-                # Add the suggestion to the list of possible disproofs for the player
-                self.possible_disproofs[player].append(suggestion)
+            elif suggestion:
+                # Add the suggestion to the list of possible disproofs for the player, and to the records of its cards
+                disproofs = self.possible_disproofs[player]
+                disproofs_with_card = self.disproofs_with_card[player]
+                disproof_bit = 1 << len(disproofs)
+                self.record(disproofs, slice(len(disproofs), None))
+                disproofs.append(sum(1 << self._card_ids[card] for card in suggestion))
+                for card in suggestion:
+                    card_id = self._card_ids[card]
+                    self.record(disproofs_with_card, card_id)
+                    disproofs_with_card[card_id] |= disproof_bit
 
         else:  # Removing a card from the possible disproofs
-            card = information
-            for disproof in self.possible_disproofs[player][:]:
-                if card in disproof:
-                    # Remove the suggestion from the list of possible disproofs for the player
-                    disproof.remove(card)
-                    if len(disproof) == 1:
-                        # If only one card remains in the disproof, it must be the card the player showed
-                        self.players_hands[player][disproof[0]] = True
-                        self.agenda.append(('held_by_player', disproof[0], player))
-                        self.possible_disproofs[player].remove(disproof)
+            card_id = self._card_ids[information]
+            disproofs = self.possible_disproofs[player]
+            disproofs_with_card = self.disproofs_with_card[player]
+            affected = disproofs_with_card[card_id]
+            if not affected:
+                return
+            self.record(disproofs_with_card, card_id)
+            disproofs_with_card[card_id] = 0
+            # Remove the card from the disproofs that contain it, in the order they were added
+            while affected:
+                disproof_bit = affected & -affected
+                affected ^= disproof_bit
+                index = disproof_bit.bit_length() - 1
+                self.record(disproofs, index)
+                disproof = disproofs[index] = disproofs[index] & ~(1 << card_id)
+                if disproof & (disproof - 1) == 0:
+                    # If only one card remains in the disproof, it must be the card the player showed
+                    last_card_id = disproof.bit_length() - 1
+                    self.set_hand(player, self.cards[last_card_id], True)
+                    self.add_fact(HELD_BY_PLAYER_FACT, [self.cards[last_card_id]], player)
+                    # The disproof is resolved
+                    disproofs[index] = 0
+                    self.record(disproofs_with_card, last_card_id)
+                    disproofs_with_card[last_card_id] &= ~disproof_bit
 
     def find_minimal_distance(self, target, locations):
         """
@@ -284,7 +458,7 @@ class KRAgent(CluedoPlayer):
         Simulates rolling a 6-sided dice.
         :return: A random integer between 1 and 6.
         """
-        return random.randint(1, 6)
+        return self.rng.randint(1, 6)
 
     def get_move(self, game_state, dice_roll):
         """
@@ -297,12 +471,14 @@ class KRAgent(CluedoPlayer):
         # Choose a room randomly out of the unknown rooms:
         unknown_rooms = [room for room in self.room_cards if self.card_values['room'][room] is None]
         if unknown_rooms:
-            target_room = random.choice(unknown_rooms)
+            target_room = self.rng.choice(unknown_rooms)
             self.target_room_location = self.board.get_room_location(target_room.get_name())
         else:
-            self.target_room_location = random.choice(ROOM_LOCATIONS)
+            self.target_room_location = self.rng.choice(ROOM_LOCATIONS)
 
         legal_moves = game_state.get_legal_move_locations(dice_roll, self._index)
+        if not legal_moves:  # Every reachable tile is taken, stay
+            return self.get_location()
         # If the target room is reachable in one move, move there
         if self.target_room_location in legal_moves:
             return self.target_room_location
@@ -319,7 +495,7 @@ class KRAgent(CluedoPlayer):
         """
         if game_state.last_turn is None:  # Start of the turn
             # Check if agent knows the solution (ready to make an accusation)
-            if len(self.all_possible_solutions) == 1:
+            if self.possible_solutions_num == 1:
                 self.solution_found = True
                 accusation = self.make_accusation()
                 return Action.ACCUSATION, accusation
@@ -348,7 +524,7 @@ class KRAgent(CluedoPlayer):
                 return Action.SUGGESTION, suggestion
             # If didn't reach a room after moving, make an accusation if ready or end turn:
             else:
-                if len(self.all_possible_solutions) == 1:
+                if self.possible_solutions_num == 1:
                     accusation = self.make_accusation()
                     return Action.ACCUSATION, accusation
                 else:
@@ -359,7 +535,7 @@ class KRAgent(CluedoPlayer):
             res = self.forward_chaining_inference()  # (return value is irrelevant here)
 
             # If only one possible solution set remains, the agent knows the solution - make an accusation
-            if len(self.all_possible_solutions) == 1:
+            if self.possible_solutions_num == 1:
                 self.solution_found = True
                 accusation = self.make_accusation()
                 return Action.ACCUSATION, accusation
@@ -381,20 +557,21 @@ class KRAgent(CluedoPlayer):
         :param suggestion: Tuple of the suspect, weapon, and room of type Card.
         :return: An integer representing how many new facts can be derived from this suggestion.
         """
-        # Make a deep copy of the entire agent
-        agent_copy = copy.deepcopy(self)
+        # Infer in place, and undo it afterwards
+        checkpoint = self.checkpoint()
 
         # Simulate possible player responses to the suggestion
-        for player in agent_copy.players_idx:
-            if player != agent_copy.get_index():
+        for player in self.players_idx:
+            if player != self.get_index():
                 for card in suggestion:
-                    if agent_copy.players_hands[player][card] is not False:
+                    if self.players_hands[player][card] is not False:
                         # If the player could potentially have the card, simulate a disproof by the player with the card
-                        agent_copy.simulate_suggestion_response(agent_copy, suggestion, player, card)
+                        self.simulate_suggestion_response(self, suggestion, player, card)
 
         # Run forward chaining on the agenda derived from the response simulation
-        new_facts_derived = agent_copy.forward_chaining_inference()
+        new_facts_derived = self.forward_chaining_inference()
 
+        self.rollback(checkpoint)
         return new_facts_derived
 
     def find_best_suggestion(self):
@@ -408,8 +585,9 @@ class KRAgent(CluedoPlayer):
         current_room = self.get_room()
 
         # Filter out the possible solution sets that contain the current room
-        valid_solutions = [possible_solution for possible_solution in self.all_possible_solutions
-                           if possible_solution[ROOM].get_name() == current_room]
+        valid_solutions = [possible_solution for room_index, room in enumerate(self.room_cards)
+                           if room.get_name() == current_room
+                           for possible_solution in self.get_possible_solutions(room_index)]
 
         # Iterate over the suggestions
         for possible_solution in valid_solutions:
@@ -419,7 +597,8 @@ class KRAgent(CluedoPlayer):
 
             suggestion = (suspect, weapon, room)
 
-            # Evaluate the suggestion based on how many new facts we can infer
+            # Evaluate the suggestion based on how many new facts we can infer. The scores aren't cached across turns:
+            # by the next visit to a room, the possible solutions of every candidate's cards have always changed
             new_facts = self.evaluate_suggestion(suggestion)
             suggestion_scores[suggestion] = new_facts
 
@@ -470,13 +649,13 @@ class KRAgent(CluedoPlayer):
 
         # Randomly suggest from the unknown sets, and if all are known, suggest randomly from all cards
         if not unknown_suspects:
-            suspect = random.choice(self.suspect_cards)
+            suspect = self.rng.choice(self.suspect_cards)
         else:
-            suspect = random.choice(unknown_suspects)
+            suspect = self.rng.choice(unknown_suspects)
         if not unknown_weapons:
-            weapon = random.choice(self.weapon_cards)
+            weapon = self.rng.choice(self.weapon_cards)
         else:
-            weapon = random.choice(unknown_weapons)
+            weapon = self.rng.choice(unknown_weapons)
 
         return (suspect, weapon, current_room)
 
@@ -499,79 +678,77 @@ class KRAgent(CluedoPlayer):
 
         # If agent has a matching card, randomly choose one to show
         if matching_cards:
-            return random.choice(matching_cards)  # Randomly choose a card to show (if multiple)
+            return self.rng.choice(matching_cards)  # Randomly choose a card to show (if multiple)
         return None
 
     def simulate_suggestion_response(self, agent, suggestion, player, card):
         """
         Simulates the outcome of a suggestion the agent can make in order to choose the best suggestion.
-        :param agent: A deep copy of the agent to simulate the suggestion response.
+        :param agent: The agent to simulate the suggestion response with, during a trial (see checkpoint).
         :param suggestion: The suggestion made by the agent.
         :param player: The player responding to the suggestion.
         :param card: The card the player will show to disprove the suggestion.
         """
-        agent.agenda.append(('held_by_player', card, player))
+        agent.add_fact(HELD_BY_PLAYER_FACT, [card], player)
 
         # None of the players before the disproving player had any of the 3 cards suggested, use this information to infer
         for i in range(self.get_index() + 1, player):
             for card in suggestion:
-                agent.agenda.append(('could_not_disprove', card.get_name(), player))
+                agent.add_fact(COULD_NOT_DISPROVE_FACT, [card], i)
 
-    def handle_suggestion_response(self, game_state):
+    def handle_suggestion_event(self, event: SuggestionEvent):
         """
         Handles the responses of the other players to a suggestion.
         Adds the information gained to the agenda to be inferred later.
-        :param game_state: The current state of the game.
+        :param event: The SuggestionEvent broadcast by the game manager.
         """
+        suggester = event.get_suggester()
+        refuter = event.get_refuter()
+        suggestion = event.get_suggestion()
+
         # If suggestion was made by the agent:
-        if game_state.current_suggesting_player == self.get_index():
+        if suggester == self.get_index():
             # If no one could disprove the suggestion, the agent knows the suggestion is not the solution:
-            if game_state.current_rejecting_card is None:
-                suspect = game_state._active_suggestion[0]
-                weapon = game_state._active_suggestion[1]
-                room = game_state._active_suggestion[2]
-                self.agenda.append(('not_disproved', (suspect, weapon, room)))
+            if refuter is None:
+                self.add_fact(NOT_DISPROVED_FACT, suggestion)
                 return
 
             # If the suggestion was disproved:
             else:
-                self.agenda.append(('held_by_player', game_state.current_rejecting_card, game_state.current_rejecting_player))
+                self.add_fact(HELD_BY_PLAYER_FACT, [event.get_shown_card(self.get_index())], refuter)
 
         # If the suggestion was made by another player (the agent can't see the card shown)
         else:
             # If no one could disprove the suggestion, and it was not the agent's suggestion, can't infer anything:
-            if game_state.current_rejecting_card is None:
+            if refuter is None:
                 return
 
             # If another player disproved the suggestion:
-            if game_state.current_rejecting_player != self.get_index():
-                suspect = game_state._active_suggestion[0]
-                weapon = game_state._active_suggestion[1]
-                room = game_state._active_suggestion[2]
-                self.agenda.append(('disproved', (suspect, weapon, room), game_state.current_rejecting_player))
+            if refuter != self.get_index():
+                self.add_fact(DISPROVED_FACT, suggestion, refuter)
 
         # None of the players before the disproving player had any of the 3 cards suggested, use this information to infer
-        for i in range(game_state.current_suggesting_player + 1 ,game_state.current_rejecting_player):
-            for card in game_state._active_suggestion:
-                self.agenda.append(('could_not_disprove', card, i))
+        for i in range(suggester + 1, refuter):
+            for card in suggestion:
+                self.add_fact(COULD_NOT_DISPROVE_FACT, [card], i)
 
     def make_accusation(self):
         """
         Makes an accusation based on the known solution.
         :return: A tuple containing the suspect, weapon, and room of the accusation.
         """
-        if len(self.all_possible_solutions) == 1:
-            solution = self.all_possible_solutions[0]
+        if self.possible_solutions_num == 1:
+            solution = self.get_possible_solutions()[0]
             return solution
 
-    def handle_accusation_response(self, accusation):  # todo: implement in manager
+    def handle_accusation_event(self, event: AccusationEvent):
         """
         Handles the response to an accusation made by another player.
         If the accusation is correct, the game is over.
         If the accusation is incorrect, the agent can infer new information based on the wrong accusation.
-        :param accusation: The accusation made by the player (dictionary of suspect, weapon, room).
+        :param event: The AccusationEvent broadcast by the game manager.
         """
-        self.agenda.append(('incorrect_accusation', accusation))
+        self.add_fact(INCORRECT_ACCUSATION_FACT, event.get_accusation())
 
     ###### Extra Functions ######
 
@@ -687,7 +864,7 @@ class KRAgent(CluedoPlayer):
         Chooses a room to move to randomly.
         :return: The location of a room to move to (x, y).
         """
-        return random.choice(ROOM_LOCATIONS)
+        return self.rng.choice(ROOM_LOCATIONS)
 
     def get_strategic_move(self, game_state, dice_roll):
         """
@@ -713,7 +890,6 @@ class KRAgent(CluedoPlayer):
 # todo: don't allow moving on board on an occupied spot or into a room through a door blocked by a player
 # todo: 2 six-sided dice instead of one
 # todo: you dont have to use all of your movement from the dice
-# todo: handle_accusation_response add to manager to trigger if someone made an accusation and it was wrong
 
 # extra features probably won't be implemented:
 # todo: add secret passages as one of the options in a turn
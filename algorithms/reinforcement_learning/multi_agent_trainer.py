@@ -1,4 +1,3 @@
-import random
 import torch
 import torch.nn as nn
 import torch.optim as optim
@@ -7,7 +6,7 @@ from game_elements.game_state import GameState
 from algorithms.reinforcement_learning.reinforce_player_trainer import ReinforcePlayerTrainer
 from algorithms.reinforcement_learning.state_encoder import StateEncoder
 from game_elements.action import Action
-import copy
+from algorithms.simulation.outcome_model import OutcomeModel
 
 
 class OpponentModel(nn.Module):
@@ -26,6 +25,7 @@ class MultiAgentReinforceTrainer:
     def __init__(self, game_manager: CluedoGameManager, num_agents, lr=0.001):
         self._game_manager = game_manager
         self._num_agents = num_agents
+        self._outcome_model = OutcomeModel() # simulates the outcomes of the suggestions and accusations
         self._input_size = self._calculate_input_size()
         self._output_size = self._calculate_output_size()
 
@@ -42,10 +42,7 @@ class MultiAgentReinforceTrainer:
         return 2 * card_combinations + 1 + board_size * board_size
 
     def reset_game(self):
-        self._game_manager = CluedoGameManager(suspects=self._game_manager.suspects, weapons=
-                                               self._game_manager.weapons, rooms=self._game_manager.rooms, players=self._game_manager.players, 
-                                               game_board=self._game_manager.game_board, test_mode=self._game_manager.test_mode)
-        return self._game_manager.create_current_state()
+        return self._game_manager.reset()
 
     def train(self, episodes):
         for episode in range(episodes):
@@ -88,34 +85,15 @@ class MultiAgentReinforceTrainer:
         return new_state, reward, done
 
     def simulate_action(self, state: GameState, player_index: int, action: Action):
-        new_state = copy.deepcopy(state)
-        
-        if action[0] == Action.MOVE:
-            new_state.apply_move(action[1])
-        elif action[0] == Action.SUGGESTION:
-            new_state.apply_suggestion(action[1])
-            rejected_card = self.random_reject(new_state, player_index)
-            if rejected_card:
-                new_state._players[player_index].cards_rejected_for_me.add(rejected_card)
-            else:
-                for card in new_state._active_suggestion:
-                    if card not in new_state._players[player_index]._cards:
-                        new_state._players[player_index].cards_no_one_could_reject_for_me.add(card)
+        # The action is applied in place - the trajectory only moves forward
+        new_state = state
+        new_state.apply_action(action)
+        if action[0] == Action.SUGGESTION:
+            rejected_card = self._outcome_model.sample_rejection(new_state, player_index, self._game_manager.rng)
+            new_state.apply_rejection(player_index, rejected_card)
         elif action[0] == Action.ACCUSATION:
-            new_state.apply_accusation(action[1])
-            result = self.random_accusation(new_state, player_index)
-            if result:
-                new_state.winner = player_index
-                new_state.is_terminal = True
-            else:
-                new_state._players[player_index].is_in_game = False
-                # Check if game ended
-                active_players = sum(1 for player in new_state._players if player.is_in_game)
-                if active_players <= 1:
-                    new_state.is_terminal = True
-                    new_state.winner = next(i for i, player in enumerate(new_state._players) if player.is_in_game)
-        elif action[0] == Action.ENDTURN:
-            new_state.apply_end_turn()
+            result = self._outcome_model.sample_accusation(new_state, player_index, self._game_manager.rng)
+            new_state.apply_accusation_result(player_index, result)
         
         return new_state
 
@@ -139,80 +117,3 @@ class MultiAgentReinforceTrainer:
         action_probs = self._opponent_models[opponent_index](torch.FloatTensor(encoded_state))
         action = torch.multinomial(action_probs, 1).item()
         return self._encoder.decode_action(action)
-
-
-
-    def random_accusation(self, state: GameState, player_index):
-        if state._active_accusation in state.all_accusations:
-            return False
-        num_of_cards_i_discovered = len(state._players[player_index].cards_rejected_for_me) + len(state._players[player_index].cards_no_one_could_reject_for_me)
-        unknown_cards = len(state._cards) - len(state[player_index]._cards) - num_of_cards_i_discovered
-
-        choices = [True, False]
-        win_prob = [0.05, 0.95]
-        if unknown_cards <= 5:
-            win_prob = [0.2, 0.80]
-        if unknown_cards <= 4:
-            win_prob = [0.4, 0.60]
-        if unknown_cards < 4:
-            win_prob = [0.9, 0.10]
-        choice = random.choices(choices, weights=[win_prob, 1 - win_prob])[0]
-        return choice
-
-    def random_reject(self, state: GameState, player_index):
-        rejects = []
-        suspects_num = 0
-        rooms_num = 0
-        weapons_num = 0
-        for card in state._cards:
-            if card.get_type() == 'suspect':
-                suspects_num += 1
-            if card.get_type() == 'weapon':
-                weapons_num += 1
-            if card.get_type() == 'room':
-                rooms_num += 1
-        suspects_rejected = 0
-        rooms_rejected = 0
-        weapons_rejected = 0
-        for card in state._players[player_index].cards_rejected_for_me:
-            if card.get_type() == 'suspect':
-                suspects_rejected += 1
-            if card.get_type() == 'weapon':
-                weapons_rejected += 1
-            if card.get_type() == 'room':
-                rooms_rejected += 1
-        
-        for card in state._players[player_index]._cards:
-            if card.get_type() == 'suspect':
-                suspects_rejected += 1
-            if card.get_type() == 'weapon':
-                weapons_rejected += 1
-            if card.get_type() == 'room':
-                rooms_rejected += 1
-                
-        unknown_suspects = suspects_num - suspects_rejected
-        unknown_weapons = weapons_num - weapons_rejected
-        unknown_rooms = rooms_num - rooms_rejected
-
-        for card in state._active_suggestion:
-            if card in state._players[player_index].cards_rejected_for_me:
-                return card
-        for card in state._active_suggestion:
-            if card not in state._players[player_index]._cards and card not in state._players[player_index].cards_no_one_could_reject_for_me:
-                if (card.get_type() == 'suspect' and unknown_suspects > 1) or (card.get_type() == 'weapon' and unknown_weapons > 1) \
-                    or (card.get_type() == 'room' and unknown_rooms > 1):
-                    rejects.append(card)
-        if not rejects:
-            return None
-    
-        
-        # Random choice
-        known_cards = len(state._players[player_index].cards_rejected_for_me) + len(state._players[player_index].cards_no_one_could_reject_for_me) * 1.5
-        rejection_prob = min(known_cards / len(state._cards) + 0.01, 1)
-        rejects.append(None)
-        reject_probs = [1] * len(rejects)
-        reject_probs[-1] = rejection_prob
-
-
-        return random.choices(rejects, weights=reject_probs)[0]
-
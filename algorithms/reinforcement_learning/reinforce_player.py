@@ -1,12 +1,14 @@
+from typing import TYPE_CHECKING
 from game_elements.cluedo_player import CluedoPlayer
-from algorithms.reinforcement_learning.reinforce_player_trainer import ReinforcePlayerTrainer
 from game_elements.action import Action
 from game_elements.game_state import GameState
 from algorithms.reinforcement_learning.state_encoder import StateEncoder
-import random
+if TYPE_CHECKING:
+    # Only used for annotations, importing it loads torch
+    from algorithms.reinforcement_learning.reinforce_player_trainer import ReinforcePlayerTrainer
 
 class ReinforcePlayer(CluedoPlayer):
-    def __init__(self, trained_player: ReinforcePlayerTrainer, index, name):
+    def __init__(self, trained_player: 'ReinforcePlayerTrainer', index, name):
         super().__init__(index, name)
         self.player = trained_player
         self.game_manager = None
@@ -25,7 +27,7 @@ class ReinforcePlayer(CluedoPlayer):
 
         # Determine the current player's index and generate a random dice roll
         current_player_index = state._player_index
-        dice_roll = random.randint(1, 6)
+        dice_roll = self.rng.randint(1, 6)
 
         # Get all possible actions for the current state and dice roll
         possible_actions = state.get_all_possible_actions(current_player_index, dice_roll)
@@ -37,10 +39,10 @@ class ReinforcePlayer(CluedoPlayer):
                 return decoded_action
 
         # If no valid action is found (which shouldn't happen), return a random valid action
-        return random.choice(possible_actions)
+        return self.rng.choice(possible_actions)
     
     def reject(self, state: GameState):
         all_rejections = state.get_possible_rejections(self.get_cards(), state._active_suggestion)
         if all_rejections:
-            return random.choice(all_rejections)
+            return self.rng.choice(all_rejections)
         return None
\ No newline at end of file
@@ -57,10 +57,8 @@ class StateEncoder:
             # all_cards = list(all_cards)
             if cards:
                 for card1 in cards:
-                    # for card2 in all_cards:
-                    #     if card1.get_name() == card2.get_name() and card1.get_type() == card2.get_type()
-                    index = all_cards.index(card1)
-                    card_vector[index] = 1
+                    # The card ID is its index in the game cards
+                    card_vector[card1.get_id()] = 1
             return card_vector
 
         # Player's location encoding
@@ -1,27 +1,67 @@
 from game_elements.cluedo_player import CluedoPlayer
 from game_elements.game_state import GameState
 from game_elements.action import Action
-import copy
-import random
+from game_elements.game_state import MIN_SCORE, MAX_SCORE, get_multiplicity
+from algorithms.search.transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from algorithms.search.search_deadline import SearchDeadline, SearchTimeout, MAX_ITERATIVE_DEPTH
+from algorithms.search.root_parallel import search_root_parallel
+from algorithms.simulation.outcome_model import OutcomeModel
+from game_elements.score_cache import ScoreCache
 
 MAX_DICE_ROLL = 6
-DEPTH = 2
+DEPTH = 2 # search depth when the player has no time budget
 ACCUSATION_PROB = 5
+TRANSPOSITIONS = False # reuse the values of states that were already searched
+CHANCE_NODES = True # take the expectation over all the dice rolls below the root instead of sampling one roll
+PRUNING = True # Star1/Star2 pruning of the chance nodes, using the bounds of GameState.get_score
+SYMMETRY = False # expand one of every class of equivalent suggestions/accusations, weighted by its size (GameState.get_class_sizes)
+SCORE_CACHE = True # memoize the evaluations of the states (game_elements.score_cache)
 
 class ExpectimaxPlayer(CluedoPlayer):
-    def __init__(self, player_index, name):
+    def __init__(self, player_index, name, time_budget_ms=None, parallel_root=None):
         super().__init__(index=player_index, name=name)
         self._player_index = player_index
         self.expanded = 0
+        self.pruned = 0 # children skipped by the pruning
+        self.transposition_table = TranspositionTable()
+        # With a time budget the player deepens iteratively instead of searching DEPTH deep
+        self.time_budget_ms = time_budget_ms
+        self.completed_depth = None # the depth of the last completed iteration of the last decision
+        self._deadline = None
+        # With parallel_root=N the root actions of fixed depth searches are split between N processes
+        self.parallel_root = parallel_root
+        self.outcome_model = OutcomeModel() # simulates the outcomes of the suggestions and accusations in the search
+        self.score_cache = ScoreCache()
+
+    def reset_knowledge(self):
+        # The state hashes don't include the player's own cards, so the table is only valid within a game
+        self.transposition_table.clear()
+        self.score_cache.clear()
     
-    def expectimax(self, state: GameState, depth):
+    def expectimax(self, state: GameState, depth, alpha=float('-inf'), beta=float('inf')):
+        # With pruning the value is only exact inside (alpha, beta): at most alpha means the real value is at most
+        # the returned one, at least beta means it is at least the returned one
         if depth == 0 or self.is_terminal(state):
-            index = state._player_index
-            state._player_index = self._player_index
-            result = self.evaluate(state)
-            state._player_index = index
-            return result
-        
+            return self.evaluate_for_agent(state)
+
+        if TRANSPOSITIONS:
+            state_hash = state.get_hash()
+            value = self.transposition_table.lookup(state_hash, depth, alpha, beta)
+            if value is None:
+                value = self.node_value(state, depth, alpha, beta)
+                if value <= alpha:
+                    bound = UPPER_BOUND
+                elif value >= beta:
+                    bound = LOWER_BOUND
+                else:
+                    bound = EXACT
+                self.transposition_table.store(state_hash, depth, value, bound)
+            return value
+        return self.node_value(state, depth, alpha, beta)
+
+    def node_value(self, state: GameState, depth, alpha=float('-inf'), beta=float('inf')):
+        if CHANCE_NODES:
+            return self.chance_value(state, depth, self.is_agent_turn(state), alpha, beta)
         if self.is_agent_turn(state):
             possible_actions = self.get_possible_actions(state)
             unknown_cards = len(state._cards) - len(self._cards) - len(state._players[self._player_index].cards_rejected_for_me) - len(state._players[self._player_index].cards_no_one_could_reject_for_me)
@@ -31,143 +71,206 @@ class ExpectimaxPlayer(CluedoPlayer):
             possible_scores = []
             for action in possible_actions:
                 if action[0] != Action.ACCUSATION or accustaion:
-                    new_state = self.result(state, action)
-                    possible_scores.append(self.expectimax(new_state, depth - 1))
+                    possible_scores.append(self.child_value(state, action, depth - 1))
             return max(possible_scores)
         else:
             return self.expectation_value(state, depth)
     
     def expectation_value(self, state, depth):
         actions = self.get_possible_actions(state)
-        return sum(self.probability(state, action, actions) * self.expectimax(self.result(state, action), depth - 1)
+        actions_num = sum(get_multiplicity(action) for action in actions)
+        return sum(self.probability(state, action, actions_num) * self.child_value(state, action, depth - 1)
                    for action in actions)
+
+    def chance_value(self, state: GameState, depth, maximize, alpha=float('-inf'), beta=float('inf')):
+        """
+        The dice chance node above a decision: the average over the MAX_DICE_ROLL rolls (equally likely) of the value
+        of the decision with that roll - the best action for the agent, the average action for the others.
+        Only the moves depend on the roll, so the other actions are searched once and shared by all the rolls, and so
+        is every destination reachable with more than one roll (the destinations come from the board's reachability
+        tables).
+        """
+        self.count_expansion()
+        legal_moves = state.get_legal_actions(self._player_index)
+        children = state.get_dice_independent_actions(self._player_index, legal_moves, SYMMETRY)
+        if maximize and not self.accusation_allowed(state):
+            children = [action for action in children if action[0] != Action.ACCUSATION]
+
+        # rolls: (probability, indices of the children that can be played with the roll)
+        shared = list(range(len(children)))
+        if Action.MOVE not in legal_moves:
+            rolls = [(1, shared)]
+        else:
+            destinations = {} # location -> index of the move there, shared by the rolls that reach it
+            rolls = []
+            for dice_roll in range(1, MAX_DICE_ROLL + 1):
+                indices = list(shared)
+                for location in state.get_legal_move_locations(dice_roll, player_index=self._player_index):
+                    if location not in destinations:
+                        destinations[location] = len(children)
+                        children.append([Action.MOVE, location])
+                    indices.append(destinations[location])
+                rolls.append((1 / MAX_DICE_ROLL, indices))
+
+        bounds = self.child_upper_bounds(state, children, depth - 1) if PRUNING else [MAX_SCORE] * len(children)
+        if maximize:
+            return self.max_rolls_value(state, depth, children, rolls, bounds, alpha, beta)
+        return self.average_rolls_value(state, depth, children, rolls, bounds, alpha, beta)
+
+    def child_upper_bounds(self, state: GameState, children, depth):
+        """
+        Upper bounds of the values of the children searched depth deep: only the scored states after an accusation
+        can score above MAX_NON_ACCUSATION_SCORE, and their bonuses depend on how much the agent can learn from the
+        suggestions before them (see GameState.get_score_upper_bound). The bound only depends on the action type.
+        """
+        type_bounds = {}
+        bounds = []
+        for action in children:
+            bound = type_bounds.get(action[0])
+            if bound is None:
+                suggestions = (action[0] == Action.SUGGESTION) + max(depth - 1, 0)
+                accusation = action[0] == Action.ACCUSATION or depth > 0
+                bound = type_bounds[action[0]] = state.get_score_upper_bound(self._player_index, suggestions, accusation)
+            bounds.append(bound)
+        return bounds
+
+    def average_rolls_value(self, state: GameState, depth, children, rolls, bounds, alpha, beta):
+        """
+        The value of another player's decision, the children are weighted by the probability of playing them (a child
+        that stands for equivalent ones by all of their probabilities).
+        Star1 pruning: before every child, the bounds of the node given the children searched so far and
+        MIN_SCORE/the upper bounds of the rest give the child a window, and a child outside of it ends the search.
+        """
+        weights = [0] * len(children)
+        known = 0 # the weighted values of the children searched so far (and of the rolls without actions)
+        multiplicities = [get_multiplicity(action) for action in children]
+        for probability, indices in rolls:
+            if not indices:
+                known += probability * self.evaluate_for_agent(state)
+            actions_num = sum(multiplicities[index] for index in indices)
+            for index in indices:
+                weights[index] += probability * multiplicities[index] / actions_num
+        remaining_weight = sum(weights)
+        remaining_upper = sum(weight * bound for weight, bound in zip(weights, bounds))
+
+        for index, action in enumerate(children):
+            weight = weights[index]
+            remaining_weight -= weight
+            remaining_upper -= weight * bounds[index]
+            child_alpha = (alpha - known - remaining_upper) / weight
+            child_beta = (beta - known - remaining_weight * MIN_SCORE) / weight
+            value = self.child_value(state, action, depth - 1, child_alpha, child_beta)
+            known += weight * value
+            if value <= child_alpha:
+                self.pruned += len(children) - index - 1
+                return known + remaining_upper
+            if value >= child_beta:
+                self.pruned += len(children) - index - 1
+                return known + remaining_weight * MIN_SCORE
+        return known
+
+    def max_rolls_value(self, state: GameState, depth, children, rolls, bounds, alpha, beta):
+        """
+        The value of the agent's decision, the average over the rolls of the best child of the roll.
+        Star2 pruning: the dice independent children come first and are shared by all the rolls, so searching them
+        probes the best child of every roll at once. A child only needs to be searched above the best value of its
+        rolls so far, and one that raises the lower bound of the node to beta ends the search, as does an upper bound
+        (with the highest bound of its children for every roll not fully searched) of at most alpha.
+        """
+        static_value = None
+        best = [] # the best value of every roll so far, a lower bound of it
+        roll_upper = [] # an upper bound of every roll, the highest bound of its children
+        pending = [] # the number of the roll's children not searched yet
+        child_rolls = [[] for _ in children]
+        lower = 0 # the node's value if no other child improves on the best values so far
+        upper = 0 # the node's value if every roll with children not searched yet gets its upper bound
+        for roll, (probability, indices) in enumerate(rolls):
+            if indices:
+                best.append(MIN_SCORE)
+                roll_upper.append(max(bounds[index] for index in indices))
+                upper += probability * roll_upper[roll]
+            else:
+                if static_value is None:
+                    static_value = self.evaluate_for_agent(state)
+                best.append(static_value)
+                roll_upper.append(static_value)
+                upper += probability * static_value
+            lower += probability * best[roll]
+            pending.append(len(indices))
+            for index in indices:
+                child_rolls[index].append(roll)
+
+        for index, action in enumerate(children):
+            action_rolls = child_rolls[index]
+            child_alpha, child_beta = float('-inf'), float('inf')
+            if PRUNING:
+                child_alpha = min(best[roll] for roll in action_rolls)
+                action_probability = sum(rolls[roll][0] for roll in action_rolls)
+                others_lower = lower - sum(rolls[roll][0] * best[roll] for roll in action_rolls)
+                child_beta = (beta - others_lower) / action_probability
+            value = self.child_value(state, action, depth - 1, child_alpha, child_beta)
+            for roll in action_rolls:
+                probability = rolls[roll][0]
+                if value > best[roll]:
+                    lower += probability * (value - best[roll])
+                    best[roll] = value
+                pending[roll] -= 1
+                if not pending[roll]:
+                    upper -= probability * (roll_upper[roll] - best[roll])
+            if value >= child_beta or lower >= beta:
+                self.pruned += len(children) - index - 1
+                return lower
+            if upper <= alpha:
+                self.pruned += len(children) - index - 1
+                return upper
+        return lower
+
+    def evaluate_for_agent(self, state: GameState):
+        index = state._player_index
+        state._player_index = self._player_index
+        result = self.evaluate(state)
+        state._player_index = index
+        return result
+
+    def accusation_allowed(self, state: GameState):
+        unknown_cards = len(state._cards) - len(self._cards) - len(state._players[self._player_index].cards_rejected_for_me) - len(state._players[self._player_index].cards_no_one_could_reject_for_me)
+        return unknown_cards <= ACCUSATION_PROB
+
+    def child_value(self, state: GameState, action, depth, alpha=float('-inf'), beta=float('inf')):
+        # Applies the action in place, searches the resulting state and reverts it
+        undo_token = self.apply_action(state, action)
+        try:
+            return self.expectimax(state, depth, alpha, beta)
+        finally:
+            state.undo(undo_token)
     
-    def get_possible_actions(self, state: GameState):
+    def count_expansion(self):
+        if self._deadline is not None:
+            self._deadline.check()
         self.expanded += 1
-        dice_roll = random.randint(1, 6)
-        return state.get_all_possible_actions(self._player_index, dice_roll)
+
+    def get_possible_actions(self, state: GameState):
+        self.count_expansion()
+        dice_roll = self.rng.randint(1, 6)
+        return state.get_all_possible_actions(self._player_index, dice_roll, SYMMETRY)
     
-    def result(self, state: GameState, action):
+    def apply_action(self, state: GameState, action):
+        # Applies the action (and a simulated outcome of it) to the state in place, returns the undo token
         player_index = state._player_index
-        new_state = copy.deepcopy(state)
-        if action[0] == Action.MOVE:
-            new_state.apply_move(action[1])
+        undo_token = state.apply_action(action)
         if action[0] == Action.SUGGESTION:
-            new_state.apply_suggestion(action[1])
-            rejected_card = self.random_reject(new_state, player_index)
-            if rejected_card and rejected_card: # not in new_state._players[player_index]._cards:
-                new_state._players[self._player_index].cards_rejected_for_me.add(rejected_card)
-            else:
-                if new_state._active_suggestion[0] not in new_state._players[self._player_index]._cards:
-                    new_state._players[self._player_index].cards_no_one_could_reject_for_me.add(new_state._active_suggestion[0])
-                if new_state._active_suggestion[1] not in new_state._players[self._player_index]._cards:
-                    new_state._players[self._player_index].cards_no_one_could_reject_for_me.add(new_state._active_suggestion[1])
-                if new_state._active_suggestion[2] not in new_state._players[self._player_index]._cards:
-                    new_state._players[self._player_index].cards_no_one_could_reject_for_me.add(new_state._active_suggestion[2])
+            rejected_card = self.outcome_model.sample_rejection(state, player_index, self.rng)
+            state.apply_rejection(self._player_index, rejected_card, undo_token)
 
         if action[0] == Action.ACCUSATION:
-            new_state.apply_accusation(action[1])
-            result = self.random_accusation(new_state, player_index)
-            if result:
-                new_state.winner = player_index
-                new_state.is_terminal = True
-            else:
-                new_state._players[player_index].is_in_game = False
-                # Check if game ended
-                active_players = 0
-                active_player = None
-                for player in new_state._players:
-                    if player.is_in_game:
-                        active_player = player
-                        active_players += 1
-                if active_players <= 1:
-                    new_state.is_terminal = True
-                    new_state.winner = active_player
-                else:
-                    new_state.next_turn()
-                
+            result = self.outcome_model.sample_accusation(state, player_index, self.rng)
+            state.apply_accusation_result(player_index, result, undo_token)
 
-
-        if action[0] == Action.ENDTURN:
-            new_state.apply_end_turn()
-        
-        return new_state
+        return undo_token
     
-    def random_accusation(self, state: GameState, player_index):
-        if state._active_accusation in state.all_accusations:
-            return False
-        num_of_cards_i_discovered = len(state._players[player_index].cards_rejected_for_me) + len(state._players[player_index].cards_no_one_could_reject_for_me)
-        unknown_cards = len(state._cards) - len(state[player_index]._cards) - num_of_cards_i_discovered
-
-        choices = [True, False]
-        win_prob = [0.05, 0.95]
-        if unknown_cards <= 5:
-            win_prob = [0.2, 0.80]
-        if unknown_cards <= 4:
-            win_prob = [0.4, 0.60]
-        if unknown_cards < 4:
-            win_prob = [0.9, 0.10]
-        choice = random.choices(choices, weights=[win_prob, 1 - win_prob])[0]
-        return choice
-
-    def random_reject(self, state: GameState, player_index):
-        rejects = []
-        suspects_num = 0
-        rooms_num = 0
-        weapons_num = 0
-        for card in state._cards:
-            if card.get_type() == 'suspect':
-                suspects_num += 1
-            if card.get_type() == 'weapon':
-                weapons_num += 1
-            if card.get_type() == 'room':
-                rooms_num += 1
-        suspects_rejected = 0
-        rooms_rejected = 0
-        weapons_rejected = 0
-        for card in state._players[player_index].cards_rejected_for_me:
-            if card.get_type() == 'suspect':
-                suspects_rejected += 1
-            if card.get_type() == 'weapon':
-                weapons_rejected += 1
-            if card.get_type() == 'room':
-                rooms_rejected += 1
-        
-        for card in state._players[player_index]._cards:
-            if card.get_type() == 'suspect':
-                suspects_rejected += 1
-            if card.get_type() == 'weapon':
-                weapons_rejected += 1
-            if card.get_type() == 'room':
-                rooms_rejected += 1
-                
-        unknown_suspects = suspects_num - suspects_rejected
-        unknown_weapons = weapons_num - weapons_rejected
-        unknown_rooms = rooms_num - rooms_rejected
-
-
-        for card in state._active_suggestion:
-            if card in state._players[player_index].cards_rejected_for_me:
-                return card
-        for card in state._active_suggestion:
-            if card not in state._players[player_index]._cards and card not in state._players[player_index].cards_no_one_could_reject_for_me:
-                if (card.get_type() == 'suspect' and unknown_suspects > 1) or (card.get_type() == 'weapon' and unknown_weapons > 1) \
-                    or (card.get_type() == 'room' and unknown_rooms > 1):
-                    rejects.append(card)
-        if not rejects:
-            return None
-        
-        # Random choice
-        known_cards = len(state._players[player_index].cards_rejected_for_me) + len(state._players[player_index].cards_no_one_could_reject_for_me) * 1.5
-        rejection_prob = min(known_cards / len(state._cards) + 0.01, 1)
-        rejects.append(None)
-        reject_probs = [1] * len(rejects)
-        reject_probs[-1] = rejection_prob
-
-        return random.choices(rejects, weights=reject_probs)[0]
-
-    def probability(self, state, action, actions):
-        return 1 / len(actions)
+    def probability(self, state, action, actions_num):
+        # actions_num: the number of actions, counting every action as the number of actions it stands for
+        return get_multiplicity(action) / actions_num
     
     def is_terminal(self, state: GameState):
         return state.is_terminal
@@ -177,12 +280,15 @@ class ExpectimaxPlayer(CluedoPlayer):
     
     def evaluate(self, state: GameState):
         # Evaluate the desirability of a game state
+        if SCORE_CACHE:
+            return self.score_cache.get_score(state)
         return state.get_score()
     
     def play_turn(self, state: GameState):
         # Choose the best action using expectimax
-        best_action = None
-        best_value = float('-inf')
+        if TRANSPOSITIONS:
+            self.transposition_table.new_search()
+            state.get_hash() # computed once here, then updated incrementally by every action applied in the search
         possible_actions = self.get_possible_actions(state)
         unknown_cards = len(state._cards) - len(self._cards) - len(self.cards_rejected_for_me) - len(self.cards_no_one_could_reject_for_me)
         accustaion = True
@@ -190,13 +296,53 @@ class ExpectimaxPlayer(CluedoPlayer):
             accustaion = False
         if len(self.cards_no_one_could_reject_for_me) >= 3:
             accustaion = True
-        for action in possible_actions:
-            if action[0] != Action.ACCUSATION or accustaion:
-                value = self.expectimax(self.result(state, action), depth=DEPTH)
-                if value > best_value:
-                    best_value = value
-                    best_action = action
+        possible_actions = [action for action in possible_actions if action[0] != Action.ACCUSATION or accustaion]
+        if self.time_budget_ms is not None:
+            best_action = self.iterative_deepening(state, possible_actions)
+        elif self.parallel_root is not None:
+            best_action = search_root_parallel(self, state, possible_actions, DEPTH, self.parallel_root)
+        else:
+            best_action = self.search_root(state, possible_actions, DEPTH)
         return best_action[0], best_action[1]
+
+    def search_root(self, state: GameState, actions, depth):
+        # Returns the root action with the highest expected value, searching depth deep below each of them
+        best_action = None
+        best_value = float('-inf')
+        for action in actions:
+            # Only actions better than the best one found so far matter at the root
+            alpha = best_value if PRUNING else float('-inf')
+            value = self.root_action_value(state, action, depth, alpha)
+            if value > best_value:
+                best_value = value
+                best_action = action
+        return best_action
+
+    def root_action_value(self, state: GameState, action, depth, alpha=float('-inf')):
+        return self.child_value(state, action, depth=depth, alpha=alpha)
+
+    def iterative_deepening(self, state: GameState, actions):
+        """
+        Searches 1, 2, 3... deep until the time budget runs out, and returns the best action of the deepest completed
+        iteration. Every iteration searches the best action of the previous one first. The first iteration always
+        completes, so there is a move even if the budget is too small for it.
+        """
+        deadline = SearchDeadline(self.time_budget_ms)
+        best_action = None
+        for depth in range(1, MAX_ITERATIVE_DEPTH + 1):
+            if best_action is not None:
+                actions = [best_action] + [action for action in actions if action is not best_action]
+                self._deadline = deadline
+            try:
+                best_action = self.search_root(state, actions, depth)
+            except SearchTimeout:
+                break # the search unwound through the undo tokens, the state is restored
+            finally:
+                self._deadline = None
+            self.completed_depth = depth
+            if deadline.expired():
+                break
+        return best_action
     
     def reject(self, state: GameState):
         all_rejections = state.get_possible_rejections(self.get_cards(), state._active_suggestion) 
@@ -205,4 +351,4 @@ class ExpectimaxPlayer(CluedoPlayer):
                 return card
         if not all_rejections:
             return None
-        return random.choice(all_rejections)
\ No newline at end of file
+        return self.rng.choice(all_rejections)
\ No newline at end of file
@@ -0,0 +1,429 @@
+import math
+from game_elements.cluedo_player import CluedoPlayer
+from game_elements.game_state import GameState
+from game_elements.action import Action
+from game_elements.card_catalog import CARD_TYPES
+from game_elements.card_set import cards_mask, count_cards
+from game_elements.turn_events import SuggestionEvent, AccusationEvent
+from algorithms.search.search_deadline import SearchDeadline
+
+MAX_DICE_ROLL = 6
+ITERATIONS = 300 # the node budget: search iterations (one playout each) per decision, without a time budget
+EXPLORATION = 0.7 # the UCT exploration constant, the rewards are 1 (the agent won) or 0
+MAX_ACCUSATION_CANDIDATES = 2 # accusations are only searched once there are at most this many possible solutions
+MAX_DEAL_ATTEMPTS = 20 # deals sampled per iteration before settling for one that breaks a suggestion's constraint
+MAX_PLAYOUT_TURNS = 200 # player turns in a playout before it is scored as a draw
+
+
+def random_card(mask, rng):
+    # Returns the bit of a random card of the (non empty) mask
+    if not mask & (mask - 1):
+        return mask
+    bits = []
+    while mask:
+        bit = mask & -mask
+        bits.append(bit)
+        mask ^= bit
+    return rng.choice(bits)
+
+
+class ISMCTSNode():
+    """
+    A node of the search tree, reached by the agent's actions so far in the current turn.
+    The tree is shared by all the sampled deals: the agent's actions don't depend on the hidden cards, only the
+    outcomes of its suggestions do, and those are left to the sampled deal.
+    """
+    __slots__ = ('action', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, action, parent, untried):
+        self.action = action
+        self.parent = parent
+        self.children = []
+        self.untried = untried # the actions without a child node yet
+        self.visits = 0
+        self.wins = 0
+
+    def select_child(self):
+        # UCT: the best average reward plus an exploration bonus for rarely visited children
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+
+class PlayoutTables():
+    """
+    The static data of a game (cards and board) as bitmasks, built once per game setup and shared by all the
+    playouts.
+    """
+    def __init__(self, catalog, board):
+        self.catalog = catalog
+        self.board = board
+        self.all_mask = cards_mask(catalog.get_cards())
+        self.all_bits = [card.get_bit() for card in catalog.get_cards()]
+        self.type_masks = [catalog.get_type_mask(card_type) for card_type in CARD_TYPES]
+        self.type_bits = [[card.get_bit() for card in catalog.get_cards_of_type(card_type)] for card_type in CARD_TYPES]
+        self.room_bits = {}
+        for location in board.get_room_locations():
+            room = catalog.get_room_card(location)
+            if room is not None:
+                self.room_bits[location] = room.get_bit()
+        self._destinations = {} # (location, dice roll) -> (destinations, ((room destination, room bit), ...))
+
+    def get_destinations(self, location, dice_roll):
+        destinations = self._destinations.get((location, dice_roll))
+        if destinations is None:
+            reachable = self.board.get_reachable_locations(location, dice_roll)
+            rooms = tuple((destination, self.room_bits[destination]) for destination in reachable
+                          if destination in self.room_bits)
+            destinations = self._destinations[(location, dice_roll)] = (reachable, rooms)
+        return destinations
+
+
+class PlayoutGame():
+    """
+    A lightweight copy of the game for a single search iteration, with one sampled deal of the hidden cards.
+    The hands and the players' knowledge are bitmasks: known - the cards the player knows are not the solution,
+    solution_known - the cards it knows are (no one could refute them).
+    The playout policy of every player: accuse once it knows the solution, otherwise walk into a room whose card it
+    doesn't know (if it can) and suggest cards it doesn't know there.
+    """
+    def __init__(self, tables, agent_index, current, last_turn, locations, alive, solution, hands, known,
+                 solution_known):
+        self.tables = tables
+        self.agent_index = agent_index
+        self.current = current
+        self.last_turn = last_turn
+        self.locations = locations
+        self.alive = alive
+        self.solution = solution
+        self.hands = hands
+        self.known = known
+        self.solution_known = solution_known
+        self.winner = None
+
+    def apply(self, action, rng):
+        # Applies an action of the current player, given as [Action, details] like the game's actions
+        if action[0] == Action.MOVE:
+            self.locations[self.current] = action[1]
+            self.last_turn = Action.MOVE
+        elif action[0] == Action.SUGGESTION:
+            self.suggest(self.current, cards_mask(action[1]), rng)
+        elif action[0] == Action.ACCUSATION:
+            self.accuse(self.current, cards_mask(action[1]))
+        else:
+            self.end_turn()
+
+    def suggest(self, player, suggestion, rng):
+        # The next players in turn order (eliminated ones too) refute with a random card they hold
+        self.last_turn = Action.SUGGESTION
+        players_num = len(self.hands)
+        refuter = (player + 1) % players_num
+        while refuter != player:
+            held = self.hands[refuter] & suggestion
+            if held:
+                self.known[player] |= random_card(held, rng)
+                return
+            refuter = (refuter + 1) % players_num
+        self.solution_known[player] |= suggestion & ~self.hands[player]
+
+    def accuse(self, player, accusation):
+        if accusation == self.solution:
+            self.winner = player
+            return
+        self.alive[player] = False
+        if self.alive.count(True) == 1:
+            self.winner = self.alive.index(True)
+            return
+        self.end_turn()
+
+    def end_turn(self):
+        self.last_turn = None
+        self.current = (self.current + 1) % len(self.alive)
+        while not self.alive[self.current]:
+            self.current = (self.current + 1) % len(self.alive)
+
+    def get_known_solution(self, player):
+        # Returns the solution's mask if the player knows it, otherwise 0
+        solution = 0
+        for type_mask in self.tables.type_masks:
+            cards = self.solution_known[player] & type_mask
+            if not cards:
+                cards = type_mask & ~self.known[player]
+            if not cards or cards & (cards - 1):
+                return 0
+            solution |= cards
+        return solution
+
+    def move(self, player, rng):
+        location = self.locations[player]
+        destinations, rooms = self.tables.get_destinations(location, rng.randint(1, MAX_DICE_ROLL))
+        targets = [room for room, room_bit in rooms if not room_bit & self.known[player] and room not in self.locations]
+        if not targets:
+            targets = [destination for destination in destinations if destination not in self.locations]
+        if targets:
+            self.locations[player] = rng.choice(targets)
+        self.last_turn = Action.MOVE
+
+    def pick_unknown(self, player, type_index, rng):
+        # A random card of the type that the player doesn't know, or any card of the type if it knows them all
+        bits = [bit for bit in self.tables.type_bits[type_index] if not bit & self.known[player]]
+        return rng.choice(bits or self.tables.type_bits[type_index])
+
+    def play_out(self, rng):
+        """
+        Plays the rest of the game with the playout policy.
+        :return: The agent's reward: 1 if it won, 0 if it lost, a share of a draw if the game got too long.
+        """
+        turns = 0
+        while self.winner is None:
+            if not self.alive[self.agent_index]:
+                return 0
+            if turns == MAX_PLAYOUT_TURNS:
+                return 1 / self.alive.count(True)
+            player = self.current
+            if self.last_turn is None:
+                solution = self.get_known_solution(player)
+                if solution:
+                    self.accuse(player, solution)
+                    continue
+                self.move(player, rng)
+            if self.last_turn == Action.MOVE:
+                room_bit = self.tables.room_bits.get(self.locations[player])
+                if room_bit is not None:
+                    self.suggest(player, room_bit | self.pick_unknown(player, 0, rng) | self.pick_unknown(player, 1, rng),
+                                 rng)
+            solution = self.get_known_solution(player)
+            if solution:
+                self.accuse(player, solution)
+            else:
+                self.end_turn()
+            turns += 1
+        return 1 if self.winner == self.agent_index else 0
+
+
+class ISMCTSPlayer(CluedoPlayer):
+    """
+    Information set Monte Carlo tree search (single observer): every iteration samples a deal of the hidden cards
+    (the solution and the other players' hands) that is consistent with what the agent saw, walks the shared tree of
+    the agent's actions in this turn with UCT, and plays the game out with a cheap policy on a PlayoutGame.
+    The search stops after the node budget (iterations) or the time budget, and plays the most visited action.
+    """
+    def __init__(self, player_index, name, iterations=None, time_budget_ms=None):
+        """
+        :param iterations: Search iterations per decision. Default: ITERATIONS, or no limit with a time budget.
+        :param time_budget_ms: Time budget per decision in milliseconds. Default: none.
+        """
+        super().__init__(player_index, name)
+        self._player_index = player_index
+        if iterations is None and time_budget_ms is None:
+            iterations = ITERATIONS
+        self.iterations = iterations
+        self.time_budget_ms = time_budget_ms
+        self.playouts = 0 # since the player was created
+        self._suggestions = [] # (suggester, suggestion mask, refuter or None, bit of the card shown to me or 0)
+        self._wrong_accusations = set() # masks of the accusations that were wrong
+        self._tables = None
+
+    def reset_knowledge(self):
+        self._suggestions = []
+        self._wrong_accusations = set()
+
+    def handle_suggestion_event(self, event: SuggestionEvent):
+        shown_card = event.get_shown_card(self._player_index)
+        self._suggestions.append((event.get_suggester(), cards_mask(event.get_suggestion()), event.get_refuter(),
+                                  shown_card.get_bit() if shown_card is not None else 0))
+
+    def handle_accusation_event(self, event: AccusationEvent):
+        if not event.is_correct():
+            self._wrong_accusations.add(cards_mask(event.get_accusation()))
+
+    def play_turn(self, state: GameState):
+        if self._tables is None or self._tables.catalog is not state._catalog:
+            self._tables = PlayoutTables(state._catalog, state._game_board)
+        dice_roll = self.rng.randint(1, MAX_DICE_ROLL)
+        root = ISMCTSNode(None, None, self.get_root_actions(state, dice_roll))
+        if len(root.untried) == 1:
+            return root.untried[0][0], root.untried[0][1]
+
+        constraints = self.get_deal_constraints(state)
+        deadline = SearchDeadline(self.time_budget_ms) if self.time_budget_ms is not None else None
+        iteration = 0
+        while self.iterations is None or iteration < self.iterations:
+            if deadline is not None and deadline.expired():
+                break
+            self.run_iteration(root, self.sample_game(state, constraints))
+            iteration += 1
+        self.playouts += iteration
+
+        best_child = max(root.children, key=lambda child: child.visits)
+        return best_child.action[0], best_child.action[1]
+
+    def run_iteration(self, root, game):
+        node = root
+        while not node.untried and node.children:
+            node = node.select_child()
+            game.apply(node.action, self.rng)
+        if node.untried:
+            action = node.untried.pop(self.rng.randrange(len(node.untried)))
+            game.apply(action, self.rng)
+            child = ISMCTSNode(action, node, self.get_tree_actions(action))
+            node.children.append(child)
+            node = child
+        reward = game.play_out(self.rng)
+        while node is not None:
+            node.visits += 1
+            node.wins += reward
+            node = node.parent
+
+    ##### The agent's actions #####
+    def get_root_actions(self, state: GameState, dice_roll):
+        legal_actions = state.get_legal_actions(self._player_index)
+        actions = []
+        if Action.MOVE in legal_actions:
+            for location in state.get_legal_move_locations(dice_roll, player_index=self._player_index):
+                actions.append([Action.MOVE, location])
+        if Action.SUGGESTION in legal_actions:
+            actions += self.get_suggestions(state.get_player_location(self._player_index))
+        actions += self.get_accusations()
+        if Action.ENDTURN in legal_actions:
+            actions.append([Action.ENDTURN, None])
+        if not actions:
+            actions.append([Action.ENDTURN, None])
+        return actions
+
+    def get_tree_actions(self, action):
+        # The actions that follow the agent's action in the same turn (none after it ends)
+        if action[0] == Action.MOVE:
+            return self.get_suggestions(action[1]) + self.get_accusations() + [[Action.ENDTURN, None]]
+        if action[0] == Action.SUGGESTION:
+            return self.get_accusations() + [[Action.ENDTURN, None]]
+        return []
+
+    def get_suggestions(self, location):
+        # The suggestions in the room at the location, of the suspects and weapons the agent doesn't know (or all
+        # of a type if it knows them all)
+        room = self._tables.catalog.get_room_card(location)
+        if room is None or room.get_bit() & self.cards_rejected_for_me.mask:
+            return []
+        known = self._cards.mask | self.cards_rejected_for_me.mask
+        suspects, weapons = [[card for card in self._tables.catalog.get_cards_of_type(card_type)
+                              if not card.get_bit() & known] or self._tables.catalog.get_cards_of_type(card_type)
+                             for card_type in CARD_TYPES[:2]]
+        return [[Action.SUGGESTION, (suspect, weapon, room)] for suspect in suspects for weapon in weapons]
+
+    def get_accusations(self):
+        # The possible solutions, if there are at most MAX_ACCUSATION_CANDIDATES of them
+        known = self._cards.mask | self.cards_rejected_for_me.mask
+        solution_known = self.cards_no_one_could_reject_for_me.mask & ~self._cards.mask
+        candidates = []
+        for card_type in CARD_TYPES:
+            cards = [card for card in self._tables.catalog.get_cards_of_type(card_type) if card.get_bit() & solution_known]
+            if not cards:
+                cards = [card for card in self._tables.catalog.get_cards_of_type(card_type) if not card.get_bit() & known]
+            candidates.append(cards)
+        if len(candidates[0]) * len(candidates[1]) * len(candidates[2]) > MAX_ACCUSATION_CANDIDATES:
+            return []
+        return [[Action.ACCUSATION, (suspect, weapon, room)] for suspect in candidates[0] for weapon in candidates[1]
+                for room in candidates[2]
+                if suspect.get_bit() | weapon.get_bit() | room.get_bit() not in self._wrong_accusations]
+
+    ##### Sampling deals #####
+    def get_deal_constraints(self, state: GameState):
+        """
+        Collects what the agent knows about the hidden cards, once per decision:
+        :return: (holders of the cards shown to the agent, the cards every player couldn't refute,
+                  (player, suggestion mask) of the refutations the agent didn't see, the number of other players'
+                  cards)
+        """
+        players_num = len(state._players)
+        shown_cards = [] # (holder, card bit)
+        forbidden = [0] * players_num # cards the player doesn't hold, since it couldn't refute a suggestion of them
+        refutations = [] # (refuter, suggestion mask): the refuter holds one of the cards
+        for suggester, suggestion, refuter, shown_card in self._suggestions:
+            player = (suggester + 1) % players_num
+            while player != suggester and player != refuter:
+                forbidden[player] |= suggestion
+                player = (player + 1) % players_num
+            if refuter is None or refuter == self._player_index:
+                continue
+            if shown_card and suggester == self._player_index:
+                shown_cards.append((refuter, shown_card))
+            else:
+                refutations.append((refuter, suggestion))
+        others_cards_num = len(self._tables.all_bits) - 3 - count_cards(self._cards.mask)
+        return shown_cards, forbidden, refutations, others_cards_num
+
+    def sample_game(self, state: GameState, constraints):
+        shown_cards, forbidden, refutations, others_cards_num = constraints
+        tables = self._tables
+        my_cards = self._cards.mask
+        known = my_cards | self.cards_rejected_for_me.mask
+        solution_known = self.cards_no_one_could_reject_for_me.mask & ~my_cards
+        players_num = len(state._players)
+        others = [player for player in range(players_num) if player != self._player_index]
+
+        for attempt in range(MAX_DEAL_ATTEMPTS):
+            # The solution: the known solution card of every type, or a card the agent doesn't know
+            solution = 0
+            for type_mask, type_bits in zip(tables.type_masks, tables.type_bits):
+                cards = solution_known & type_mask
+                solution |= cards if cards else self.rng.choice([bit for bit in type_bits if not bit & known])
+            consistent = solution not in self._wrong_accusations
+
+            # The other players' hands: the cards shown to the agent go to their holders, the rest are dealt as
+            # evenly as possible to players that could have them
+            hands = [0] * players_num
+            hands[self._player_index] = my_cards
+            for holder, card in shown_cards:
+                hands[holder] |= card
+            capacity = [0] * players_num
+            base_size, extra_cards = divmod(others_cards_num, len(others))
+            for player in others:
+                capacity[player] = base_size - count_cards(hands[player])
+            for player in self.rng.sample(others, extra_cards):
+                capacity[player] += 1
+            hidden_mask = tables.all_mask & ~solution & ~known
+            cards = [bit for bit in tables.all_bits if bit & hidden_mask]
+            self.rng.shuffle(cards)
+            for card in cards:
+                holders = [player for player in others if capacity[player] > 0 and not card & forbidden[player]]
+                if not holders:
+                    consistent = False
+                    holders = [player for player in others if capacity[player] > 0] or others
+                holder = self.rng.choice(holders)
+                hands[holder] |= card
+                capacity[holder] -= 1
+            for refuter, suggestion in refutations:
+                if not hands[refuter] & suggestion:
+                    consistent = False
+            if consistent:
+                break
+
+        # Replay the other players' suggestions on the deal, for what they know
+        players_known = list(hands)
+        players_known[self._player_index] = known
+        players_solution_known = [0] * players_num
+        players_solution_known[self._player_index] = solution_known
+        for suggester, suggestion, refuter, shown_card in self._suggestions:
+            if suggester == self._player_index:
+                continue
+            if refuter is None:
+                players_solution_known[suggester] |= suggestion & ~hands[suggester]
+            elif shown_card:
+                players_known[suggester] |= shown_card
+            elif hands[refuter] & suggestion:
+                players_known[suggester] |= random_card(hands[refuter] & suggestion, self.rng)
+
+        return PlayoutGame(tables, self._player_index, self._player_index, state.last_turn,
+                           [state.get_player_location(player) for player in range(players_num)],
+                           [player.is_in_game for player in state._players], solution, hands, players_known,
+                           players_solution_known)
+
+    def reject(self, state: GameState):
+        all_rejections = state.get_possible_rejections(self.get_cards(), state._active_suggestion)
+        for card in state._active_suggestion:
+            if card in self.cards_i_showed:
+                return card
+        if not all_rejections:
+            return None
+        return self.rng.choice(all_rejections)
@@ -1,185 +1,185 @@
 from game_elements.cluedo_player import CluedoPlayer
 from game_elements.game_state import GameState
 from game_elements.action import Action
-import copy
-import random
+from algorithms.search.transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from algorithms.search.search_deadline import SearchDeadline, SearchTimeout, MAX_ITERATIVE_DEPTH
+from algorithms.search.root_parallel import search_root_parallel
+from algorithms.simulation.outcome_model import OutcomeModel
+from game_elements.score_cache import ScoreCache
 
 MAX_DICE_ROLL = 6
-DEPTH = 1
+DEPTH = 1 # search depth when the player has no time budget
 ACCUSATION_PROB = 6
+PRUNING = True # alpha-beta pruning
+MOVE_ORDERING = True # order the actions so the alpha-beta cutoffs happen early
+STATIC_ORDERING_DEPTH = 3 # nodes at least this far from the frontier order their actions by evaluating them
+TRANSPOSITIONS = False # reuse the values of states that were already searched
+MAX_NODE_KEY = 0x9E3779B97F4A7C15 # XORed into the hash of max nodes, the same state is also searched as a min node
+SYMMETRY = False # expand one of every class of equivalent suggestions/accusations (GameState.get_class_sizes)
+SCORE_CACHE = True # memoize the evaluations of the states (game_elements.score_cache)
 
 class MinimaxPlayer(CluedoPlayer):
-    def __init__(self, player_index, name):
+    def __init__(self, player_index, name, time_budget_ms=None, parallel_root=None):
         super().__init__(player_index, name)
         self._player_index = player_index
         self.expanded = 0
+        self.pruned = 0 # children skipped by the alpha-beta cutoffs
+        self.transposition_table = TranspositionTable()
+        # With a time budget the player deepens iteratively instead of searching DEPTH deep
+        self.time_budget_ms = time_budget_ms
+        self.completed_depth = None # the depth of the last completed iteration of the last decision
+        self._deadline = None
+        # With parallel_root=N the root actions of fixed depth searches are split between N processes
+        self.parallel_root = parallel_root
+        self.outcome_model = OutcomeModel() # simulates the outcomes of the suggestions and accusations in the search
+        self.score_cache = ScoreCache()
+
+    def reset_knowledge(self):
+        # The state hashes don't include the player's own cards, so the table is only valid within a game
+        self.transposition_table.clear()
+        self.score_cache.clear()
     
-    def minimax(self, state, depth, maximizing_player):
+    def minimax(self, state, depth, maximizing_player, alpha=float('-inf'), beta=float('inf')):
+        # Alpha-beta search: alpha is the value the max player is already assured of, beta the value the min player is
+        # already assured of. A node stops expanding its children once alpha >= beta.
         if depth == 0 or self.is_terminal(state):
             index = state._player_index
             state._player_index = self._player_index
             result = self.evaluate(state)
             state._player_index = index
             return result
-        
+
+        if TRANSPOSITIONS:
+            node_hash = state.get_hash()
+            if maximizing_player == self._player_index:
+                node_hash ^= MAX_NODE_KEY
+            value = self.transposition_table.lookup(node_hash, depth, alpha, beta)
+            if value is not None:
+                return value
+            value = self.search_children(state, depth, maximizing_player, alpha, beta)
+            if value <= alpha:
+                bound = UPPER_BOUND
+            elif value >= beta:
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            self.transposition_table.store(node_hash, depth, value, bound)
+            return value
+        return self.search_children(state, depth, maximizing_player, alpha, beta)
+
+    def search_children(self, state, depth, maximizing_player, alpha, beta):
         if maximizing_player == self._player_index:
-            possible_actions = self.get_possible_actions(state)
+            possible_actions = self.order_actions(state, self.get_possible_actions(state), True, depth)
             unknown_cards = len(state._cards) - len(self._cards) - len(state._players[self._player_index].cards_rejected_for_me) - len(state._players[self._player_index].cards_no_one_could_reject_for_me)
             accustaion = True
             if unknown_cards > ACCUSATION_PROB:
                 accustaion = False
-            possible_scores = []
-            for action in possible_actions:
-                if action[0] != Action.ACCUSATION or accustaion:
-                    new_state = self.result(state, action)
+            # only the actions that are searched can be pruned
+            possible_actions = [action for action in possible_actions if action[0] != Action.ACCUSATION or accustaion]
+            best_score = float('-inf')
+            for index, action in enumerate(possible_actions):
+                undo_token = self.apply_action(state, action)
+                try:
                     if action[0] == Action.ENDTURN:
-                        possible_scores.append(self.minimax(new_state, depth - 1, -1))
+                        score = self.minimax(state, depth - 1, -1, alpha, beta)
                     if action[0] != Action.ENDTURN:
-                        possible_scores.append(self.minimax(new_state, depth - 1, self._player_index))
-            return max(possible_scores)
+                        score = self.minimax(state, depth - 1, self._player_index, alpha, beta)
+                finally:
+                    state.undo(undo_token)
+                best_score = max(best_score, score)
+                if PRUNING:
+                    alpha = max(alpha, best_score)
+                    if alpha >= beta:
+                        self.pruned += len(possible_actions) - index - 1
+                        break
+            return best_score
 
             # return max(self.minimax(self.result(state, action), depth - 1, state._player_index)
             #            for action in self.get_possible_actions(state))
         else:
-            possible_actions = self.get_possible_actions(state)
+            possible_actions = self.order_actions(state, self.get_possible_actions(state), False, depth)
             unknown_cards = len(state._cards) - len(self._cards) - len(state._players[self._player_index].cards_rejected_for_me) - len(state._players[self._player_index].cards_no_one_could_reject_for_me)
             accustaion = True
             if unknown_cards > ACCUSATION_PROB:
                 accustaion = False
-            possible_scores = []
-            for action in possible_actions:
-                if action[0] != Action.ACCUSATION or accustaion:
-                    new_state = self.result(state, action)
+            # only the actions that are searched can be pruned
+            possible_actions = [action for action in possible_actions if action[0] != Action.ACCUSATION or accustaion]
+            best_score = float('inf')
+            for index, action in enumerate(possible_actions):
+                undo_token = self.apply_action(state, action)
+                try:
                     if action[0] == Action.ENDTURN:
-                        possible_scores.append(self.minimax(new_state, depth - 1, self._player_index))
+                        score = self.minimax(state, depth - 1, self._player_index, alpha, beta)
                     if action[0] != Action.ENDTURN:
-                        possible_scores.append(self.minimax(new_state, depth - 1, -1))
-            return min(possible_scores)
-            
+                        score = self.minimax(state, depth - 1, -1, alpha, beta)
+                finally:
+                    state.undo(undo_token)
+                best_score = min(best_score, score)
+                if PRUNING:
+                    beta = min(beta, best_score)
+                    if alpha >= beta:
+                        self.pruned += len(possible_actions) - index - 1
+                        break
+            return best_score
+
+    def order_actions(self, state: GameState, actions, maximize, depth):
+        """
+        Move ordering for the alpha-beta cutoffs: tries the most promising actions first (highest at max nodes, lowest
+        at min nodes). Above the frontier the actions are ranked by the evaluation of the state they lead to (without
+        the simulated outcome), at the frontier by their type: accusations, suggestions, moves into a room, the rest.
+        The ordering draws nothing from the game's random.Random.
+        """
+        if not MOVE_ORDERING:
+            return actions
+        if depth >= STATIC_ORDERING_DEPTH:
+            return sorted(actions, key=lambda action: self.static_score(state, action), reverse=maximize)
+
+        # One pass over the actions, keeping their generation order within each type
+        accusations, suggestions, room_moves, others = [], [], [], []
+        for action in actions:
+            if action[0] == Action.ACCUSATION:
+                accusations.append(action)
+            elif action[0] == Action.SUGGESTION:
+                suggestions.append(action)
+            elif action[0] == Action.MOVE and state._game_board.is_room(action[1]):
+                room_moves.append(action)
+            else:
+                others.append(action)
+        if maximize:
+            return accusations + suggestions + room_moves + others
+        return others + room_moves + suggestions + accusations
+
+    def static_score(self, state: GameState, action):
+        undo_token = state.apply_action(action)
+        try:
+            index = state._player_index
+            state._player_index = self._player_index
+            score = self.evaluate(state)
+            state._player_index = index
+        finally:
+            state.undo(undo_token)
+        return score
+
     def get_possible_actions(self, state: GameState):
+        if self._deadline is not None:
+            self._deadline.check()
         self.expanded += 1
-        dice_roll = random.randint(1, 6)
-        return state.get_all_possible_actions(self._player_index, dice_roll)
+        dice_roll = self.rng.randint(1, 6)
+        return state.get_all_possible_actions(self._player_index, dice_roll, SYMMETRY)
     
-    def result(self, state: GameState, action):
+    def apply_action(self, state: GameState, action):
+        # Applies the action (and a simulated outcome of it) to the state in place, returns the undo token
         player_index = state._player_index
-        new_state = copy.deepcopy(state)
-        if action[0] == Action.MOVE:
-            new_state.apply_move(action[1])
+        undo_token = state.apply_action(action)
         if action[0] == Action.SUGGESTION:
-            new_state.apply_suggestion(action[1])
-            rejected_card = self.random_reject(new_state, player_index)
-            if rejected_card and rejected_card: # not in new_state._players[player_index]._cards:
-                new_state._players[self._player_index].cards_rejected_for_me.add(rejected_card)
-            else:
-                if new_state._active_suggestion[0] not in new_state._players[self._player_index]._cards:
-                    new_state._players[self._player_index].cards_no_one_could_reject_for_me.add(new_state._active_suggestion[0])
-                if new_state._active_suggestion[1] not in new_state._players[self._player_index]._cards:
-                    new_state._players[self._player_index].cards_no_one_could_reject_for_me.add(new_state._active_suggestion[1])
-                if new_state._active_suggestion[2] not in new_state._players[self._player_index]._cards:
-                    new_state._players[self._player_index].cards_no_one_could_reject_for_me.add(new_state._active_suggestion[2])
+            rejected_card = self.outcome_model.sample_rejection(state, player_index, self.rng)
+            state.apply_rejection(self._player_index, rejected_card, undo_token)
 
         if action[0] == Action.ACCUSATION:
-            new_state.apply_accusation(action[1])
-            result = self.random_accusation(new_state, player_index)
-            if result:
-                new_state.winner = player_index
-                new_state.is_terminal = True
-            else:
-                new_state._players[player_index].is_in_game = False
-                # Check if game ended
-                active_players = 0
-                active_player = None
-                for player in new_state._players:
-                    if player.is_in_game:
-                        active_player = player
-                        active_players += 1
-                if active_players <= 1:
-                    new_state.is_terminal = True
-                    new_state.winner = active_player
-                else:
-                    new_state.next_turn()
-                
-
-
-        if action[0] == Action.ENDTURN:
-            new_state.apply_end_turn()
-        
-        return new_state
-
-    def random_accusation(self, state: GameState, player_index):
-        if state._active_accusation in state.all_accusations:
-            return False
-        num_of_cards_i_discovered = len(state._players[player_index].cards_rejected_for_me) + len(state._players[player_index].cards_no_one_could_reject_for_me)
-        unknown_cards = len(state._cards) - len(state[player_index]._cards) - num_of_cards_i_discovered
-
-        choices = [True, False]
-        win_prob = [0.05, 0.95]
-        if unknown_cards <= 5:
-            win_prob = [0.2, 0.80]
-        if unknown_cards <= 4:
-            win_prob = [0.4, 0.60]
-        if unknown_cards < 4:
-            win_prob = [0.9, 0.10]
-        choice = random.choices(choices, weights=[win_prob, 1 - win_prob])[0]
-        return choice
-
-    def random_reject(self, state: GameState, player_index):
-        rejects = []
-        suspects_num = 0
-        rooms_num = 0
-        weapons_num = 0
-        for card in state._cards:
-            if card.get_type() == 'suspect':
-                suspects_num += 1
-            if card.get_type() == 'weapon':
-                weapons_num += 1
-            if card.get_type() == 'room':
-                rooms_num += 1
-        suspects_rejected = 0
-        rooms_rejected = 0
-        weapons_rejected = 0
-        for card in state._players[player_index].cards_rejected_for_me:
-            if card.get_type() == 'suspect':
-                suspects_rejected += 1
-            if card.get_type() == 'weapon':
-                weapons_rejected += 1
-            if card.get_type() == 'room':
-                rooms_rejected += 1
-        
-        for card in state._players[player_index]._cards:
-            if card.get_type() == 'suspect':
-                suspects_rejected += 1
-            if card.get_type() == 'weapon':
-                weapons_rejected += 1
-            if card.get_type() == 'room':
-                rooms_rejected += 1
-                
-        unknown_suspects = suspects_num - suspects_rejected
-        unknown_weapons = weapons_num - weapons_rejected
-        unknown_rooms = rooms_num - rooms_rejected
-
-
-        for card in state._active_suggestion:
-            if card in state._players[player_index].cards_rejected_for_me:
-                return card
-        for card in state._active_suggestion:
-            if card not in state._players[player_index]._cards and card not in state._players[player_index].cards_no_one_could_reject_for_me:
-                if (card.get_type() == 'suspect' and unknown_suspects > 1) or (card.get_type() == 'weapon' and unknown_weapons > 1) \
-                    or (card.get_type() == 'room' and unknown_rooms > 1):
-                    rejects.append(card)
-        if not rejects:
-            return None
-        
-        # Random choice
-        known_cards = len(state._players[player_index].cards_rejected_for_me) + len(state._players[player_index].cards_no_one_could_reject_for_me) * 1.5
-        rejection_prob = min(known_cards / len(state._cards) + 0.01, 1)
-        rejects.append(None)
-        reject_probs = [1] * len(rejects)
-        reject_probs[-1] = rejection_prob
-
-        return random.choices(rejects, weights=reject_probs)[0]
+            result = self.outcome_model.sample_accusation(state, player_index, self.rng)
+            state.apply_accusation_result(player_index, result, undo_token)
 
+        return undo_token
 
     def is_agent_turn(self, state: GameState):
         return state.get_current_player() == self._player_index
@@ -189,12 +189,15 @@ class MinimaxPlayer(CluedoPlayer):
     
     def evaluate(self, state: GameState):
         # Evaluate the desirability of a game state
+        if SCORE_CACHE:
+            return self.score_cache.get_score(state)
         return state.get_score()
     
     def play_turn(self, state: GameState):
         # Choose the best action using minimax
-        best_action = None
-        best_value = float('-inf')
+        if TRANSPOSITIONS:
+            self.transposition_table.new_search()
+            state.get_hash() # computed once here, then updated incrementally by every action applied in the search
         possible_actions = self.get_possible_actions(state)
         unknown_cards = len(state._cards) - len(self._cards) - len(self.cards_rejected_for_me) - len(self.cards_no_one_could_reject_for_me)
         accustaion = True
@@ -202,13 +205,58 @@ class MinimaxPlayer(CluedoPlayer):
             accustaion = False
         if len(self.cards_no_one_could_reject_for_me) >= 3:
             accustaion = True
-        for action in possible_actions:
-            if action[0] != Action.ACCUSATION or accustaion:
-                value = self.minimax(self.result(state, action), depth=DEPTH, maximizing_player=self._player_index)
-                if value > best_value:
-                    best_value = value
-                    best_action = action
+        possible_actions = [action for action in self.order_actions(state, possible_actions, True, DEPTH + 1)
+                            if action[0] != Action.ACCUSATION or accustaion]
+        if self.time_budget_ms is not None:
+            best_action = self.iterative_deepening(state, possible_actions)
+        elif self.parallel_root is not None:
+            best_action = search_root_parallel(self, state, possible_actions, DEPTH, self.parallel_root)
+        else:
+            best_action = self.search_root(state, possible_actions, DEPTH)
         return best_action[0], best_action[1]
+
+    def search_root(self, state: GameState, actions, depth):
+        # Returns the best of the (ordered) root actions, searching depth deep below each of them
+        best_action = None
+        best_value = float('-inf')
+        for action in actions:
+            # Only actions better than the best one found so far matter at the root
+            alpha = best_value if PRUNING else float('-inf')
+            value = self.root_action_value(state, action, depth, alpha)
+            if value > best_value:
+                best_value = value
+                best_action = action
+        return best_action
+
+    def root_action_value(self, state: GameState, action, depth, alpha=float('-inf')):
+        undo_token = self.apply_action(state, action)
+        try:
+            return self.minimax(state, depth=depth, maximizing_player=self._player_index, alpha=alpha)
+        finally:
+            state.undo(undo_token)
+
+    def iterative_deepening(self, state: GameState, actions):
+        """
+        Searches 1, 2, 3... deep until the time budget runs out, and returns the best action of the deepest completed
+        iteration. Every iteration searches the best action of the previous one first. The first iteration always
+        completes, so there is a move even if the budget is too small for it.
+        """
+        deadline = SearchDeadline(self.time_budget_ms)
+        best_action = None
+        for depth in range(1, MAX_ITERATIVE_DEPTH + 1):
+            if best_action is not None:
+                actions = [best_action] + [action for action in actions if action is not best_action]
+                self._deadline = deadline
+            try:
+                best_action = self.search_root(state, actions, depth)
+            except SearchTimeout:
+                break # the search unwound through the undo tokens, the state is restored
+            finally:
+                self._deadline = None
+            self.completed_depth = depth
+            if deadline.expired():
+                break
+        return best_action
     
 
     def reject(self, state: GameState):
@@ -218,4 +266,4 @@ class MinimaxPlayer(CluedoPlayer):
                 return card
         if not all_rejections:
             return None
-        return random.choice(all_rejections)
\ No newline at end of file
+        return self.rng.choice(all_rejections)
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Root-parallel search for the minimax and expectimax players (their parallel_root option).
+The first (best ordered) root action is searched first, then the others are split between the processes of a
+persistent pool, searched with the value of the first one as alpha. Every task gets a compact copy of the state
+(card IDs, masks and locations instead of the pickled GameState with all the players), rebuilds it once and searches
+each of its root actions with its own random.Random (derived from a seed drawn once per decision and the action's
+index) and an empty transposition table. The value of a root action then doesn't depend on which process searched it
+or what it searched before, so any number of processes (and parallel_root=1, which runs the same tasks in this
+process) choose the same action.
+"""
+from game_elements.board import Board
+from game_elements.card import Card
+from game_elements.card_catalog import CardCatalog, CARD_TYPES
+from game_elements.card_set import CardSet
+from game_elements.cluedo_player import CluedoPlayer
+from game_elements.game_state import GameState, PLAYER_CARD_SETS
+from game_elements.action import Action
+from game_elements.seed_stream import SeedStream
+
+TASKS_PER_PROCESS = 2 # root actions are split into this many tasks per process, to even out their search times
+
+_pools = {} # processes -> the ProcessPoolExecutor, started on first use and kept for the next decisions
+_setups = {} # card names -> (Board, CardCatalog), rebuilt once per game setup in every process
+_agents = {} # (player class, index) -> the player that searches the tasks in this process
+
+
+def get_pool(processes):
+    pool = _pools.get(processes)
+    if pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = _pools[processes] = ProcessPoolExecutor(max_workers=processes)
+    return pool
+
+
+def pack_cards(cards):
+    return None if cards is None else tuple(card.get_id() for card in cards)
+
+
+def unpack_cards(card_ids, catalog):
+    return None if card_ids is None else tuple(catalog.get_card(card_id) for card_id in card_ids)
+
+
+def pack_action(action):
+    if action[0] == Action.SUGGESTION or action[0] == Action.ACCUSATION:
+        return action[0], pack_cards(action[1])
+    return action[0], action[1]
+
+
+def unpack_action(packed_action, catalog):
+    action_type, details = packed_action
+    if action_type == Action.SUGGESTION or action_type == Action.ACCUSATION:
+        return [action_type, unpack_cards(details, catalog)]
+    return [action_type, details]
+
+
+def pack_state(state: GameState):
+    """
+    :return: A tuple of ints, names and masks with everything the search reads from the state.
+    """
+    catalog = state._catalog
+    card_names = tuple(tuple(card.get_name() for card in catalog.get_cards_of_type(card_type)) for card_type in CARD_TYPES)
+    # the players' card sets are sent as masks
+    players = tuple((player.get_location(), player.is_in_game, tuple(getattr(player, name).mask for name in PLAYER_CARD_SETS))
+                    for player in state._players)
+    rejecting_card = state.current_rejecting_card.get_id() if state.current_rejecting_card is not None else None
+    return (card_names, players, state._player_index, state.last_turn, pack_cards(state._active_suggestion),
+            pack_cards(state._active_accusation), tuple(pack_cards(accusation) for accusation in state.all_accusations),
+            state.current_suggesting_player, state.current_rejecting_player, rejecting_card, state.is_terminal)
+
+
+def unpack_state(packed_state, agent_class, agent_index):
+    """
+    Rebuilds the state in this process, the player at agent_index is the (reused) searching agent.
+    :return: (GameState, the agent)
+    """
+    (card_names, players, player_index, last_turn, suggestion, accusation, all_accusations, suggesting_player,
+     rejecting_player, rejecting_card, is_terminal) = packed_state
+    setup = _setups.get(card_names)
+    if setup is None:
+        board = Board()
+        suspects, weapons, rooms = [[Card(card_type, name) for name in names]
+                                    for card_type, names in zip(CARD_TYPES, card_names)]
+        setup = _setups[card_names] = (board, CardCatalog(suspects, weapons, rooms, board))
+    board, catalog = setup
+
+    agent = _agents.get((agent_class, agent_index))
+    if agent is None:
+        agent = _agents[(agent_class, agent_index)] = agent_class(agent_index, f"Root search {agent_index + 1}")
+    state_players = []
+    for index, (location, is_in_game, masks) in enumerate(players):
+        player = agent if index == agent_index else CluedoPlayer(index, f"Player {index + 1}")
+        player.set_location(location)
+        player.is_in_game = is_in_game
+        for name, mask in zip(PLAYER_CARD_SETS, masks):
+            setattr(player, name, CardSet(card for card in catalog.get_cards() if card.get_bit() & mask))
+        state_players.append(player)
+
+    state = GameState(game_cards=catalog.get_cards(), accusation=unpack_cards(accusation, catalog), game_board=board,
+                      players=state_players, player_index=player_index, current_suggesting_player=suggesting_player,
+                      current_rejecting_player=rejecting_player,
+                      current_rejecting_card=catalog.get_card(rejecting_card) if rejecting_card is not None else None,
+                      all_suggestions=[], last_turn=last_turn,
+                      all_accusations=[unpack_cards(card_ids, catalog) for card_ids in all_accusations],
+                      is_terminal=is_terminal, suggestion=unpack_cards(suggestion, catalog), catalog=catalog)
+    return state, agent
+
+
+def search_root_actions(agent_class, agent_index, packed_state, packed_actions, depth, seed, alpha=float('-inf')):
+    """
+    The task of a process: searches the given root actions, each independently of the others.
+    :param packed_actions: A list of (root index, packed action).
+    :param alpha: Values of at most alpha don't matter (the value of an action searched before), they are only
+                  upper bounds.
+    :return: ([(root index, value)], nodes expanded, children pruned)
+    """
+    state, agent = unpack_state(packed_state, agent_class, agent_index)
+    seed_stream = SeedStream(seed)
+    expanded, pruned = agent.expanded, agent.pruned
+    values = []
+    for index, packed_action in packed_actions:
+        agent.set_rng(seed_stream.get_rng(index))
+        state.rng = agent.rng
+        agent.transposition_table.clear()
+        agent.transposition_table.new_search()
+        values.append((index, agent.root_action_value(state, unpack_action(packed_action, state._catalog), depth, alpha)))
+    return values, agent.expanded - expanded, agent.pruned - pruned
+
+
+def search_root_parallel(agent, state: GameState, actions, depth, processes):
+    """
+    Searches the root actions over processes processes (in this process if it's 1).
+    :return: The best action, the first one of the highest value in the order of actions.
+    """
+    seed = agent.rng.getrandbits(64)
+    packed_state = pack_state(state)
+    packed_actions = [(index, pack_action(action)) for index, action in enumerate(actions)]
+    agent_class = type(agent)
+    results = [search_root_actions(agent_class, agent._player_index, packed_state, packed_actions[:1], depth, seed)]
+    alpha = results[0][0][0][1]
+    packed_actions = packed_actions[1:]
+    if processes == 1 or len(packed_actions) <= 1:
+        results.append(search_root_actions(agent_class, agent._player_index, packed_state, packed_actions, depth, seed,
+                                           alpha))
+    else:
+        tasks_num = min(len(packed_actions), processes * TASKS_PER_PROCESS)
+        pool = get_pool(processes)
+        futures = [pool.submit(search_root_actions, agent_class, agent._player_index, packed_state,
+                               packed_actions[task::tasks_num], depth, seed, alpha)
+                   for task in range(tasks_num)]
+        results += [future.result() for future in futures]
+
+    values = [None] * len(actions)
+    for task_values, expanded, pruned in results:
+        agent.expanded += expanded
+        agent.pruned += pruned
+        for index, value in task_values:
+            values[index] = value
+    best_index = max(range(len(actions)), key=lambda index: (values[index], -index))
+    return actions[best_index]
@@ -0,0 +1,25 @@
+import time
+
+MAX_ITERATIVE_DEPTH = 8 # iterative deepening stops here even if there's time left (small or finished game trees)
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when its time budget runs out, the unfinished iteration is discarded.
+    """
+    pass
+
+
+class SearchDeadline():
+    """
+    The end of the time budget of a single decision.
+    """
+    def __init__(self, time_budget_ms):
+        self._end = time.perf_counter() + time_budget_ms / 1000
+
+    def expired(self):
+        return time.perf_counter() >= self._end
+
+    def check(self):
+        if self.expired():
+            raise SearchTimeout()
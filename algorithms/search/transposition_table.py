@@ -0,0 +1,57 @@
+# Bound types of a stored value
+EXACT = 0
+LOWER_BOUND = 1 # the real value is at least the stored value (the search failed high)
+UPPER_BOUND = 2 # the real value is at most the stored value (the search failed low)
+
+TABLE_SIZE = 1 << 16
+
+
+class TranspositionTable():
+    """
+    A fixed size table of search results, indexed by the Zobrist hash of the state (GameState.get_hash).
+    Every slot holds a single entry (hash, depth, value, bound type, age). A new entry replaces the one in its slot if
+    the slot is empty, the old entry is from a previous search (turn), or the new one was searched at least as deep.
+    Counts its probes, hits and collisions (probes that found a different state in the slot).
+    """
+    def __init__(self, size=TABLE_SIZE):
+        self._size = size
+        self._entries = [None] * size
+        self._age = 0
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0
+
+    def new_search(self):
+        """
+        Called at the start of every search, entries of earlier searches become replaceable.
+        """
+        self._age += 1
+
+    def clear(self):
+        self._entries = [None] * self._size
+
+    def lookup(self, state_hash, depth, alpha=float('-inf'), beta=float('inf')):
+        """
+        :return: The stored value of the state if it was searched at least depth deep and the value can be used with
+                 the given alpha-beta window, otherwise None.
+        """
+        self.probes += 1
+        entry = self._entries[state_hash % self._size]
+        if entry is None:
+            return None
+        if entry[0] != state_hash:
+            self.collisions += 1
+            return None
+        _, entry_depth, value, bound, _ = entry
+        if entry_depth < depth:
+            return None
+        if bound == EXACT or (bound == LOWER_BOUND and value >= beta) or (bound == UPPER_BOUND and value <= alpha):
+            self.hits += 1
+            return value
+        return None
+
+    def store(self, state_hash, depth, value, bound=EXACT):
+        index = state_hash % self._size
+        entry = self._entries[index]
+        if entry is None or entry[4] != self._age or depth >= entry[1]:
+            self._entries[index] = (state_hash, depth, value, bound, self._age)
@@ -0,0 +1,93 @@
+from game_elements.card_catalog import CARD_TYPES
+from game_elements.card_set import count_cards
+from game_elements.game_state import GameState
+
+
+class OutcomeDistribution():
+    """
+    The probabilities of the simulated outcomes of suggestions and accusations. Subclass it and pass it to an
+    OutcomeModel to simulate with other probabilities.
+    """
+    def accusation_win_probability(self, unknown_cards):
+        """
+        :param unknown_cards: The number of cards the accusing player neither has nor discovered.
+        """
+        if unknown_cards < 4:
+            return 0.9
+        if unknown_cards == 4:
+            return 0.4
+        if unknown_cards == 5:
+            return 0.2
+        return 0.05
+
+    def no_rejection_weight(self, rejected_cards, not_rejected_cards, cards_num):
+        """
+        The weight of no one rejecting the suggestion, against a weight of 1 for every card that could be shown.
+        :param rejected_cards: The number of cards shown to the suggesting player so far.
+        :param not_rejected_cards: The number of cards no one could reject for the suggesting player so far.
+        """
+        return min((rejected_cards + not_rejected_cards * 1.5) / cards_num + 0.01, 1)
+
+
+class OutcomeModel():
+    """
+    Simulates the outcomes the searching and learning agents can't know when they apply an action to a GameState: the
+    card shown for a suggestion, and whether an accusation is correct.
+    Everything is counted with the masks of the players' card sets (kept up to date by CardSet on every change) and
+    the type masks of the catalog, which are looked up once per catalog.
+    """
+    def __init__(self, distribution=None):
+        self.distribution = distribution if distribution is not None else OutcomeDistribution()
+        self._catalog = None
+        self._type_masks = [] # the mask of every card type of the catalog
+        self._type_counts = [] # the number of cards of every type of the catalog
+
+    def set_catalog(self, catalog):
+        if catalog is not self._catalog:
+            self._catalog = catalog
+            self._type_masks = [catalog.get_type_mask(card_type) for card_type in CARD_TYPES]
+            self._type_counts = [count_cards(type_mask) for type_mask in self._type_masks]
+
+    def sample_rejection(self, state: GameState, player_index, rng):
+        """
+        Simulates the response to player_index's active suggestion.
+        :return: The card shown to player_index, or None if no one could reject the suggestion.
+        """
+        player = state._players[player_index]
+        rejected_cards = player.cards_rejected_for_me.mask
+        for card in state._active_suggestion:
+            if card.get_bit() & rejected_cards:
+                return card
+
+        # Only the cards of the types with more than one unknown card can be shown
+        self.set_catalog(state._catalog)
+        my_cards = player._cards.mask
+        not_rejected_cards = player.cards_no_one_could_reject_for_me.mask
+        showable_cards = 0
+        for type_mask, type_count in zip(self._type_masks, self._type_counts):
+            if type_count - count_cards(rejected_cards & type_mask) - count_cards(my_cards & type_mask) > 1:
+                showable_cards |= type_mask
+        showable_cards &= ~(my_cards | not_rejected_cards)
+        rejects = [card for card in state._active_suggestion if card.get_bit() & showable_cards]
+        if not rejects:
+            return None
+
+        weights = [1] * len(rejects)
+        weights.append(self.distribution.no_rejection_weight(count_cards(rejected_cards),
+                                                             count_cards(not_rejected_cards), len(state._cards)))
+        rejects.append(None)
+        return rng.choices(rejects, weights=weights)[0]
+
+    def sample_accusation(self, state: GameState, player_index, rng):
+        """
+        Simulates the result of player_index's active accusation, after it was applied to the state. A repeat of an
+        earlier accusation (with the same cards), which was wrong, is wrong again.
+        :return: True if the accusation is correct.
+        """
+        if state.repeated_accusation:
+            return False
+        player = state._players[player_index]
+        unknown_cards = len(state._cards) - count_cards(player._cards.mask) - \
+                        count_cards(player.cards_rejected_for_me.mask) - \
+                        count_cards(player.cards_no_one_could_reject_for_me.mask)
+        return rng.random() < self.distribution.accusation_win_probability(unknown_cards)
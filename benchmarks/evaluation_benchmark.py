@@ -0,0 +1,76 @@
+"""
+Measures the cost of the leaf evaluations (GameState.get_score) of the expectimax agent in games against a random
+player, with the score cache on and off. Both settings play the same games, so they evaluate the same states.
+
+Run from the repository root:
+    python -m benchmarks.evaluation_benchmark
+    python -m benchmarks.evaluation_benchmark --depth 3 --games 5 --suspects_num 10 --weapons_num 10
+"""
+import time
+from argparse import ArgumentParser
+from game_elements.seed_stream import SeedStream
+from algorithms.search.expectimax_player import ExpectimaxPlayer
+import algorithms.search.expectimax_player as expectimax_player
+from benchmarks.search_benchmark import create_game, measure_game
+
+
+class TimedExpectimaxPlayer(ExpectimaxPlayer):
+    """
+    Times its evaluations.
+    """
+    def __init__(self, player_index, name, time_budget_ms=None, parallel_root=None):
+        super().__init__(player_index, name, time_budget_ms, parallel_root)
+        self.evaluations = 0
+        self.evaluation_time = 0
+
+    def evaluate(self, state):
+        start = time.perf_counter()
+        score = super().evaluate(state)
+        self.evaluation_time += time.perf_counter() - start
+        self.evaluations += 1
+        return score
+
+
+def define_input_args():
+    input_parser = ArgumentParser()
+    input_parser.add_argument('--depth', type=int, default=2, help="Search depth. Default: 2")
+    input_parser.add_argument('--games', type=int, default=3, help="Number of games to measure. Default: 3")
+    input_parser.add_argument('--turns', type=int, default=20, help="Max agent decisions measured per game. Default: 20")
+    input_parser.add_argument('--seed', type=int, default=1, help="Seed for reproducibility. Default: 1")
+    input_parser.add_argument('--suspects_num', type=int, default=6, help="Number of suspects (max 10). Default: 6")
+    input_parser.add_argument('--weapons_num', type=int, default=6, help="Number of weapons (max 10). Default: 6")
+    return input_parser
+
+
+def run():
+    args = define_input_args().parse_args()
+    expectimax_player.DEPTH = args.depth
+    for score_cache in ['off', 'on']:
+        expectimax_player.SCORE_CACHE = score_cache == 'on'
+        seed_stream = SeedStream(args.seed)
+        evaluations = 0
+        evaluation_time = 0
+        search_time = 0
+        decisions = 0
+        hits = 0
+        for game in range(args.games):
+            game_manager = create_game(TimedExpectimaxPlayer, seed_stream.get_rng(game),
+                                       suspects_num=args.suspects_num, weapons_num=args.weapons_num)
+            _, _, seconds, game_decisions, _, _ = measure_game(game_manager, args.turns)
+            agent = game_manager.players[0]
+            evaluations += agent.evaluations
+            evaluation_time += agent.evaluation_time
+            hits += agent.score_cache.hits
+            search_time += seconds
+            decisions += game_decisions
+
+        print(f"score cache {score_cache}: {evaluations / decisions:.1f} evaluations per decision, "
+              f"{1e6 * evaluation_time / evaluations:.2f} us per evaluation, "
+              f"{evaluation_time / search_time:.1%} of the search time, "
+              f"{1000 * search_time / decisions:.1f} ms per decision")
+        if hits:
+            print(f"  {hits / evaluations:.1%} hits")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,104 @@
+"""
+Measures the ISMCTS agent: playouts per second, time per decision, and its win rate in 2 player games against each
+of the given opponents (the agent plays first in the even games and second in the odd ones).
+
+Run from the repository root:
+    python -m benchmarks.ismcts_benchmark --opponents kr expectimax --games 40
+    python -m benchmarks.ismcts_benchmark --opponents kr --time_budget_ms 100
+"""
+import time
+from argparse import ArgumentParser
+from game_elements.cluedo_game_manager import CluedoGameManager
+from game_elements.board import Board
+from game_elements.card import Card
+from game_elements.card_catalog import CardCatalog
+from game_elements.seed_stream import SeedStream
+from algorithms.search.ismcts_player import ISMCTSPlayer
+from algorithms.search.expectimax_player import ExpectimaxPlayer
+from algorithms.search.minimax_player import MinimaxPlayer
+from algorithms.search.random_player import RandomPlayer
+from algorithms.knowledge_representation.KRAgent import KRAgent
+
+SUSPECTS = ["Miss Scarlet", "Professor Plum", "Mrs. Peacock", "Mr. Green", "Colonel Mustard", "Mrs. White"]
+WEAPONS = ["Knife", "Candlestick", "Revolver", "Rope", "Lead Pipe", "Wrench"]
+MAX_TURNS = 2000 # a game that gets this long counts as a draw
+
+
+def define_input_args():
+    input_parser = ArgumentParser()
+    input_parser.add_argument('--opponents', type=str, nargs='+', default=['kr', 'expectimax'],
+                              choices=['random', 'minimax', 'expectimax', 'kr'])
+    input_parser.add_argument('--games', type=int, default=20, help="Games against every opponent. Default: 20")
+    input_parser.add_argument('--iterations', type=int, default=None,
+                              help="Search iterations per decision. Default: ismcts_player.ITERATIONS")
+    input_parser.add_argument('--time_budget_ms', type=int, default=None,
+                              help="Time budget per decision instead of the iterations")
+    input_parser.add_argument('--seed', type=int, default=1, help="Seed for reproducibility. Default: 1")
+    return input_parser
+
+
+def create_game(opponent, agent_first, args, rng):
+    board = Board()
+    suspects = [Card("suspect", name) for name in SUSPECTS]
+    weapons = [Card("weapon", name) for name in WEAPONS]
+    rooms = [Card("room", name) for name in board.get_room_names()]
+    catalog = CardCatalog(suspects, weapons, rooms, board)
+    agent_index = 0 if agent_first else 1
+    opponent_index = 1 - agent_index
+    players = [None, None]
+    players[agent_index] = ISMCTSPlayer(agent_index, f"ISMCTS {agent_index + 1}", iterations=args.iterations,
+                                        time_budget_ms=args.time_budget_ms)
+    if opponent == 'random':
+        players[opponent_index] = RandomPlayer(opponent_index, f"Random {opponent_index + 1}")
+    if opponent == 'minimax':
+        players[opponent_index] = MinimaxPlayer(opponent_index, f"Minimax {opponent_index + 1}")
+    if opponent == 'expectimax':
+        players[opponent_index] = ExpectimaxPlayer(opponent_index, f"Expectimax {opponent_index + 1}")
+    if opponent == 'kr':
+        players[opponent_index] = KRAgent(opponent_index, f"KR {opponent_index + 1}", suspects, weapons, rooms)
+    game_manager = CluedoGameManager(suspects=suspects, weapons=weapons, rooms=rooms, players=players,
+                                     game_board=board, test_mode=True, catalog=catalog, rng=rng)
+    return game_manager, agent_index
+
+
+def play_game(game_manager, agent_index):
+    """
+    :return: (winner or None, seconds the agent spent deciding, the agent's decisions)
+    """
+    agent_time = 0
+    decisions = 0
+    turns = 0
+    while game_manager.game_active and turns < MAX_TURNS:
+        if game_manager.current_player == agent_index:
+            start = time.perf_counter()
+            game_manager.play_turn()
+            agent_time += time.perf_counter() - start
+            decisions += 1
+        else:
+            game_manager.play_turn()
+        turns += 1
+    return game_manager.winner, agent_time, decisions
+
+
+def run():
+    args = define_input_args().parse_args()
+    seed_stream = SeedStream(args.seed)
+    for opponent in args.opponents:
+        wins = 0
+        playouts = 0
+        agent_time = 0
+        decisions = 0
+        for game in range(args.games):
+            game_manager, agent_index = create_game(opponent, game % 2 == 0, args, seed_stream.get_rng(game))
+            winner, seconds, game_decisions = play_game(game_manager, agent_index)
+            wins += winner == agent_index
+            playouts += game_manager.players[agent_index].playouts
+            agent_time += seconds
+            decisions += game_decisions
+
+        print(f"ISMCTS vs {opponent}: won {wins}/{args.games} ({wins / args.games:.0%}), "
+              f"{playouts / agent_time:.0f} playouts/sec, {1000 * agent_time / decisions:.1f} ms per decision")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,156 @@
+"""
+Measures the knowledge representation agents in games against random players, by default one agent with the maximum
+number of suspects and weapons (10/10, so 10 x 10 x 9 possible solutions): the memory of its possible solutions, the
+time per decision, per forward chaining inference, per suggestion it evaluates and per suggestion it selects (evaluating
+all the possible ones), and the inference time of all the agents (their own inferences and those of the suggestions
+they evaluate) per game turn.
+
+Run from the repository root:
+    python -m benchmarks.kr_benchmark
+    python -m benchmarks.kr_benchmark --suspects_num 6 --weapons_num 6 --opponents 3
+    python -m benchmarks.kr_benchmark --suspects_num 6 --weapons_num 6 --kr_players 6 --opponents 0
+    python -m benchmarks.kr_benchmark --kr_players 6 --opponents 0
+"""
+import sys
+import time
+from argparse import ArgumentParser
+from game_elements.cluedo_game_manager import CluedoGameManager
+from game_elements.board import Board
+from game_elements.card import Card
+from game_elements.card_catalog import CardCatalog
+from game_elements.seed_stream import SeedStream
+from algorithms.knowledge_representation.KRAgent import KRAgent
+from algorithms.search.random_player import RandomPlayer
+
+SUSPECTS = ["Miss Scarlet", "Professor Plum", "Mrs. Peacock", "Mr. Green", "Colonel Mustard", "Mrs. White",
+            "Silly McSqueezy", "Goofy Bananahead", "Wacky Wobblebottom", "Loopy Snickerdoodle"]
+WEAPONS = ["Knife", "Candlestick", "Revolver", "Rope", "Lead Pipe", "Wrench",
+           "Rubber Chicken", "Whoopee Cushion", "Banana Peel", "Squirt Gun"]
+MAX_TURNS = 2000 # a game that gets this long is stopped
+
+
+class TimedKRAgent(KRAgent):
+    """
+    Times its inferences, suggestion evaluations and suggestion selections (the inferences of the evaluations aren't
+    counted separately, they are part of the evaluations).
+    """
+    def __init__(self, index, name, suspect_cards, weapon_cards, room_cards):
+        super().__init__(index, name, suspect_cards, weapon_cards, room_cards)
+        self.inferences = 0
+        self.inference_time = 0
+        self.evaluations = 0
+        self.evaluation_time = 0
+        self.selections = 0
+        self.selection_time = 0
+
+    def forward_chaining_inference(self):
+        start = time.perf_counter()
+        facts = super().forward_chaining_inference()
+        self.inference_time += time.perf_counter() - start
+        self.inferences += 1
+        return facts
+
+    def evaluate_suggestion(self, suggestion):
+        inferences, inference_time = self.inferences, self.inference_time
+        start = time.perf_counter()
+        facts = super().evaluate_suggestion(suggestion)
+        self.evaluation_time += time.perf_counter() - start
+        self.evaluations += 1
+        self.inferences, self.inference_time = inferences, inference_time
+        return facts
+
+    def find_best_suggestion(self):
+        start = time.perf_counter()
+        suggestions = super().find_best_suggestion()
+        self.selection_time += time.perf_counter() - start
+        self.selections += 1
+        return suggestions
+
+
+def define_input_args():
+    input_parser = ArgumentParser()
+    input_parser.add_argument('--games', type=int, default=10, help="Number of games to measure. Default: 10")
+    input_parser.add_argument('--kr_players', type=int, default=1, help="Number of KR agents. Default: 1")
+    input_parser.add_argument('--opponents', type=int, default=1, help="Number of random opponents. Default: 1")
+    input_parser.add_argument('--suspects_num', type=int, default=10, help="Number of suspects (max 10). Default: 10")
+    input_parser.add_argument('--weapons_num', type=int, default=10, help="Number of weapons (max 10). Default: 10")
+    input_parser.add_argument('--seed', type=int, default=1, help="Seed for reproducibility. Default: 1")
+    return input_parser
+
+
+def create_game(args, rng):
+    board = Board()
+    suspects = [Card("suspect", name) for name in SUSPECTS[:args.suspects_num]]
+    weapons = [Card("weapon", name) for name in WEAPONS[:args.weapons_num]]
+    rooms = [Card("room", name) for name in board.get_room_names()]
+    catalog = CardCatalog(suspects, weapons, rooms, board)
+    players = [TimedKRAgent(i, f"KR {i + 1}", suspects, weapons, rooms) for i in range(args.kr_players)]
+    players += [RandomPlayer(i, f"Random {i + 1}") for i in range(args.kr_players, args.kr_players + args.opponents)]
+    return CluedoGameManager(suspects=suspects, weapons=weapons, rooms=rooms, players=players, game_board=board,
+                             test_mode=True, catalog=catalog, rng=rng)
+
+
+def solutions_size(solutions):
+    """
+    :return: The bytes taken by the possible solutions: a NumPy array with its data, or a list with its tuples.
+    """
+    if hasattr(solutions, 'nbytes'):
+        return sys.getsizeof(solutions)
+    return sys.getsizeof(solutions) + sum(sys.getsizeof(solution) for solution in solutions)
+
+
+def run():
+    args = define_input_args().parse_args()
+    seed_stream = SeedStream(args.seed)
+    decisions = 0
+    decision_time = 0
+    inferences = 0
+    inference_time = 0
+    evaluations = 0
+    evaluation_time = 0
+    selections = 0
+    selection_time = 0
+    total_turns = 0
+    wins = 0
+    memory = None
+    for game in range(args.games):
+        game_manager = create_game(args, seed_stream.get_rng(game))
+        agents = game_manager.players[:args.kr_players]
+        if memory is None:
+            memory = solutions_size(agents[0].all_possible_solutions)
+        turns = 0
+        while game_manager.game_active and turns < MAX_TURNS:
+            if game_manager.current_player < args.kr_players:
+                start = time.perf_counter()
+                game_manager.play_turn()
+                decision_time += time.perf_counter() - start
+                decisions += 1
+            else:
+                game_manager.play_turn()
+            turns += 1
+        total_turns += turns
+        wins += game_manager.winner is not None and game_manager.winner < args.kr_players
+        for agent in agents:
+            inferences += agent.inferences
+            inference_time += agent.inference_time
+            evaluations += agent.evaluations
+            evaluation_time += agent.evaluation_time
+            selections += agent.selections
+            selection_time += agent.selection_time
+
+    print(f"{args.kr_players} KR agents ({args.suspects_num} suspects, {args.weapons_num} weapons): "
+          f"won {wins}/{args.games}")
+    print(f"  possible solutions: {memory / 1024:.1f} KiB")
+    print(f"  {1000 * decision_time / decisions:.3f} ms per decision, "
+          f"{1000 * inference_time / inferences:.3f} ms per inference, "
+          f"{1000 * evaluation_time / evaluations:.3f} ms per suggestion evaluated "
+          f"({evaluations / decisions:.1f} per decision)")
+    print(f"  {1000 * selection_time / selections:.3f} ms per suggestion selected "
+          f"({evaluations / selections:.1f} suggestions evaluated)")
+    print(f"  {1000 * (inference_time + evaluation_time) / total_turns:.3f} ms of inference per game turn, with the "
+          f"inferences of the suggestions evaluated "
+          f"({total_turns / args.games:.0f} turns per game)")
+
+
+if __name__ == "__main__":
+    run()
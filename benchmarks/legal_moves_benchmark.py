@@ -0,0 +1,100 @@
+"""
+Compares GameState.get_legal_move_locations (precomputed reachability table of the board) with the previous
+recursive enumeration of all the walks, on the 7x7 board and on larger boards.
+
+Run from the repository root:
+    python -m benchmarks.legal_moves_benchmark --board_sizes 7 15 25
+"""
+import random
+import time
+from argparse import ArgumentParser
+from game_elements.board import Board
+from game_elements.card import Card
+from game_elements.cluedo_game_manager import CluedoGameManager
+from algorithms.search.random_player import RandomPlayer
+
+SUSPECTS = ["Miss Scarlet", "Professor Plum", "Mrs. Peacock", "Mr. Green", "Colonel Mustard", "Mrs. White"]
+WEAPONS = ["Knife", "Candlestick", "Revolver", "Rope", "Lead Pipe", "Wrench"]
+MAX_DICE_ROLL = 6
+
+
+def define_input_args():
+    input_parser = ArgumentParser()
+    input_parser.add_argument('--board_sizes', type=int, nargs='+', default=[7, 15, 25])
+    input_parser.add_argument('--players_num', type=int, default=6)
+    input_parser.add_argument('--calls', type=int, default=200, help="Calls measured per dice roll. Default: 200")
+    input_parser.add_argument('--seed', type=int, default=1)
+    return input_parser
+
+
+def recursive_legal_move_locations(state, step_size, player_index):
+    """
+    The previous implementation: enumerates all 4^step_size walks and dedups the destinations with a list.
+    """
+    legal_moves = []
+    player_loc = state.get_player_location(player_index)
+    player_locations = [player.get_location() for player in state._players]
+    board_size = state._game_board.get_size()
+
+    def is_within_bounds(loc):
+        return 0 <= loc[0] < board_size and 0 <= loc[1] < board_size
+
+    def find_moves(loc, remaining_steps):
+        row, col = loc
+        if remaining_steps == 0:
+            if loc != player_loc and loc not in player_locations:
+                legal_moves.append(loc)
+            return
+        for move in [(row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)]:
+            if is_within_bounds(move):
+                find_moves(move, remaining_steps - 1)
+
+    find_moves(player_loc, step_size)
+    unique_moves = []
+    for loc in legal_moves:
+        if loc not in unique_moves:
+            unique_moves.append(loc)
+    return unique_moves
+
+
+def table_legal_move_locations(state, step_size, player_index):
+    return state.get_legal_move_locations(step_size, player_index)
+
+
+def create_state(board_size, players_num, rng):
+    board = Board(size=board_size)
+    suspects = [Card("suspect", name) for name in SUSPECTS]
+    weapons = [Card("weapon", name) for name in WEAPONS]
+    rooms = [Card("room", name) for name in board.get_room_names()]
+    players = [RandomPlayer(i, f"Random {i + 1}") for i in range(players_num)]
+    game_manager = CluedoGameManager(suspects=suspects, weapons=weapons, rooms=rooms, players=players,
+                                     game_board=board, test_mode=True, rng=rng)
+    return game_manager.create_current_state()
+
+
+def time_calls(function, state, dice_roll, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function(state, dice_roll, 0)
+    return (time.perf_counter() - start) / calls
+
+
+def run():
+    args = define_input_args().parse_args()
+    for board_size in args.board_sizes:
+        state = create_state(board_size, args.players_num, random.Random(args.seed))
+        start = time.perf_counter()
+        state._game_board.get_reachable_locations(state.get_player_location(0), MAX_DICE_ROLL)
+        table_time = time.perf_counter() - start
+        print(f"Board {board_size}x{board_size} (table built in {1000 * table_time:.1f} ms):")
+        for dice_roll in range(1, MAX_DICE_ROLL + 1):
+            expected = recursive_legal_move_locations(state, dice_roll, 0)
+            assert state.get_legal_move_locations(dice_roll, 0) == expected
+            before = time_calls(recursive_legal_move_locations, state, dice_roll, args.calls)
+            after = time_calls(table_legal_move_locations, state, dice_roll, args.calls)
+            print(f"  roll {dice_roll}: {len(expected):3} locations, recursive {1e6 * before:9.1f} us, "
+                  f"table {1e6 * after:6.1f} us, x{before / after:.0f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,98 @@
+"""
+Measures games per second of short games (capped at --max_turns turns), where the game setup dominates, when every
+game constructs a new CluedoGameManager versus when the same one is reset with CluedoGameManager.reset(seed).
+Both play the same games (checked by comparing the solutions, winners and turns played).
+
+Run from the repository root:
+    python -m benchmarks.reset_benchmark --players random random --games 5000 --max_turns 10
+    python -m benchmarks.reset_benchmark --players kr kr kr --max_turns 0   (setup only)
+"""
+import time
+from argparse import ArgumentParser
+from game_elements.cluedo_game_manager import CluedoGameManager
+from game_elements.board import Board
+from game_elements.card import Card
+from game_elements.card_catalog import CardCatalog
+from game_elements.seed_stream import SeedStream
+from algorithms.knowledge_representation.KRAgent import KRAgent
+from algorithms.search.random_player import RandomPlayer
+
+SUSPECTS = ["Miss Scarlet", "Professor Plum", "Mrs. Peacock", "Mr. Green", "Colonel Mustard", "Mrs. White"]
+WEAPONS = ["Knife", "Candlestick", "Revolver", "Rope", "Lead Pipe", "Wrench"]
+
+
+def define_input_args():
+    input_parser = ArgumentParser()
+    input_parser.add_argument('--players', type=str, nargs='+', default=['random', 'random'], choices=['random', 'kr'])
+    input_parser.add_argument('--games', type=int, default=5000, help="Number of games per mode. Default: 5000")
+    input_parser.add_argument('--max_turns', type=int, default=10, help="Max turns played per game. Default: 10")
+    input_parser.add_argument('--seed', type=int, default=1, help="Seed for reproducibility. Default: 1")
+    return input_parser
+
+
+def create_game(player_types, rng):
+    board = Board()
+    suspects = [Card("suspect", name) for name in SUSPECTS]
+    weapons = [Card("weapon", name) for name in WEAPONS]
+    rooms = [Card("room", name) for name in board.get_room_names()]
+    catalog = CardCatalog(suspects, weapons, rooms, board)
+    players = []
+    for i, player_type in enumerate(player_types):
+        if player_type == 'random':
+            players.append(RandomPlayer(i, f"Random {i + 1}"))
+        if player_type == 'kr':
+            players.append(KRAgent(i, f"KR {i + 1}", suspects, weapons, rooms))
+    return CluedoGameManager(suspects=suspects, weapons=weapons, rooms=rooms, players=players, game_board=board,
+                             test_mode=True, catalog=catalog, rng=rng)
+
+
+def play_game(game_manager, max_turns):
+    """
+    :return: (solution card IDs, winner or None, turns played)
+    """
+    turns = 0
+    while game_manager.game_active and turns < max_turns:
+        game_manager.play_turn()
+        turns += 1
+    solution = tuple(card.get_id() for card in game_manager.solution.values())
+    return solution, game_manager.winner, turns
+
+
+def play_reconstructed(game_manager, seed_stream, args):
+    results = []
+    for game in range(args.games):
+        game_manager = CluedoGameManager(game_manager.suspects, game_manager.weapons, game_manager.rooms,
+                                         game_manager.players, game_manager.game_board, game_manager.test_mode,
+                                         game_manager.catalog, seed_stream.get_rng(game))
+        results.append(play_game(game_manager, args.max_turns))
+    return results
+
+
+def play_reset(game_manager, seed_stream, args):
+    results = []
+    for game in range(args.games):
+        game_manager.reset(seed_stream.get_seed(game))
+        results.append(play_game(game_manager, args.max_turns))
+    return results
+
+
+def run():
+    args = define_input_args().parse_args()
+    seed_stream = SeedStream(args.seed)
+    times = {}
+    results = {}
+    for mode, play in [('new CluedoGameManager', play_reconstructed), ('CluedoGameManager.reset', play_reset)]:
+        game_manager = create_game(args.players, seed_stream.get_rng('setup'))
+        start = time.perf_counter()
+        results[mode] = play(game_manager, seed_stream, args)
+        times[mode] = time.perf_counter() - start
+        turns = sum(game_turns for _, _, game_turns in results[mode])
+        print(f"{mode:24}: {args.games / times[mode]:8.1f} games/sec ({turns / args.games:.1f} turns per game)")
+
+    reconstructed, reset = results.values()
+    assert reconstructed == reset, "reset played different games than new game managers"
+    print(f"Same games in both modes, reset is x{times['new CluedoGameManager'] / times['CluedoGameManager.reset']:.2f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,142 @@
+"""
+Measures the search speed (nodes expanded per second) of the minimax and expectimax agents, and the nodes expanded,
+children pruned and time per decision with pruning (alpha-beta for minimax, Star1/Star2 for expectimax) on and off.
+
+Run from the repository root:
+    python -m benchmarks.search_benchmark --agent expectimax --depth 2
+    python -m benchmarks.search_benchmark --agent minimax --depth 3 --pruning on off
+    python -m benchmarks.search_benchmark --agent expectimax --depth 3 --pruning on off --suspects_num 10 --weapons_num 10
+    python -m benchmarks.search_benchmark --agent minimax --time_budget_ms 100   (iterative deepening)
+    python -m benchmarks.search_benchmark --agent expectimax --parallel_root 4   (root actions over 4 processes)
+    python -m benchmarks.search_benchmark --agent minimax --symmetry on --suspects_num 10 --weapons_num 10
+    python -m benchmarks.search_benchmark --agent minimax --depth 3 --transpositions on
+"""
+import time
+from argparse import ArgumentParser
+from game_elements.cluedo_game_manager import CluedoGameManager
+from game_elements.board import Board
+from game_elements.card import Card
+from game_elements.seed_stream import SeedStream
+from algorithms.search.expectimax_player import ExpectimaxPlayer
+from algorithms.search.minimax_player import MinimaxPlayer
+from algorithms.search.random_player import RandomPlayer
+import algorithms.search.expectimax_player as expectimax_player
+import algorithms.search.minimax_player as minimax_player
+
+SUSPECTS = ["Miss Scarlet", "Professor Plum", "Mrs. Peacock", "Mr. Green", "Colonel Mustard", "Mrs. White",
+            "Silly McSqueezy", "Goofy Bananahead", "Wacky Wobblebottom", "Loopy Snickerdoodle"]
+WEAPONS = ["Knife", "Candlestick", "Revolver", "Rope", "Lead Pipe", "Wrench",
+           "Rubber Chicken", "Whoopee Cushion", "Banana Peel", "Squirt Gun"]
+AGENTS = {'expectimax': (ExpectimaxPlayer, expectimax_player), 'minimax': (MinimaxPlayer, minimax_player)}
+
+
+def define_input_args():
+    input_parser = ArgumentParser()
+    input_parser.add_argument('--agent', type=str, default='expectimax', choices=list(AGENTS))
+    input_parser.add_argument('--depth', type=int, default=2, help="Search depth. Default: 2")
+    input_parser.add_argument('--games', type=int, default=3, help="Number of games to measure. Default: 3")
+    input_parser.add_argument('--turns', type=int, default=20, help="Max agent decisions measured per game. Default: 20")
+    input_parser.add_argument('--seed', type=int, default=1, help="Seed for reproducibility. Default: 1")
+    input_parser.add_argument('--pruning', type=str, nargs='+', default=['on'], choices=['on', 'off'],
+                              help="Pruning settings to measure. Default: on")
+    input_parser.add_argument('--transpositions', type=str, default='off', choices=['on', 'off'],
+                              help="Use the transposition table. Default: off")
+    input_parser.add_argument('--symmetry', type=str, default='off', choices=['on', 'off'],
+                              help="Expand one of every class of equivalent suggestions/accusations. Default: off")
+    input_parser.add_argument('--suspects_num', type=int, default=6, help="Number of suspects (max 10). Default: 6")
+    input_parser.add_argument('--weapons_num', type=int, default=6, help="Number of weapons (max 10). Default: 6")
+    input_parser.add_argument('--time_budget_ms', type=int, default=None,
+                              help="Search with iterative deepening within this budget per decision instead of --depth")
+    input_parser.add_argument('--parallel_root', type=int, default=None,
+                              help="Split the root actions between this many processes. Default: serial search")
+    return input_parser
+
+
+def create_game(agent_class, rng, time_budget_ms=None, suspects_num=6, weapons_num=6, parallel_root=None):
+    board = Board()
+    suspects = [Card("suspect", name) for name in SUSPECTS[:suspects_num]]
+    weapons = [Card("weapon", name) for name in WEAPONS[:weapons_num]]
+    rooms = [Card("room", name) for name in board.get_room_names()]
+    players = [agent_class(0, "Agent 1", time_budget_ms=time_budget_ms, parallel_root=parallel_root),
+               RandomPlayer(1, "Random 2")]
+    return CluedoGameManager(suspects=suspects, weapons=weapons, rooms=rooms, players=players,
+                             game_board=board, test_mode=True, rng=rng)
+
+
+def measure_game(game_manager, max_turns):
+    """
+    Plays a single game and times the agent's (player 0) decisions.
+    :return: (nodes expanded, children pruned, seconds spent searching, decisions made, slowest decision in seconds,
+              sum of the depths completed with a time budget)
+    """
+    agent = game_manager.players[0]
+    agent.expanded = 0
+    agent.pruned = 0
+    search_time = 0
+    slowest = 0
+    depths = 0
+    decisions = 0
+    while game_manager.game_active and decisions < max_turns:
+        if game_manager.current_player == 0:
+            start = time.perf_counter()
+            game_manager.play_turn()
+            seconds = time.perf_counter() - start
+            search_time += seconds
+            slowest = max(slowest, seconds)
+            depths += agent.completed_depth or 0
+            decisions += 1
+        else:
+            game_manager.play_turn()
+    return agent.expanded, agent.pruned, search_time, decisions, slowest, depths
+
+
+def run():
+    args = define_input_args().parse_args()
+    agent_class, agent_module = AGENTS[args.agent]
+    agent_module.DEPTH = args.depth
+    agent_module.TRANSPOSITIONS = args.transpositions == 'on'
+    agent_module.SYMMETRY = args.symmetry == 'on'
+
+    seed_stream = SeedStream(args.seed)
+    for pruning in args.pruning:
+        setting = ""
+        if hasattr(agent_module, 'PRUNING'):
+            agent_module.PRUNING = pruning == 'on'
+            setting = f", pruning {pruning}"
+        total_nodes = 0
+        total_pruned = 0
+        total_time = 0
+        total_decisions = 0
+        total_depths = 0
+        slowest_decision = 0
+        table_stats = [0, 0, 0] # probes, hits, collisions
+        for game in range(args.games):
+            game_manager = create_game(agent_class, seed_stream.get_rng(game), args.time_budget_ms, args.suspects_num,
+                                       args.weapons_num, args.parallel_root)
+            nodes, pruned, seconds, decisions, slowest, depths = measure_game(game_manager, args.turns)
+            total_pruned += pruned
+            total_depths += depths
+            slowest_decision = max(slowest_decision, slowest)
+            table = game_manager.players[0].transposition_table
+            table_stats = [total + value for total, value in zip(table_stats, [table.probes, table.hits, table.collisions])]
+            total_nodes += nodes
+            total_time += seconds
+            total_decisions += decisions
+            print(f"Game {game + 1}: {nodes} nodes ({pruned} children pruned) in {seconds:.2f}s over {decisions} decisions")
+
+        limit = f"DEPTH={args.depth}" if args.time_budget_ms is None else f"budget {args.time_budget_ms} ms"
+        if args.parallel_root is not None:
+            limit += f", {args.parallel_root} root processes"
+        print(f"{args.agent} ({limit}{setting}): {total_nodes / total_time:.1f} nodes/sec, "
+              f"{total_nodes / total_decisions:.1f} nodes, {total_pruned / total_decisions:.1f} children pruned and "
+              f"{1000 * total_time / total_decisions:.1f} ms per decision, "
+              f"slowest {1000 * slowest_decision:.1f} ms")
+        if args.time_budget_ms is not None:
+            print(f"  iterative deepening: {total_depths / total_decisions:.2f} average completed depth")
+        probes, hits, collisions = table_stats
+        if probes:
+            print(f"  transposition table: {probes} probes, {hits / probes:.1%} hits, {collisions / probes:.1%} collisions")
+
+
+if __name__ == "__main__":
+    run()
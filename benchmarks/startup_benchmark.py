@@ -0,0 +1,90 @@
+"""
+Measures the startup cost of a headless run: the import time of cluedo_main (from python -X importtime) and the
+wall time from launching the interpreter until the first turn of a game has been played.
+Also checks that no UI (tkinter, PIL, pygame), RL (torch) or NumPy module is imported on the way.
+
+Run from the repository root:
+    python -m benchmarks.startup_benchmark --runs 5
+"""
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+HEAVY_MODULES = ['tkinter', 'PIL', 'pygame', 'torch', 'ui', 'numpy']
+# Sets up a headless game and plays its first turn, then prints the time at which it finished
+FIRST_TURN_SCRIPT = """
+import time
+import cluedo_main
+from game_elements.seed_stream import SeedStream
+args = cluedo_main.define_input_args().parse_args(['--players', 'random expectimax', '--test_mode', 'y'])
+game_manager = cluedo_main.set_up_game(args, SeedStream(args.seed).get_rng('setup'))
+game_manager.play_turn()
+print(time.time())
+"""
+
+
+def define_input_args():
+    input_parser = ArgumentParser()
+    input_parser.add_argument('--runs', type=int, default=5, help="Number of interpreter launches measured. Default: 5")
+    input_parser.add_argument('--top', type=int, default=10, help="Number of slowest imports listed. Default: 10")
+    return input_parser
+
+
+def parse_importtime(stderr):
+    """
+    Parses the output of python -X importtime.
+    :return: A list of (module name, cumulative microseconds, nesting level) for every imported module.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(cumulative), level))
+    return imports
+
+
+def measure_first_turn():
+    """
+    Launches a headless game in a new interpreter.
+    :return: (seconds until the first turn was played, parsed importtime output)
+    """
+    start = time.time()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", FIRST_TURN_SCRIPT],
+                             capture_output=True, text=True, check=True)
+    first_turn_time = float(process.stdout.strip().splitlines()[-1])
+    return first_turn_time - start, parse_importtime(process.stderr)
+
+
+def run():
+    args = define_input_args().parse_args()
+    times = []
+    for _ in range(args.runs):
+        seconds, imports = measure_first_turn()
+        times.append(seconds)
+
+    # The import tree of the last run; children are listed before their parent
+    main_index = next(i for i, (name, _, level) in enumerate(imports) if name == "cluedo_main" and level == 0)
+    main_import = imports[main_index][1]
+    main_children = []
+    for name, cumulative, level in reversed(imports[:main_index]):
+        if level == 0:
+            break
+        if level == 1:
+            main_children.append((name, cumulative))
+    heavy = sorted({name for name, _, _ in imports if name.split(".")[0] in HEAVY_MODULES})
+
+    print(f"Imported modules: {len(imports)}")
+    print(f"import cluedo_main: {main_import / 1000:.1f} ms")
+    print(f"Slowest imports of cluedo_main:")
+    for name, cumulative in sorted(main_children, key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:40} {cumulative / 1000:8.1f} ms")
+    print(f"UI / RL / NumPy modules imported: {', '.join(heavy) if heavy else 'none'}")
+    print(f"Headless time to first turn (launch -> first turn played, best of {args.runs}): {1000 * min(times):.1f} ms, "
+          f"mean {1000 * sum(times) / len(times):.1f} ms")
+
+
+if __name__ == "__main__":
+    run()
@@ -1,20 +1,17 @@
-import random
 from game_elements.cluedo_game_manager import CluedoGameManager
 from argparse import ArgumentParser
 from game_elements.human_player import HumanPlayer
 from algorithms.search.expectimax_player import ExpectimaxPlayer
 from algorithms.search.random_player import RandomPlayer
 from algorithms.search.minimax_player import MinimaxPlayer
-from algorithms.knowledge_representation.KRAgent import KRAgent
+from algorithms.search.ismcts_player import ISMCTSPlayer
 from game_elements.board import Board
 from game_elements.card import Card
-from ui.ui_manager import UIManager
+from game_elements.card_catalog import CardCatalog
+from game_elements.seed_stream import SeedStream
 import time
-# from algorithms.reinforcement_learning.trainer import ReinforceTrainer
-# from algorithms.reinforcement_learning.state_encoder import StateEncoder
-# from algorithms.reinforcement_learning.q_learning_agent import train_agent, QLearningPlayer
-# from algorithms.reinforcement_learning.reinforce_player import ReinforcePlayer
-# import pickle
+# The UI (tkinter, PIL, pygame), the RL modules (torch) and the KR agent (numpy) are imported only where they are
+# used, so headless runs don't pay for them at startup or need them installed.
 
 # DEFAULTS
 PLAYERS_NUM = 2
@@ -24,12 +21,14 @@ ROUNDS_NUM = 1
 SEED = 1
 UI_ON = 'n'
 TEST_MODE = 'n'
+WORKERS_NUM = 1
 DEFAULT_PLAYERS = "random expectimax"
+SEARCH_STATS = ['nodes_expanded', 'nodes_pruned', 'tt_probes', 'tt_hits', 'tt_collisions'] # counted for the search players
 base_suspects = ["Miss Scarlet", "Professor Plum", "Mrs. Peacock", "Mr. Green", "Colonel Mustard", "Mrs. White"]
 base_weapons = ["Knife", "Candlestick", "Revolver", "Rope", "Lead Pipe", "Wrench"]
 
 
-def generate_new_suspect():
+def generate_new_suspect(rng):
     first_names = [
         "Silly", "Goofy", "Wacky", "Loopy", "Zany", "Bizarre", 
         "Quirky", "Noodle", "Funky", "Whacky"
@@ -39,11 +38,11 @@ def generate_new_suspect():
         "Fluffernutter", "Picklejuice", "Fuzzypants", "Jellybean", 
         "Muffinbutt", "Wigglesworth"
     ]
-    first_name = random.choice(first_names)
-    last_name = random.choice(last_names)
+    first_name = rng.choice(first_names)
+    last_name = rng.choice(last_names)
     return f"{first_name} {last_name}"
 
-def generate_new_weapon():
+def generate_new_weapon(rng):
     weapons_base = [
         "Banana", "Cucumber", "Soda", "Sock", "Water Balloon", "Jellybean", 
         "Rubber", "Marshmallow", "Confetti", "Bubble"
@@ -52,8 +51,8 @@ def generate_new_weapon():
         "Sword", "Cannon", "Bomb", "Grenades", 
         "Sprayer", "Blaster", "Hammer", "Launcher", "Gun"
     ]
-    base = random.choice(weapons_base)
-    type = random.choice(weapons_type)
+    base = rng.choice(weapons_base)
+    type = rng.choice(weapons_type)
     return f"{base} {type}"
 
 def define_input_args():
@@ -86,7 +85,7 @@ def define_input_args():
         '--players',
         type=str,
         default=DEFAULT_PLAYERS,
-        help="Choose which types of players will play the game: human (Manaul), random (AI), minimax (AI), expectimax (AI), kr (AI), rl (AI). Write a type for each player (using spaces). Default: human human"
+        help="Choose which types of players will play the game: human (Manaul), random (AI), minimax (AI), expectimax (AI), ismcts (AI), kr (AI), rl (AI). Write a type for each player (using spaces). Default: human human"
     )
     input_parser.add_argument(
         '--rounds',
@@ -106,6 +105,24 @@ def define_input_args():
         default=SEED,
         help="Seed for reproducibility. Default: 1"
     )
+    input_parser.add_argument(
+        '--workers',
+        type=int,
+        default=WORKERS_NUM,
+        help=f"Number of processes to play the rounds in parallel (without UI). Default: {WORKERS_NUM}"
+    )
+    input_parser.add_argument(
+        '--time_budget_ms',
+        type=int,
+        default=None,
+        help="Time budget per decision of the minimax, expectimax and ismcts players in milliseconds, they search iteratively deeper until it runs out. Default: none (fixed depth)"
+    )
+    input_parser.add_argument(
+        '--parallel_root',
+        type=int,
+        default=None,
+        help="Number of processes the minimax and expectimax players split their root actions between. Any number chooses the same actions. Default: none (serial search)"
+    )
     return input_parser
 
 def validate_input_args(args):
@@ -124,7 +141,7 @@ def validate_input_args(args):
         errors.append(f"Number of weapons must be between 1 and 10. Got: {args.weapons_num}")
 
     # Validate algorithm
-    valid_algorithms = ['human', 'random', 'minimax', 'expectimax', 'kr']
+    valid_algorithms = ['human', 'random', 'minimax', 'expectimax', 'ismcts', 'kr']
     algorithms = args.players.split()
     if not all(algo in valid_algorithms for algo in algorithms):
         errors.append(f"Invalid algorithm(s). Must be one or more of {', '.join(valid_algorithms)}. Got: {args.players}")
@@ -153,21 +170,36 @@ def validate_input_args(args):
     if args.ui.lower() == 'y' and args.test_mode.lower() == 'y':
         errors.append(f"Cannot run test_mode in UI (Got test_mode and ui: 'y')")
 
+    # Validate workers
+    if args.workers < 1:
+        errors.append(f"Number of workers must be at least 1. Got: {args.workers}")
+
+    if args.workers > 1 and args.ui.lower() == 'y':
+        errors.append(f"Cannot run parallel workers with UI (Got workers: {args.workers} and ui: 'y')")
+
+    # Validate time_budget_ms
+    if args.time_budget_ms is not None and args.time_budget_ms < 1:
+        errors.append(f"Time budget must be at least 1 ms. Got: {args.time_budget_ms}")
+
+    # Validate parallel_root
+    if args.parallel_root is not None and args.parallel_root < 1:
+        errors.append(f"Number of root search processes must be at least 1. Got: {args.parallel_root}")
+
     return errors
 
-def set_up_game(args):
+def set_up_game(args, rng):
     # players_num = args.players_num
-    suspects = random.sample(base_suspects, min(args.suspects_num, SUSPECTS_NUM))
+    suspects = rng.sample(base_suspects, min(args.suspects_num, SUSPECTS_NUM))
     if args.suspects_num > SUSPECTS_NUM:
         while len(suspects) < args.suspects_num:
-            new_suspect = generate_new_suspect()
+            new_suspect = generate_new_suspect(rng)
             if new_suspect not in suspects:
                 suspects.append(new_suspect)
     
-    weapons = random.sample(base_weapons, min(args.weapons_num, WEAPONS_NUM))
+    weapons = rng.sample(base_weapons, min(args.weapons_num, WEAPONS_NUM))
     if args.weapons_num > WEAPONS_NUM:
         while len(weapons) < args.weapons_num:
-            new_weapon = generate_new_weapon()
+            new_weapon = generate_new_weapon(rng)
             if new_weapon not in weapons:
                 weapons.append(new_weapon)
 
@@ -183,6 +215,7 @@ def set_up_game(args):
     rooms_cards = []
     for r in rooms:
         rooms_cards.append(Card("room", r))
+    catalog = CardCatalog(suspects_cards, weapons_cards, rooms_cards, game_board)
 
     players = []
     algorithms = args.players.split()
@@ -190,32 +223,48 @@ def set_up_game(args):
         if p == "human":
             players.append(HumanPlayer(i, f"Human {i + 1}"))
         if p == "minimax":
-            players.append(MinimaxPlayer(i, f"Minimax {i + 1}"))
+            players.append(MinimaxPlayer(i, f"Minimax {i + 1}", time_budget_ms=args.time_budget_ms,
+                                         parallel_root=args.parallel_root))
         if p == "expectimax":
-            players.append(ExpectimaxPlayer(i, f"Expectimax {i + 1}"))
+            players.append(ExpectimaxPlayer(i, f"Expectimax {i + 1}", time_budget_ms=args.time_budget_ms,
+                                            parallel_root=args.parallel_root))
+        if p == "ismcts":
+            players.append(ISMCTSPlayer(i, f"ISMCTS {i + 1}", time_budget_ms=args.time_budget_ms))
         if p == "random":
             players.append(RandomPlayer(i, f"Random {i + 1}"))
         # if p == "rl":
+        #     import pickle
+        #     from algorithms.reinforcement_learning.reinforce_player import ReinforcePlayer
         #     with open('algorithms/reinforcement_learning/rl_model.pkl', 'rb') as file:
         #         trainer = pickle.load(file)
         #     players.append(ReinforcePlayer(trainer._player, i, f"Reinforce {i + 1}"))
         if p == "kr":
+            from algorithms.knowledge_representation.KRAgent import KRAgent
             players.append(KRAgent(i, f"KR {i + 1}", suspects_cards, weapons_cards, rooms_cards))
 
     test_mode = True if args.test_mode == 'y' else False
 
-    return CluedoGameManager(suspects=suspects_cards, weapons=weapons_cards, rooms=rooms_cards, players=players, game_board=game_board, test_mode=test_mode)
+    return CluedoGameManager(suspects=suspects_cards, weapons=weapons_cards, rooms=rooms_cards, players=players, game_board=game_board, test_mode=test_mode,
+                             catalog=catalog)
     
-def run():
-    input_parser = define_input_args()
-    args = input_parser.parse_args()
-    errors = validate_input_args(args)
-    if len(errors) > 0:
-        print(errors)
-        return
-    
-    random.seed(args.seed)
-    game_manager = set_up_game(args)
+def get_search_stats(player):
+    """
+    Returns the search counters of a minimax/expectimax player (totals since the player was created).
+    """
+    table = player.transposition_table
+    return {'nodes_expanded': player.expanded, 'nodes_pruned': player.pruned, 'tt_probes': table.probes, 'tt_hits': table.hits,
+            'tt_collisions': table.collisions}
+
+def play_rounds(args, round_indices):
+    """
+    Plays the given rounds of the game in this process (used by the serial run and by every worker).
+    Round i is always played with the seed of index i in the run's seed stream, so the results don't depend on
+    how the rounds are split, and any round can be replayed on its own.
+    :return: A dict of the players' names, win counts, and total turns played, nodes expanded and transposition table
+             probes, hits and collisions (per player name).
+    """
+    seed_stream = SeedStream(args.seed)
+    game_manager = set_up_game(args, seed_stream.get_rng('setup'))
 
     #######################
     ####  RL TRAINING  ####
@@ -223,6 +272,8 @@ def run():
 
     # Not in use in the final submission #
 
+    # import pickle
+    # from algorithms.reinforcement_learning.trainer import ReinforceTrainer
     # trainer = ReinforceTrainer(game_manager, lr = 0.001)
     # trainer.train(episodes = 1000)
     # with open('algorithms/reinforcement_learning/rl_model.pkl', 'wb') as file:
@@ -234,19 +285,23 @@ def run():
     #             game_manager.players[p].set_encoder(game_manager)
     
 
-    turns_count = {}
-    average_nodes_expanded = {}
-    average_moves_played = {}
+    search_stats = {stat: {} for stat in SEARCH_STATS}
+    moves_played = {}
 
     for player in game_manager.players:
         if isinstance(player, ExpectimaxPlayer) or isinstance(player, MinimaxPlayer):
-            average_nodes_expanded[player.name] = 0
-        average_moves_played[player.name] = 0
+            for stat in SEARCH_STATS:
+                search_stats[stat][player.name] = 0
+        moves_played[player.name] = 0
 
     players_win_count = [0] * args.players_num
-    for i in range(args.rounds):
+    for i in round_indices:
+        game_manager.reset(seed_stream.get_seed(i))
+        stats_before = {player.name: get_search_stats(player) for player in game_manager.players
+                        if player.name in search_stats['nodes_expanded']}
         round_start_time = time.time()
         if args.ui == 'y':
+            from ui.ui_manager import UIManager
             ui_manager = UIManager(game_manager, game_manager.game_board)
             winner = ui_manager.run()
         else:
@@ -254,31 +309,70 @@ def run():
             round_end_time = time.time()
 
             for j, player in enumerate(game_manager.players):
-                if isinstance(player, ExpectimaxPlayer) or isinstance(player, MinimaxPlayer):
-                    average_nodes_expanded[player.name] += player.expanded
-                average_moves_played[player.name] += turns[j]
+                if player.name in stats_before:
+                    for stat, value in get_search_stats(player).items():
+                        search_stats[stat][player.name] += value - stats_before[player.name][stat]
+                moves_played[player.name] += turns[j]
         players_win_count[winner] += 1
-        game_manager = CluedoGameManager(game_manager.suspects, game_manager.weapons, game_manager.rooms,
-                                         game_manager.players, game_manager.game_board, game_manager.test_mode)
         if game_manager.test_mode:
             print(f"Finished game {i + 1}; Time elapsed: {round_end_time - round_start_time}")
+
+    return {'names': [player.name for player in game_manager.players], 'wins': players_win_count,
+            'moves_played': moves_played, **search_stats}
+
+def merge_results(results):
+    """
+    Sums the results of play_rounds over the shards of a run.
+    """
+    merged = {'names': results[0]['names'], 'wins': [0] * len(results[0]['wins']), 'moves_played': {}}
+    for stat in SEARCH_STATS:
+        merged[stat] = {}
+    for result in results:
+        merged['wins'] = [total + wins for total, wins in zip(merged['wins'], result['wins'])]
+        for key in ['moves_played'] + SEARCH_STATS:
+            for name, value in result[key].items():
+                merged[key][name] = merged[key].get(name, 0) + value
+    return merged
+
+def run():
+    input_parser = define_input_args()
+    args = input_parser.parse_args()
+    errors = validate_input_args(args)
+    if len(errors) > 0:
+        print(errors)
+        return
     
+    if args.workers == 1:
+        results = play_rounds(args, range(args.rounds))
+    else:
+        # Shard the rounds between the workers, each worker sets up its own game
+        from concurrent.futures import ProcessPoolExecutor
+        shards = [range(worker, args.rounds, args.workers) for worker in range(args.workers)]
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            results = merge_results(list(executor.map(play_rounds, [args] * len(shards), shards)))
+
+    test_mode = args.test_mode == 'y'
     print()
     print("#---------##########---------#\n           RESULTS        \n#---------##########---------#\n\n")
     
     print("Total wins:")
-    for i, player in enumerate(players_win_count):
-        print(f"{game_manager.players[i].name}: {player} wins")
+    for i, player in enumerate(results['wins']):
+        print(f"{results['names'][i]}: {player} wins")
     print(" ----- ")
 
-    if game_manager.test_mode:
-        if average_nodes_expanded:
-            for player in average_nodes_expanded:
-                print(f"Average nodes expanded by {player}: {average_nodes_expanded[player] / args.rounds}")
+    if test_mode:
+        if results['nodes_expanded']:
+            for player in results['nodes_expanded']:
+                print(f"Average nodes expanded by {player}: {results['nodes_expanded'][player] / args.rounds} "
+                      f"({results['nodes_pruned'][player] / args.rounds} children pruned)")
+            for player, probes in results['tt_probes'].items():
+                if probes:
+                    print(f"Transposition table of {player}: {results['tt_hits'][player] / probes:.1%} hits, "
+                          f"{results['tt_collisions'][player] / probes:.1%} collisions ({probes} probes)")
             print(" ----- ")
         
-        for player in average_moves_played:
-            print(f"Average turns played by {player}: {average_moves_played[player] / args.rounds}")
+        for player in results['moves_played']:
+            print(f"Average turns played by {player}: {results['moves_played'][player] / args.rounds}")
         
         print(" ----- \n\n")
 
@@ -13,11 +13,19 @@ ROOM_NAMES = [
     "Dining Room", "Billiard Room", "Library",
     "Lounge", "Hall", "Study"
 ]
+ROOM_NAMES_BY_LOCATION = dict(zip(ROOM_LOCATIONS, ROOM_NAMES))
+ROOM_LOCATIONS_BY_NAME = dict(zip(ROOM_NAMES, ROOM_LOCATIONS))
+
+# the order in which the moves to the neighbouring locations are tried: down, up, right, left
+MOVE_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
 
 class Board:
-    def __init__(self):
-        self._board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    def __init__(self, size=BOARD_SIZE):
+        self._size = size
+        self._board = [[None for _ in range(size)] for _ in range(size)]
         self._rooms = []
+        # _reachable[steps] maps a location to the locations reachable from it in exactly that many steps
+        self._reachable = [{(row, col): ((row, col),) for row in range(size) for col in range(size)}]
 
         for loc, name in zip(ROOM_LOCATIONS, ROOM_NAMES):
             row, col = loc
@@ -46,18 +54,41 @@ class Board:
 
     def get_room_names(self):
         return ROOM_NAMES
+
+    def is_room(self, location):
+        return location in ROOM_NAMES_BY_LOCATION
     
     def get_size(self):
-        return BOARD_SIZE
+        return self._size
+
+    def get_reachable_locations(self, location, steps):
+        """
+        Returns the locations a player at location can reach by walking exactly steps steps (revisiting locations
+        is allowed). The table is computed once per board, and each entry keeps the order in which a depth-first
+        walk (down, up, right, left) first reaches the destinations.
+        :return: A tuple of (row, col) locations, without duplicates.
+        """
+        while len(self._reachable) <= steps:
+            self._add_reachable_step()
+        return self._reachable[steps][location]
+
+    def _add_reachable_step(self):
+        previous = self._reachable[-1]
+        reachable = {}
+        for (row, col) in previous:
+            destinations = {}
+            for row_step, col_step in MOVE_DIRECTIONS:
+                neighbour = (row + row_step, col + col_step)
+                if neighbour in previous:
+                    # dict keys keep the insertion order and drop duplicates
+                    destinations.update(dict.fromkeys(previous[neighbour]))
+            reachable[(row, col)] = tuple(destinations)
+        self._reachable.append(reachable)
     
     @staticmethod
     def get_room_name(location):
-        if location in ROOM_LOCATIONS:
-            return ROOM_NAMES[ROOM_LOCATIONS.index(location)]
-        return None
+        return ROOM_NAMES_BY_LOCATION.get(location)
 
     @staticmethod
     def get_room_location(name):
-        if name in ROOM_NAMES:
-            return ROOM_LOCATIONS[ROOM_NAMES.index(name)]
-        return None
\ No newline at end of file
+        return ROOM_LOCATIONS_BY_NAME.get(name)
\ No newline at end of file
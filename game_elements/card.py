@@ -3,10 +3,15 @@ class Card():
         self._type = type
         self._name = name
         self._holder = None  # None if unknown, a player if known, something else if found to be in the solution todo: ADDED
+        self._id = None  # index of the card in the game's cards, set by the game manager
+        self._bit = 0  # 1 << id, the card's bit in a CardSet mask
 
     def __deepcopy__(self, memo):
         # Return the same instance instead of creating a new one
         return self
+
+    def __str__(self):
+        return self._name
     
 
     def get_type(self):
@@ -15,6 +20,16 @@ class Card():
     def get_name(self):
         return self._name
 
+    def get_id(self):
+        return self._id
+
+    def set_id(self, card_id):
+        self._id = card_id
+        self._bit = 1 << card_id
+
+    def get_bit(self):
+        return self._bit
+
     def get_holder(self):
         return self._holder
 
@@ -0,0 +1,56 @@
+from game_elements.card import Card
+from game_elements.board import Board
+
+CARD_TYPES = ['suspect', 'weapon', 'room']
+
+class CardCatalog():
+    """
+    All the cards of a game, built once when the game is set up.
+    Gives every card a dense integer ID (its index in get_cards()), and keeps lookup tables by type, name and
+    room location so the game never has to scan the card lists.
+    """
+    def __init__(self, suspects, weapons, rooms, game_board: Board):
+        # The IDs follow the order of the game manager's card list (weapons, rooms, suspects)
+        self._cards = weapons + rooms + suspects
+        for card_id, card in enumerate(self._cards):
+            card.set_id(card_id)
+
+        self._cards_by_type = {'suspect': suspects, 'weapon': weapons, 'room': rooms}
+        self._type_ranges = {} # card type -> range of the IDs of that type
+        self._type_masks = {} # card type -> bitmask of all the cards of that type
+        for card_type, cards in self._cards_by_type.items():
+            first_id = cards[0].get_id() if cards else 0
+            self._type_ranges[card_type] = range(first_id, first_id + len(cards))
+            self._type_masks[card_type] = ((1 << len(cards)) - 1) << first_id
+
+        self._cards_by_name = {(card.get_type(), card.get_name()): card for card in self._cards}
+        self._room_cards_by_location = {}
+        for room in rooms:
+            location = game_board.get_room_location(room.get_name())
+            if location is not None:
+                self._room_cards_by_location[location] = room
+
+    def __len__(self):
+        return len(self._cards)
+
+    def get_cards(self):
+        return self._cards
+
+    def get_card(self, card_id):
+        return self._cards[card_id]
+
+    def get_cards_of_type(self, card_type):
+        return self._cards_by_type[card_type]
+
+    def get_type_range(self, card_type):
+        return self._type_ranges[card_type]
+
+    def get_type_mask(self, card_type):
+        return self._type_masks[card_type]
+
+    def get_card_by_name(self, card_type, name):
+        return self._cards_by_name.get((card_type, name))
+
+    # Returns the room Card at the given board location, or None if the location is not a room
+    def get_room_card(self, location):
+        return self._room_cards_by_location.get(location)
@@ -0,0 +1,58 @@
+class CardSet(set):
+    """
+    A set of Card which also keeps an integer bitmask of its cards (bit i is set iff the card with ID i is in the set).
+    Unions, intersections, counts and membership tests over the players' knowledge can then be done with int
+    operations on the masks instead of building new sets.
+    """
+    __slots__ = ('mask',)
+
+    def __init__(self, cards=()):
+        super().__init__(cards)
+        self.mask = cards_mask(self)
+
+    def __deepcopy__(self, memo):
+        # Cards are shared (see Card.__deepcopy__), so a shallow copy is enough
+        copied = CardSet.__new__(CardSet)
+        set.update(copied, self)
+        copied.mask = self.mask
+        return copied
+
+    def add(self, card):
+        super().add(card)
+        self.mask |= card.get_bit()
+
+    def discard(self, card):
+        super().discard(card)
+        self.mask &= ~card.get_bit()
+
+    def remove(self, card):
+        super().remove(card)
+        self.mask &= ~card.get_bit()
+
+    def update(self, *others):
+        for cards in others:
+            if not isinstance(cards, (set, list, tuple)):
+                cards = list(cards) # iterated twice
+            super().update(cards)
+            self.mask |= cards.mask if isinstance(cards, CardSet) else cards_mask(cards)
+
+    def clear(self):
+        super().clear()
+        self.mask = 0
+
+
+def cards_mask(cards):
+    """
+    Returns the bitmask of the given cards.
+    """
+    mask = 0
+    for card in cards:
+        mask |= card.get_bit()
+    return mask
+
+
+def count_cards(mask):
+    """
+    Returns the number of cards in the bitmask.
+    """
+    return mask.bit_count()
@@ -5,6 +5,9 @@ from game_elements.card import Card
 from game_elements.board import Board
 from game_elements.action import Action
 from game_elements.game_state import GameState
+from game_elements.card_catalog import CardCatalog
+from game_elements.game_logger import GameLogger, INFO, OFF
+from game_elements.turn_events import SuggestionEvent, AccusationEvent
 
 GAME_LOGO = '''
  .d8888b.     888                                 888              
@@ -18,17 +21,43 @@ Y88b  d88P    888    Y88b 888    Y8b.        Y88b 888    Y88..88P
  '''
 
 class CluedoGameManager():
-    def __init__(self, suspects: List[Card], weapons: List[Card], rooms: List[Card], players: List[CluedoPlayer], game_board: Board, test_mode: bool):
+    def __init__(self, suspects: List[Card], weapons: List[Card], rooms: List[Card], players: List[CluedoPlayer], game_board: Board, test_mode: bool,
+                 catalog: CardCatalog = None, rng: random.Random = None):
         # Game basic elements
         self.players = players # the game's players (CluedoPlayer)
-        self.current_player = 0 # the current player that should now play his turn
         self.game_board = game_board
+        self.test_mode = test_mode
+        self.logger = GameLogger(OFF if test_mode else INFO) # test mode logs (and formats) nothing
+        self.turns_count = [0] * len(players)
+        self.rng = rng if rng is not None else random.Random() # all of the game's randomness comes from here
+        for player in self.players:
+            player.set_rng(self.rng)
+
+        self._set_game_cards(suspects, weapons, rooms, catalog)
+        self._set_board_locations()
+        self._start_game()
+
+    def reset(self, seed=None):
+        """
+        Starts a new game with the same players, cards and board: re-draws the solution, re-deals the cards and
+        re-initializes the players, reusing the structures built for the previous game instead of reconstructing them.
+        :param seed: If given, the game's random.Random is re-seeded with it first (so the new game is the same as a
+                     new CluedoGameManager with random.Random(seed)). Otherwise the game continues the current stream.
+        :return: The state at the start of the new game.
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+        for i in range(len(self.turns_count)):
+            self.turns_count[i] = 0
+        self._start_game()
+        return self.create_current_state()
+
+    def _start_game(self):
+        self.current_player = 0 # the current player that should now play his turn
         self.game_active = True # game ended or not
         self.active_suggestion = None # is there an active suggestion (which the current player should respond to)
         self.active_accusation = None # is there an active accusation (which ends the game)
         self.winner = None
-        self.test_mode = test_mode
-        self.turns_count = [0] * len(players)
 
         # TODO: move to game_state
         self.current_suggesting_player = None
@@ -39,7 +68,6 @@ class CluedoGameManager():
         self.all_accusations = []
         
         self.reset_players_knowledge()
-        self._set_game_cards(suspects, weapons, rooms)
         self._set_player_locations()
         self._draw_solution()
         self._deal_cards()
@@ -53,41 +81,44 @@ class CluedoGameManager():
         for player in self.players:
             player.reset_knowledge()
 
-    def _set_player_locations(self):
-        all_board_locations = []
+    def _set_board_locations(self):
+        self.all_board_locations = []
         for i in range(self.game_board.get_size()):
             for j in range(self.game_board.get_size()):
-                all_board_locations.append((i,j))
+                self.all_board_locations.append((i,j))
+
+    def _set_player_locations(self):
         # start_loc = self.game_board.get_start_location()
         for player in self.players:
-            player.set_location(random.choice(all_board_locations))
+            player.set_location(self.rng.choice(self.all_board_locations))
             player.is_in_game = True
 
-    def _set_game_cards(self, suspects, weapons, rooms):
+    def _set_game_cards(self, suspects, weapons, rooms, catalog):
         self.suspects = suspects
         self.weapons = weapons
         self.rooms = rooms
-        self.cards = self.weapons + self.rooms + self.suspects
+        if catalog is None:
+            catalog = CardCatalog(suspects, weapons, rooms, self.game_board)
+        self.catalog = catalog
+        self.cards = catalog.get_cards() # weapons + rooms + suspects, indexed by card ID
 
     def _draw_solution(self):
         # choose a random solution
         self.solution = {
-            "suspect": random.choice(self.suspects),
-            "weapon": random.choice(self.weapons),
-            "room": random.choice(self.rooms)
+            "suspect": self.rng.choice(self.suspects),
+            "weapon": self.rng.choice(self.weapons),
+            "room": self.rng.choice(self.rooms)
         }
 
     def _deal_cards(self):
         for player in self.players:
-            player._cards = set()
+            player.clear_cards()
         
         players_num = len(self.players)
-        remaining_cards = []
-        for card in self.cards:
-            if card != self.solution['suspect'] and card != self.solution['weapon'] and card != self.solution['room']:
-                remaining_cards.append(card)
+        solution_mask = self.solution['suspect'].get_bit() | self.solution['weapon'].get_bit() | self.solution['room'].get_bit()
+        remaining_cards = [card for card in self.cards if not card.get_bit() & solution_mask]
         
-        random.shuffle(remaining_cards)
+        self.rng.shuffle(remaining_cards)
         cards_per_player = len(remaining_cards) // players_num
         
         for i, player in enumerate(self.players):
@@ -100,34 +131,27 @@ class CluedoGameManager():
         remaining = len(remaining_cards) % len(self.players)
         if remaining > 0:
             for i in range(remaining):
-                player = random.choice(self.players)
+                player = self.rng.choice(self.players)
                 card = remaining_cards[-(i+1)]
                 player.add_cards([card])
 
-        # Reset clues
-        for player in self.players:    
-            player.cards_i_asked = set()
-            player.cards_i_showed = set()
-            player.cards_i_was_asked = set()
-            player.cards_rejected_for_me = set()
-            player.cards_no_one_could_reject_for_me = set()
-
     def roll_dice(self):
         # if 1:
-        return random.randint(1, 6)
+        return self.rng.randint(1, 6)
         # if 2:
-        # first_roll = random.randint(1, 6)
-        # second_roll = random.randint(1, 6)
+        # first_roll = self.rng.randint(1, 6)
+        # second_roll = self.rng.randint(1, 6)
         # return first_roll + second_roll
 
     def play_accusation(self, details):
         if self.check_solution(details):
             self.winner = self.current_player
         else:
-            self.print_message(f"Player {self.current_player + 1} lost")
+            self.logger.info("Player %d lost", self.current_player + 1)
             self.players[self.current_player].is_in_game = False
+            event = AccusationEvent(self.current_player, details, is_correct=False)
             for player in self.players:
-                player.handle_accusation_response(details)
+                player.handle_accusation_event(event)
 
     def next_turn(self):
         self.last_turn = None
@@ -164,7 +188,7 @@ class CluedoGameManager():
         action, details = self.players[self.current_player].play_turn(self.create_current_state())
 
         if action == Action.ACCUSATION:
-            self.print_message(f"Player {self.current_player + 1} Accuses! {details[0].get_name()}, {details[1].get_name()}, {details[2].get_name()}")
+            self.logger.info("Player %d Accuses! %s, %s, %s", self.current_player + 1, details[0], details[1], details[2])
             self.active_accusation = details
             self.all_accusations.append(details)
             self.play_accusation(details)
@@ -176,13 +200,13 @@ class CluedoGameManager():
 
 
         if action == Action.MOVE:
-            self.print_message(f"Player {self.current_player + 1} Moved to {details}")
+            self.logger.info("Player %d Moved to %s", self.current_player + 1, details)
             self.players[self.current_player].set_location(details)
             self.players[self.current_player].set_room(Board.get_room_name(details))
             self.last_turn = Action.MOVE
 
         if action == Action.SUGGESTION:
-            self.print_message(f"Player {self.current_player + 1} Suggests {details[0].get_name()}, {details[1].get_name()}, {details[2].get_name()}")
+            self.logger.info("Player %d Suggests %s, %s, %s", self.current_player + 1, details[0], details[1], details[2])
             self.active_suggestion = details
             self.current_suggesting_player = self.current_player
             self.current_rejecting_card = None
@@ -207,7 +231,7 @@ class CluedoGameManager():
             # return self.current_rejecting_player, self.current_rejecting_card
         
         if action == Action.ENDTURN:
-            self.print_message(f"Player {self.current_player + 1} ends his turn")
+            self.logger.info("Player %d ends his turn", self.current_player + 1)
             self.next_turn()
         
         return action, details
@@ -218,7 +242,7 @@ class CluedoGameManager():
         while responding_player != self.current_player:
             rejection = self.players[responding_player].reject(current_state)
             if rejection:
-                self.print_message(f"Player {responding_player + 1} Rejects, showing the card {rejection.get_name()}")
+                self.logger.info("Player %d Rejects, showing the card %s", responding_player + 1, rejection)
                 self.current_rejecting_card = rejection
                 self.current_rejecting_player = responding_player
                 self.players[responding_player].cards_i_showed.add(rejection)
@@ -227,10 +251,13 @@ class CluedoGameManager():
             else:
                 responding_player = self.get_next_player(responding_player)
         if not rejection:
-            self.print_message(f"No one could reject!")
+            self.logger.info("No one could reject!")
 
+        # One event for all the players, each player only sees the shown card if it is allowed to
+        event = SuggestionEvent(self.current_player, self.active_suggestion, self.current_rejecting_player,
+                                self.current_rejecting_card)
         for player in self.players:
-            player.handle_suggestion_response(self.create_current_state())
+            player.handle_suggestion_event(event)
 
         
     def check_game_over(self):
@@ -266,34 +293,23 @@ class CluedoGameManager():
     
     def end_game(self):
         if self.check_solution(self.active_accusation):
-            self.print_message(f"{self.winner + 1} Won! very nice")
+            self.logger.info("%d Won! very nice", self.winner + 1)
         else:        
             for i, player in enumerate(self.players):
                 if player.is_in_game:
-                    self.print_message(f"All other players are out of the game, Player {i + 1} Won!")
+                    self.logger.info("All other players are out of the game, Player %d Won!", i + 1)
         
-        self.print_message(f"The current solution: {self.solution['suspect'].get_name(), self.solution['weapon'].get_name(), self.solution['room'].get_name()}")
+        self.logger.info("The current solution: ('%s', '%s', '%s')", self.solution['suspect'], self.solution['weapon'], self.solution['room'])
         self.game_active = False
 
     def check_solution(self, details):
         for card in details:
-            if card.get_type() == "suspect":
-                if card.get_name() != self.solution['suspect'].get_name():
-                    return False
-
-            if card.get_type() == "room":
-                if card.get_name() != self.solution['room'].get_name():
-                    return False
-                
-            
-            if card.get_type() == "weapon":
-                if card.get_name() != self.solution['weapon'].get_name():
-                    return False
-                
+            if card.get_id() != self.solution[card.get_type()].get_id():
+                return False
         return True
     
     def run_game(self):
-        self.print_message(GAME_LOGO)
+        self.logger.info(GAME_LOGO)
         while self.game_active:
             self.turns_count[self.current_player] += 1
             self.play_turn()
@@ -304,10 +320,4 @@ class CluedoGameManager():
                          is_terminal=self.check_game_over(), player_index=self.current_player, suggestion=self.active_suggestion,
                          current_rejecting_player = self.current_rejecting_player, current_rejecting_card = self.current_rejecting_card,
                          all_suggestions = self.all_suggestions, last_turn = self.last_turn, all_accusations = self.all_accusations,
-                         current_suggesting_player=self.current_suggesting_player)
-    
-    def print_message(self, message):
-        if not self.test_mode:
-            print(" --- ")
-            print(message)
-            print(" --- \n")
\ No newline at end of file
+                         current_suggesting_player=self.current_suggesting_player, catalog=self.catalog, rng=self.rng)
@@ -1,20 +1,27 @@
 from game_elements.action import Action
 from game_elements.game_state import GameState
+from game_elements.card_set import CardSet
+from game_elements.turn_events import SuggestionEvent, AccusationEvent
+import random
 
 class CluedoPlayer():
     def __init__(self, index, name):
         self.name = name
         self._location = (0,0)
         self._room = None  # todo ADDED
-        self._cards = set()
-        self.cards_i_showed = set()
-        self.cards_rejected_for_me = set()
-        self.cards_no_one_could_reject_for_me = set()
-        self.cards_i_asked = set()
-        self.cards_i_was_asked = set()
+        self._cards = CardSet()
+        self.cards_i_showed = CardSet()
+        self.cards_rejected_for_me = CardSet()
+        self.cards_no_one_could_reject_for_me = CardSet()
+        self.cards_i_asked = CardSet()
+        self.cards_i_was_asked = CardSet()
         self._index = index
         self.active_suggestion = False
         self.is_in_game = True
+        self.rng = random.Random() # the game's random.Random, set by the game manager
+
+    def set_rng(self, rng):
+        self.rng = rng
 
     def init_knowledge(self, num_players):  # todo ADDED 13.9
         pass
@@ -40,8 +47,18 @@ class CluedoPlayer():
         return self._cards
 
     def add_cards(self, cards):
-        for card in cards:
-            self._cards.add(card)
+        self._cards.update(cards)
+
+    def clear_cards(self):
+        """
+        Empties the player's cards and clues before a new deal (the sets are reused between games).
+        """
+        self._cards.clear()
+        self.cards_i_showed.clear()
+        self.cards_rejected_for_me.clear()
+        self.cards_no_one_could_reject_for_me.clear()
+        self.cards_i_asked.clear()
+        self.cards_i_was_asked.clear()
 
     # Getter and Setter for position
     def get_index(self):
@@ -58,8 +75,8 @@ class CluedoPlayer():
     def reject(self, state: GameState):
         pass
 
-    def handle_suggestion_response(self, state: GameState):
+    def handle_suggestion_event(self, event: SuggestionEvent):
         pass
 
-    def handle_accusation_response(self, state: GameState): 
+    def handle_accusation_event(self, event: AccusationEvent):
         pass
\ No newline at end of file
@@ -0,0 +1,43 @@
+import sys
+
+# Levels
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100 # nothing is logged (test mode)
+
+
+class GameLogger():
+    """
+    A leveled logger for the game messages.
+    Messages are given as a %-format string and its arguments, and are only formatted if their level is enabled,
+    so a disabled logger (test mode) costs a level comparison per message and no formatting.
+    Every message is written to the stream with a single write (the stream, stdout by default, is buffered).
+    """
+    def __init__(self, level=INFO, stream=None):
+        self.level = level
+        self._stream = stream # None - the current sys.stdout
+
+    def is_enabled(self, level):
+        return level >= self.level
+
+    def log(self, level, message, *args):
+        if level < self.level:
+            return
+        if args:
+            message = message % args
+        stream = self._stream if self._stream is not None else sys.stdout
+        stream.write(f" --- \n{message}\n --- \n\n")
+
+    def debug(self, message, *args):
+        self.log(DEBUG, message, *args)
+
+    def info(self, message, *args):
+        self.log(INFO, message, *args)
+
+    def warning(self, message, *args):
+        self.log(WARNING, message, *args)
+
+    def flush(self):
+        stream = self._stream if self._stream is not None else sys.stdout
+        stream.flush()
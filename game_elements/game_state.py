@@ -1,14 +1,39 @@
 from game_elements.board import Board
 from game_elements.card import Card
 from game_elements.action import Action
+from game_elements.card_set import CardSet, cards_mask, count_cards
+from game_elements.card_catalog import CARD_TYPES
+from game_elements.zobrist import get_zobrist_keys, TRACKED_CARD_SETS
 
 # max step size, with rolling one dice
 MAX_STEPS = 6
+# Bounds of get_score, used by the expectimax pruning, keep them in sync with get_score. No score is negative, the
+# states after a move, a suggestion or the end of a turn score at most 1610 (a suggestion, base_score is at most
+# 4 * the number of cards), and an accusation scores at most 30 + 10 + 10 plus the bonuses for knowing almost all the
+# cards (10000 each) and for accusing the 3 cards no one could reject (the win bonus)
+MIN_SCORE = 0
+MAX_NON_ACCUSATION_SCORE = 1610
+MAX_ACCUSATION_RANK = 50
+KNOWLEDGE_BONUS = 10000
+WIN_BONUS = 10000000
+MAX_SCORE = MAX_ACCUSATION_RANK + 2 * KNOWLEDGE_BONUS + WIN_BONUS
+# The card sets of a player that the search reads or changes
+PLAYER_CARD_SETS = ['_cards', 'cards_rejected_for_me', 'cards_no_one_could_reject_for_me', 'cards_i_asked',
+                    'cards_i_was_asked']
+
+
+def get_multiplicity(action):
+    """
+    Returns the number of actions that the action stands for: the suggestions and accusations generated with
+    symmetry=True carry the number of equivalent ones as a third element (see GameState.get_class_sizes).
+    """
+    return action[2] if len(action) > 2 else 1
+
 
 class GameState():
     def __init__(self, game_cards, accusation, game_board: Board, 
                  players, player_index: int, current_suggesting_player, current_rejecting_player, current_rejecting_card,
-                         all_suggestions, last_turn, all_accusations, is_terminal = False, suggestion = None):
+                         all_suggestions, last_turn, all_accusations, is_terminal = False, suggestion = None, catalog = None, rng = None):
         self._cards = game_cards # a list of Card
         self._game_board = game_board # Board
         self._active_accusation = accusation # a list of three Card (the accusation)
@@ -26,138 +51,198 @@ class GameState():
         self.last_turn = last_turn
         self.all_suggestions = all_suggestions
         self.all_accusations = all_accusations
+        self._catalog = catalog # CardCatalog of the game cards
+        self.rng = rng # the game's random.Random
+        self._zobrist_keys = None # ZobristKeys of the game (set by get_hash)
+        self._board_hash = None # Zobrist hash of the players' locations, cards and eliminations (None until get_hash)
+        self._card_set_keys = None # id of a tracked card set -> the Zobrist keys of its cards
+        self._accusation_masks = None # the card masks of all_accusations (set by apply_accusation)
+        self.repeated_accusation = False # the active accusation was made before
 
     def get_current_player(self):
         return self._player_index
 
+    def get_hash(self):
+        """
+        Returns the Zobrist hash of the state.
+        The part of the players' locations, cards and eliminations is computed on the first call, then kept up to date
+        by the apply methods with one XOR per change (and restored by undo). The rest is combined here.
+        """
+        if self._board_hash is None:
+            self._init_board_hash()
+        keys = self._zobrist_keys
+        state_hash = self._board_hash ^ keys.current_player[self._player_index] ^ keys.last_turn[self.last_turn]
+        if self._active_suggestion is not None:
+            for card in self._active_suggestion:
+                if card is not None:
+                    state_hash ^= keys.suggestion[card.get_id()]
+        if self._active_accusation is not None:
+            for card in self._active_accusation:
+                state_hash ^= keys.accusation[card.get_id()]
+        if self.is_terminal:
+            state_hash ^= keys.terminal
+        return state_hash
+
+    def _init_board_hash(self):
+        keys = self._zobrist_keys = get_zobrist_keys(len(self._players), self._game_board.get_size(), len(self._cards))
+        board_hash = 0
+        self._card_set_keys = {}
+        for i, player in enumerate(self._players):
+            board_hash ^= keys.get_location_key(i, player.get_location())
+            if not player.is_in_game:
+                board_hash ^= keys.eliminated[i]
+            for set_index, set_name in enumerate(TRACKED_CARD_SETS):
+                cards = getattr(player, set_name)
+                card_keys = keys.card_sets[i][set_index]
+                self._card_set_keys[id(cards)] = card_keys
+                for card in cards:
+                    board_hash ^= card_keys[card.get_id()]
+        self._board_hash = board_hash
+
     # Returns a score for the current GameState (for the current_player)
     def get_score(self):
-        my_cards = self._players[self._player_index].get_cards()
-        num_of_cards_i_discovered = len(self._players[self._player_index].cards_rejected_for_me)
-        num_of_not_rejected = len(self._players[self._player_index].cards_no_one_could_reject_for_me)
-        num_of_cards_i_discovered += num_of_not_rejected
-        cards_i_discovered = self._players[self._player_index].cards_rejected_for_me | self._players[self._player_index].cards_no_one_could_reject_for_me
-        num_unknown_cards = len(self._cards) - len(my_cards) - num_of_cards_i_discovered
-        unknown_cards = [card for card in self._cards if card not in my_cards and card not in cards_i_discovered]
-        not_rejected_yet = self._players[self._player_index].cards_no_one_could_reject_for_me
-
-
-        suspects_num = 0
-        rooms_num = 0
-        weapons_num = 0
-        for card in self._cards:
-            if card.get_type() == 'suspect':
-                suspects_num += 1
-            if card.get_type() == 'weapon':
-                weapons_num += 1
-            if card.get_type() == 'room':
-                rooms_num += 1
-        suspects_rejected = 0
-        rooms_rejected = 0
-        weapons_rejected = 0
-        for card in self._players[self._player_index].cards_rejected_for_me:
-            if card.get_type() == 'suspect':
-                suspects_rejected += 1
-            if card.get_type() == 'weapon':
-                weapons_rejected += 1
-            if card.get_type() == 'room':
-                rooms_rejected += 1
-        
-        for card in self._players[self._player_index]._cards:
-            if card.get_type() == 'suspect':
-                suspects_rejected += 1
-            if card.get_type() == 'weapon':
-                weapons_rejected += 1
-            if card.get_type() == 'room':
-                rooms_rejected += 1
-                
-        unknown_suspects = suspects_num - suspects_rejected
-        unknown_weapons = weapons_num - weapons_rejected
-        unknown_rooms = rooms_num - rooms_rejected
+        player = self._players[self._player_index]
+        my_cards = player._cards.mask
+        rejected_for_me = player.cards_rejected_for_me.mask
+        not_rejected_yet = player.cards_no_one_could_reject_for_me.mask
+        num_of_not_rejected = count_cards(not_rejected_yet)
+        num_of_cards_i_discovered = count_cards(rejected_for_me) + num_of_not_rejected
+        cards_i_discovered = rejected_for_me | not_rejected_yet
+        num_unknown_cards = len(self._cards) - count_cards(my_cards) - num_of_cards_i_discovered
+
+        suspects_mask = self._catalog.get_type_mask('suspect')
+        weapons_mask = self._catalog.get_type_mask('weapon')
+        rooms_mask = self._catalog.get_type_mask('room')
+        unknown_suspects = count_cards(suspects_mask) - count_cards(rejected_for_me & suspects_mask) - count_cards(my_cards & suspects_mask)
+        unknown_weapons = count_cards(weapons_mask) - count_cards(rejected_for_me & weapons_mask) - count_cards(my_cards & weapons_mask)
+        unknown_rooms = count_cards(rooms_mask) - count_cards(rejected_for_me & rooms_mask) - count_cards(my_cards & rooms_mask)
 
         move_rank = 0
         accusation_rank = 0
         suggestion_rank = 0
 
-        base_score = num_of_cards_i_discovered + len(my_cards)
+        base_score = num_of_cards_i_discovered + count_cards(my_cards)
         player_loc = self.get_player_location(self._player_index)
 
         if self.last_turn == Action.MOVE:    
-            if player_loc in self._game_board.get_room_locations():
+            if self._game_board.is_room(player_loc):
                 move_rank += 10
                 cur_room = Board.get_room_name(player_loc)
                 if self._active_suggestion == None:
                     move_rank /= 100
                 if cur_room:
                     move_rank += 1
-                    if cur_room not in self._players[self._player_index].cards_rejected_for_me:
-                        move_rank += 10
-                    if cur_room in unknown_cards:
-                        move_rank += 10
+                    # cur_room is a room name (not a Card), so it is never one of the known/unknown cards
+                    move_rank += 10
             
         
         if self.last_turn == Action.SUGGESTION:
             base_score *= 4
-            if self._active_suggestion[0] in not_rejected_yet:
+            suspect_bit = self._active_suggestion[0].get_bit()
+            weapon_bit = self._active_suggestion[1].get_bit()
+            room_bit = self._active_suggestion[2].get_bit()
+            if suspect_bit & not_rejected_yet:
                 suggestion_rank += 100
-            if self._active_suggestion[1] in not_rejected_yet:
+            if weapon_bit & not_rejected_yet:
                 suggestion_rank += 100
-            if self._active_suggestion[2] in not_rejected_yet:
+            if room_bit & not_rejected_yet:
                 suggestion_rank += 100
-                if player_loc in self._game_board.get_room_locations():
+                if self._game_board.is_room(player_loc):
                     suggestion_rank += 1000
-            known_cards = self._players[self._player_index].get_cards() | self._players[self._player_index].cards_rejected_for_me
-            if self._active_suggestion[0] in known_cards or self._active_suggestion[1] in known_cards or self._active_suggestion[2] in known_cards:
+            known_cards = my_cards | rejected_for_me
+            if (suspect_bit | weapon_bit | room_bit) & known_cards:
                 suggestion_rank += 10
-            if self._active_suggestion[0] in known_cards and self._active_suggestion[1] in known_cards:
+            suspect_known = suspect_bit & known_cards
+            weapon_known = weapon_bit & known_cards
+            room_known = room_bit & known_cards
+            if suspect_known and weapon_known:
                 suggestion_rank += 100
-            if self._active_suggestion[0] in known_cards and self._active_suggestion[2] in known_cards:
+            if suspect_known and room_known:
                 suggestion_rank += 100
-            if self._active_suggestion[1] in known_cards and self._active_suggestion[2] in known_cards:
+            if weapon_known and room_known:
                 suggestion_rank += 100
             
             
         if self.last_turn == Action.ACCUSATION:
-            if self._active_accusation[0] not in cards_i_discovered \
-            and self._active_accusation[0] not in my_cards:
-                accusation_rank += 10
-            if self._active_accusation[0] not in self._players[self._player_index].cards_i_asked:
-                accusation_rank /= 10
-
-            if self._active_accusation[1] not in cards_i_discovered \
-            and self._active_accusation[1] not in my_cards:
-                accusation_rank += 10
-            if self._active_accusation[1] not in self._players[self._player_index].cards_i_asked:
-                accusation_rank /= 10
-
-            if self._active_accusation[2] not in cards_i_discovered \
-            and self._active_accusation[2] not in my_cards:
-                accusation_rank += 10
-            if self._active_accusation[2] not in self._players[self._player_index].cards_i_asked:
-                accusation_rank /= 10
+            known_cards = cards_i_discovered | my_cards
+            cards_i_asked = player.cards_i_asked.mask
+            for card in self._active_accusation:
+                if not card.get_bit() & known_cards:
+                    accusation_rank += 10
+                if not card.get_bit() & cards_i_asked:
+                    accusation_rank /= 10
 
             if unknown_rooms > 3 or unknown_suspects > 3 or unknown_weapons > 3:
                 accusation_rank /= 100
             if unknown_weapons < 2 or unknown_rooms < 2 or unknown_suspects < 2:
                 accusation_rank += 10
             if unknown_weapons < 2 and unknown_rooms < 2 and unknown_suspects < 2:
-                accusation_rank += 10000
+                accusation_rank += KNOWLEDGE_BONUS
 
             if num_unknown_cards < 4:
-                accusation_rank += 10000
+                accusation_rank += KNOWLEDGE_BONUS
             if num_unknown_cards > 6:
                 accusation_rank = 0
             if self._active_accusation not in self.all_accusations:
                 accusation_rank += 10
 
             if num_of_not_rejected == 3:
-                if self._active_accusation[0] in self._players[self._player_index].cards_no_one_could_reject_for_me and \
-                self._active_accusation[1] in self._players[self._player_index].cards_no_one_could_reject_for_me and \
-                self._active_accusation[2] in self._players[self._player_index].cards_no_one_could_reject_for_me:
-                    accusation_rank += 10000000    
+                accusation_mask = cards_mask(self._active_accusation)
+                if accusation_mask & not_rejected_yet == accusation_mask:
+                    accusation_rank += WIN_BONUS
                 
         return max(move_rank + accusation_rank + suggestion_rank, base_score)
 
+    def get_score_upper_bound(self, player_index, suggestions, accusation):
+        """
+        Returns an upper bound of get_score for player_index in the states that follow this one (keep it in sync with
+        get_score). The player's knowledge only grows, by at most one rejected card or three cards no one could reject
+        per (simulated) suggestion.
+        :param suggestions: The number of suggestions that can be made before the scored state.
+        :param accusation: Whether the scored state can be an accusation.
+        """
+        if not accusation:
+            return MAX_NON_ACCUSATION_SCORE
+        player = self._players[player_index]
+        my_cards = player._cards.mask
+        rejected_for_me = player.cards_rejected_for_me.mask
+        num_of_not_rejected = count_cards(player.cards_no_one_could_reject_for_me.mask)
+        bound = MAX_ACCUSATION_RANK
+        num_unknown_cards = len(self._cards) - count_cards(my_cards) - count_cards(rejected_for_me) - num_of_not_rejected
+        if num_unknown_cards - 3 * suggestions < 4:
+            bound += KNOWLEDGE_BONUS
+        # every suggestion rejects at most one card, so it takes one unknown card off a single type
+        missing_types = 0
+        for card_type in CARD_TYPES:
+            type_mask = self._catalog.get_type_mask(card_type)
+            unknown = count_cards(type_mask) - count_cards(rejected_for_me & type_mask) - count_cards(my_cards & type_mask)
+            missing_types += max(unknown - 1, 0)
+        if missing_types <= suggestions:
+            bound += KNOWLEDGE_BONUS
+        # the win bonus needs exactly 3 cards no one could reject, the set only grows
+        if num_of_not_rejected == 3 or (num_of_not_rejected < 3 and suggestions):
+            bound += WIN_BONUS
+        return max(bound, MAX_NON_ACCUSATION_SCORE)
+
+    def get_score_key(self):
+        """
+        Returns a compact signature of everything get_score reads besides the game setup: the current player's
+        knowledge masks, and the location, active suggestion/accusation and accused cards only where the last turn
+        makes the score depend on them. States of the same game with the same key have the same score.
+        """
+        player = self._players[self._player_index]
+        key = (player._cards.mask, player.cards_rejected_for_me.mask, player.cards_no_one_could_reject_for_me.mask,
+               self.last_turn)
+        if self.last_turn == Action.MOVE:
+            return key + (player.get_location(), self._active_suggestion is None)
+        if self.last_turn == Action.SUGGESTION:
+            # the suggestion's cards are of different types, so the mask keeps their order
+            return key + (player.get_location(), cards_mask(self._active_suggestion))
+        if self.last_turn == Action.ACCUSATION:
+            return key + (tuple(self._active_accusation), player.cards_i_asked.mask,
+                          self._active_accusation in self.all_accusations)
+        return key
+
     # Returns player_index location on the board
     def get_player_location(self, player_index):
         player_loc = None
@@ -175,12 +260,9 @@ class GameState():
             legal_actions.append(Action.MOVE)
             
         player_loc = self.get_player_location(player_index)
-        if player_loc in self._game_board.get_room_locations():
-            room_name = Board.get_room_name(player_loc)
-            flag = True
-            for card in self._players[player_index].cards_rejected_for_me:
-                if card.get_type() == 'room' and card.get_name() == room_name:
-                    flag = False
+        room = self._catalog.get_room_card(player_loc)
+        if room is not None:
+            flag = not room.get_bit() & self._players[player_index].cards_rejected_for_me.mask
             if flag and self.last_turn != Action.SUGGESTION:
                 legal_actions.append(Action.SUGGESTION)
 
@@ -188,180 +270,253 @@ class GameState():
 
     # Returns a list of the possible locations which player_index can move to with the given step size (a dice roll)
     def get_legal_move_locations(self, step_size, player_index):
-        legal_moves = []
         player_loc = self.get_player_location(player_index)
-
-        # TODO: debug
-        if not player_loc:
-            print(f"player_index: {player_index}, player: {player}")
-            return
-
-
-        def is_within_bounds(loc, board_size):
-            row, col = loc
-            return 0 <= row < board_size and 0 <= col < board_size
-
-        player_locations = []
-        for player in self._players:
-            player_locations.append(player.get_location())
-
-        # row, col = player_loc
-        board_size = self._game_board.get_size()
-
-        def find_moves(loc, remaining_steps, path):
-            row, col = loc
-            if remaining_steps == 0:
-                # Add to legal moves if within bounds
-                if is_within_bounds((row, col), board_size) and (row,col) != player_loc:
-                    if (row,col) not in player_locations:
-                        legal_moves.append((row, col))
-                return
-        
-        # Try all four directions if there are still steps remaining
-            possible_moves = [
-                (row + 1, col),    # Move down
-                (row - 1, col),    # Move up
-                (row, col + 1),    # Move right
-                (row, col - 1)     # Move left
-            ]
-
-            for move in possible_moves:
-                if is_within_bounds(move, board_size):
-                    find_moves(move, remaining_steps - 1, path + [move])
-
-        # Initialize recursion from player's current location
-        find_moves(player_loc, step_size, [])
-
-        return legal_moves
+        if player_loc is None:
+            raise ValueError(f"Player {player_index} has no location on the board")
+
+        player_locations = {player.get_location() for player in self._players}
+        return [loc for loc in self._game_board.get_reachable_locations(player_loc, step_size)
+                if loc != player_loc and loc not in player_locations]
+
+    def get_class_sizes(self):
+        """
+        Splits the suspects and the weapons into classes of cards that the state can't tell apart: every card set of
+        every player (PLAYER_CARD_SETS) either has all the cards of a class or none of them, and none of them is in
+        the active suggestion/accusation, an earlier accusation or is the card shown last. Swapping two cards of a
+        class maps the state to an equivalent one, so the actions with either of them have the same value. Rooms are
+        never grouped, every room is a different place on the board.
+        :return: A list of card ID -> the size of the card's class if the card represents it (it's the class's lowest
+                 ID), else 0.
+        """
+        masks = [getattr(player, name).mask for player in self._players for name in PLAYER_CARD_SETS]
+        distinct_cards = 0
+        for cards in [self._active_suggestion, self._active_accusation, [self.current_rejecting_card]] + self.all_accusations:
+            if cards is not None:
+                distinct_cards |= cards_mask(card for card in cards if card is not None)
+
+        class_sizes = [1] * len(self._cards)
+        for card_type in ['suspect', 'weapon']:
+            # Partition refinement: every card set splits each class into the cards in it and those not in it
+            classes = [self._catalog.get_type_mask(card_type) & ~distinct_cards]
+            for mask in masks:
+                classes = [part for cards in classes for part in (cards & mask, cards & ~mask) if part]
+            for cards in classes:
+                representative = (cards & -cards).bit_length() - 1
+                class_sizes[representative] = count_cards(cards)
+                cards &= cards - 1
+                while cards:
+                    class_sizes[(cards & -cards).bit_length() - 1] = 0
+                    cards &= cards - 1
+        return class_sizes
 
     # Returns a list of all possible suggestions that player_index can make with his cards
-    def get_possible_suggestions(self, player_index):
-        known_cards = self._players[player_index].cards_rejected_for_me | self._players[player_index].cards_no_one_could_reject_for_me
-        # remaining_cards = [card for card in self._cards if card not in known_cards]
-        suspects = [card for card in self._cards if card.get_type() == "suspect"]
-        weapons = [card for card in self._cards if card.get_type() == "weapon"]
-        room_name = Board.get_room_name(self._players[player_index].get_location())
-        room = None
-        for card in self._cards:
-            if card.get_name() == room_name and card.get_type() == 'room':
-                room = card
-                break
+    # (with class_sizes from get_class_sizes, only those with the representatives of the card classes)
+    def get_possible_suggestions(self, player_index, class_sizes=None):
+        player = self._players[player_index]
+        known_cards = player._cards.mask | player.cards_rejected_for_me.mask | player.cards_no_one_could_reject_for_me.mask
+        suspects = self._catalog.get_cards_of_type('suspect')
+        weapons = self._catalog.get_cards_of_type('weapon')
+        if class_sizes is not None:
+            suspects = [card for card in suspects if class_sizes[card.get_id()]]
+            weapons = [card for card in weapons if class_sizes[card.get_id()]]
+        room = self._catalog.get_room_card(player.get_location())
         
+        # A suggestion is possible unless all of its three cards are already known
+        room_known = room is not None and room.get_bit() & known_cards
         possible_suggestions = []
-        cards_i_know = 0
-        if room in self._players[player_index].get_cards() or room in known_cards:
-            cards_i_know += 1
-        cards_i_know_1 = cards_i_know
         for suspect in suspects:
-            cards_i_know = cards_i_know_1
-            i = 0
-            if suspect in self._players[player_index].get_cards() or suspect in known_cards:
-                i = 1
-            cards_i_know += i
-            cards_i_know_2 = cards_i_know
+            suspect_known = room_known and suspect.get_bit() & known_cards
             for weapon in weapons:
-                cards_i_know = cards_i_know_2
-                j = 0
-                if weapon in self._players[player_index].get_cards() or weapon in known_cards:
-                    j = 1
-                cards_i_know += j
-
-                if cards_i_know != 3:
+                if not (suspect_known and weapon.get_bit() & known_cards):
                     possible_suggestions.append((suspect, weapon, room))
-                
-                if cards_i_know > 3:
-                    raise(Exception("AHH"))
 
         return possible_suggestions
 
-    def get_possible_accusations(self, player_index):
-        used_cards = self._players[player_index].cards_rejected_for_me
-        player_cards = self._players[player_index].get_cards()
-        remaining_cards = [card for card in self._cards if card not in used_cards and card not in player_cards]
-        suspects = []
-        weapons = []
-        rooms = []
-        for card in remaining_cards:
-            if card.get_type() == "suspect":
-                suspects.append(card)
-            if card.get_type() == "room":
-                rooms.append(card)
-            if card.get_type() == "weapon":
-                weapons.append(card)
-
-        possible_accusations = [(suspect, weapon, room) for suspect in suspects for weapon in weapons for room in rooms if (suspect,weapon,room) not in self.all_accusations]
+    def get_possible_accusations(self, player_index, class_sizes=None):
+        player = self._players[player_index]
+        used_cards = player.cards_rejected_for_me.mask | player._cards.mask
+        suspects = [card for card in self._catalog.get_cards_of_type('suspect') if not card.get_bit() & used_cards]
+        weapons = [card for card in self._catalog.get_cards_of_type('weapon') if not card.get_bit() & used_cards]
+        if class_sizes is not None:
+            suspects = [card for card in suspects if class_sizes[card.get_id()]]
+            weapons = [card for card in weapons if class_sizes[card.get_id()]]
+        rooms = [card for card in self._catalog.get_cards_of_type('room') if not card.get_bit() & used_cards]
+
+        all_accusations = set(self.all_accusations)
+        possible_accusations = [(suspect, weapon, room) for suspect in suspects for weapon in weapons for room in rooms if (suspect,weapon,room) not in all_accusations]
 
         return possible_accusations
 
     # Returns a list of the cards that the opponent suggested, and which player_index can reject
     def get_possible_rejections(self, cards, suggestion):
-        possible_rejections = []
-        for card in suggestion:
-            name = card.get_name()
-            type = card.get_type()
-            for c in cards:
-                c_name = c.get_name()
-                c_type = c.get_type()
-                if c_name == name and c_type == type:
-                    possible_rejections.append(c)
-        return possible_rejections
+        cards = cards.mask if isinstance(cards, CardSet) else cards_mask(cards)
+        return [card for card in suggestion if card.get_bit() & cards]
 
     # Returns a list of lists: all possible actions (type + description) which
     # player_index can perform
-    def get_all_possible_actions(self, player_index, dice_roll):
+    # With symmetry=True equivalent suggestions/accusations are generated once, see get_dice_independent_actions
+    def get_all_possible_actions(self, player_index, dice_roll, symmetry=False):
         actions = []
-        all_suggestions = None
         legal_moves = self.get_legal_actions(player_index)
         if Action.MOVE in legal_moves:
-            all_locations = []
-            new_locations = self.get_legal_move_locations(dice_roll, player_index=player_index)
-            for loc in new_locations:
-                if loc not in all_locations:
-                    all_locations.append(loc)
-            for loc in all_locations:
+            for loc in self.get_legal_move_locations(dice_roll, player_index=player_index):
                 actions.append([Action.MOVE, loc])
+        return actions + self.get_dice_independent_actions(player_index, legal_moves, symmetry)
+
+    # Returns all the possible actions except the moves, which are the only ones that depend on the dice roll
+    # With symmetry=True only the suggestions/accusations of the representatives of the card classes (get_class_sizes)
+    # are generated, each with the number of equivalent ones as a third element (get_multiplicity)
+    def get_dice_independent_actions(self, player_index, legal_moves=None, symmetry=False):
+        actions = []
+        if legal_moves is None:
+            legal_moves = self.get_legal_actions(player_index)
+        class_sizes = None
+        if symmetry and (Action.SUGGESTION in legal_moves or Action.ACCUSATION in legal_moves):
+            class_sizes = self.get_class_sizes()
         if Action.SUGGESTION in legal_moves:
-            all_suggestions = self.get_possible_suggestions(player_index)
+            all_suggestions = self.get_possible_suggestions(player_index, class_sizes)
             for s in all_suggestions:
-                actions.append([Action.SUGGESTION, s])
+                actions.append(self.create_cards_action(Action.SUGGESTION, s, class_sizes))
         if Action.ACCUSATION in legal_moves:
-            all_accusations = self.get_possible_accusations(player_index)
+            all_accusations = self.get_possible_accusations(player_index, class_sizes)
             for s in all_accusations:
-                actions.append([Action.ACCUSATION, s])
+                actions.append(self.create_cards_action(Action.ACCUSATION, s, class_sizes))
         if Action.ENDTURN in legal_moves:
             actions.append([Action.ENDTURN, None])
         return actions
     
 
 
+    def create_cards_action(self, action_type, cards, class_sizes):
+        if class_sizes is None:
+            return [action_type, cards]
+        return [action_type, cards, class_sizes[cards[0].get_id()] * class_sizes[cards[1].get_id()]]
+
     ##### Apply actions to current state #####
     def apply_move(self, move):
+        if self._board_hash is not None:
+            self._board_hash ^= self._zobrist_keys.get_location_key(self._player_index, self.get_player_location(self._player_index)) ^ \
+                                self._zobrist_keys.get_location_key(self._player_index, move)
         self._players[self._player_index].set_location(move)
         self.last_turn = Action.MOVE
-    def apply_suggestion(self, suggestion):
+    def apply_suggestion(self, suggestion, undo_token=None):
             self._active_suggestion = suggestion
             self.current_rejecting_card = None
             self.current_rejecting_player = None
             self.all_suggestions.append((self._player_index, self.current_rejecting_player, suggestion))
             
-            self._players[self._player_index].cards_i_asked.add(suggestion[0])
-            self._players[self._player_index].cards_i_asked.add(suggestion[1])
-            self._players[self._player_index].cards_i_asked.add(suggestion[2])
+            asking_player = self._players[self._player_index]
+            self.add_card(asking_player.cards_i_asked, suggestion[0], undo_token)
+            self.add_card(asking_player.cards_i_asked, suggestion[1], undo_token)
+            self.add_card(asking_player.cards_i_asked, suggestion[2], undo_token)
             for i, player in enumerate(self._players):
                 if i != self._player_index:
-                    player.cards_i_was_asked.add(suggestion[0])
-                    player.cards_i_was_asked.add(suggestion[1])
-                    player.cards_i_was_asked.add(suggestion[2])
+                    self.add_card(player.cards_i_was_asked, suggestion[0], undo_token)
+                    self.add_card(player.cards_i_was_asked, suggestion[1], undo_token)
+                    self.add_card(player.cards_i_was_asked, suggestion[2], undo_token)
 
             self.last_turn = Action.SUGGESTION
             
-    def apply_accusation(self, accusation):
+    def apply_accusation(self, accusation, undo_token=None):
+            if self._accusation_masks is None:
+                self._accusation_masks = {cards_mask(past_accusation) for past_accusation in self.all_accusations}
+            accusation_mask = cards_mask(accusation)
+            self.repeated_accusation = accusation_mask in self._accusation_masks
+            if not self.repeated_accusation:
+                self._accusation_masks.add(accusation_mask)
+                if undo_token is not None:
+                    undo_token.accusation_mask = accusation_mask
             self._active_accusation = accusation
             self.all_accusations.append(accusation)
             self.last_turn = Action.ACCUSATION
             
     def apply_end_turn(self):
         self.next_turn()
+
+    ##### Make/unmake actions (used by the search agents to walk the tree in place) #####
+    def apply_action(self, action):
+        """
+        Applies the action of the current player to this state in place.
+        :param action: A list/tuple of [Action, details] as returned by get_all_possible_actions.
+        :return: An UndoToken which reverts every change made to the state when passed to undo().
+        """
+        undo_token = UndoToken(self)
+        if action[0] == Action.MOVE:
+            undo_token.moved_location = self.get_player_location(self._player_index)
+            self.apply_move(action[1])
+        if action[0] == Action.SUGGESTION:
+            self.apply_suggestion(action[1], undo_token)
+        if action[0] == Action.ACCUSATION:
+            self.apply_accusation(action[1], undo_token)
+        if action[0] == Action.ENDTURN:
+            self.apply_end_turn()
+        return undo_token
+
+    def undo(self, undo_token):
+        """
+        Reverts the changes recorded in undo_token. Tokens must be undone in the reverse order of their creation.
+        :param undo_token: The UndoToken returned by apply_action.
+        """
+        (self._player_index, self.last_turn, self._active_suggestion, self._active_accusation,
+         self.current_rejecting_card, self.current_rejecting_player, self.is_terminal, self.winner,
+         self._board_hash, self.repeated_accusation) = undo_token.fields
+        del self.all_suggestions[undo_token.suggestions_num:]
+        del self.all_accusations[undo_token.accusations_num:]
+        if undo_token.accusation_mask is not None:
+            self._accusation_masks.discard(undo_token.accusation_mask)
+        if undo_token.moved_location is not None:
+            self._players[undo_token.player_index].set_location(undo_token.moved_location)
+        for cards, card in reversed(undo_token.added_cards):
+            cards.discard(card)
+        for player_index in undo_token.eliminated_players:
+            self._players[player_index].is_in_game = True
+
+    def add_card(self, cards, card, undo_token=None):
+        """
+        Adds card to one of the players' card sets, recording the change in undo_token (if given).
+        """
+        if card not in cards:
+            cards.add(card)
+            if undo_token is not None:
+                undo_token.added_cards.append((cards, card))
+            if self._board_hash is not None:
+                card_keys = self._card_set_keys.get(id(cards))
+                if card_keys is not None:
+                    self._board_hash ^= card_keys[card.get_id()]
+
+    def apply_rejection(self, player_index, rejected_card, undo_token=None):
+        """
+        Applies a (simulated) response to the active suggestion to player_index's knowledge.
+        :param rejected_card: The card shown to player_index, or None if no one could reject the suggestion.
+        """
+        player = self._players[player_index]
+        if rejected_card:
+            self.add_card(player.cards_rejected_for_me, rejected_card, undo_token)
+        else:
+            for card in self._active_suggestion:
+                if card not in player._cards:
+                    self.add_card(player.cards_no_one_could_reject_for_me, card, undo_token)
+
+    def apply_accusation_result(self, player_index, is_correct, undo_token=None):
+        """
+        Applies a (simulated) result of player_index's accusation - the player either wins or leaves the game.
+        """
+        if is_correct:
+            self.winner = player_index
+            self.is_terminal = True
+            return
+        self._players[player_index].is_in_game = False
+        if undo_token is not None:
+            undo_token.eliminated_players.append(player_index)
+        if self._board_hash is not None:
+            self._board_hash ^= self._zobrist_keys.eliminated[player_index]
+        # Check if game ended
+        active_players = [i for i, player in enumerate(self._players) if player.is_in_game]
+        if len(active_players) <= 1:
+            self.is_terminal = True
+            self.winner = active_players[0] if active_players else None
+        else:
+            self.next_turn()
             
     def play_accusation(self, details):
         if self.check_solution(details): ##### TODO: check with minimax/expectimax
@@ -386,3 +541,20 @@ class GameState():
         if index >= len(self._players):
             index = 0
         return index
+
+
+class UndoToken():
+    """
+    Records the changes made to a GameState by GameState.apply_action, so they can be reverted by GameState.undo.
+    """
+    def __init__(self, state: GameState):
+        self.fields = (state._player_index, state.last_turn, state._active_suggestion, state._active_accusation,
+                       state.current_rejecting_card, state.current_rejecting_player, state.is_terminal, state.winner,
+                       state._board_hash, state.repeated_accusation)
+        self.player_index = state._player_index # the player that performed the action
+        self.suggestions_num = len(state.all_suggestions)
+        self.accusations_num = len(state.all_accusations)
+        self.moved_location = None # the previous location of the player (if the action was a move)
+        self.added_cards = [] # a list of (set of Card, Card) that were added to a player's cards
+        self.eliminated_players = [] # indices of players that left the game
+        self.accusation_mask = None # the mask of the accusation, if it was a new one
@@ -1,6 +1,5 @@
 from game_elements.cluedo_player import CluedoPlayer
 from game_elements.game_state import GameState
-import random
 
 class HumanPlayer(CluedoPlayer):
     def __init__(self, index, name):
@@ -18,5 +17,5 @@ class HumanPlayer(CluedoPlayer):
     def reject(self, state: GameState):
         all_rejections = state.get_possible_rejections(self.get_cards(), state._active_suggestion)
         if all_rejections:
-            return random.choice(all_rejections)
+            return self.rng.choice(all_rejections)
         return None
\ No newline at end of file
@@ -0,0 +1,41 @@
+from collections import OrderedDict
+
+CACHE_SIZE = 1 << 16
+
+
+class ScoreCache():
+    """
+    A least recently used cache of GameState.get_score, keyed by the state's compact signature
+    (GameState.get_score_key). The keys don't include the game setup, so the cache holds the scores of a single game
+    at a time: it is cleared when it gets a state of another catalog.
+    Counts its hits and misses.
+    """
+    def __init__(self, size=CACHE_SIZE):
+        self._size = size
+        self._scores = OrderedDict() # key -> score, from the least to the most recently used
+        self._catalog = None
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self._scores.clear()
+
+    def get_score(self, state):
+        """
+        Returns state.get_score(), computing it only if a state with the same key wasn't scored recently.
+        """
+        if state._catalog is not self._catalog:
+            self._catalog = state._catalog
+            self._scores.clear()
+        key = state.get_score_key()
+        score = self._scores.get(key)
+        if score is not None:
+            self.hits += 1
+            self._scores.move_to_end(key)
+            return score
+
+        self.misses += 1
+        score = self._scores[key] = state.get_score()
+        if len(self._scores) > self._size:
+            self._scores.popitem(last=False)
+        return score
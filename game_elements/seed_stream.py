@@ -0,0 +1,18 @@
+import hashlib
+import random
+
+class SeedStream():
+    """
+    A counter-based stream of seeds: the seed of game k is a hash of (base seed, k).
+    Any game of a run can therefore get its random.Random directly - in another thread or process, and without
+    replaying games 0..k-1.
+    """
+    def __init__(self, seed):
+        self._seed = seed
+
+    def get_seed(self, index):
+        digest = hashlib.blake2b(f"{self._seed}-{index}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    def get_rng(self, index):
+        return random.Random(self.get_seed(index))
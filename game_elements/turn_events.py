@@ -0,0 +1,54 @@
+class SuggestionEvent():
+    """
+    The result of a suggestion, built once by the game manager and broadcast to all the players.
+    Everyone sees who suggested what and who refuted it, but the shown card is only visible to the suggester and
+    the refuter.
+    """
+    __slots__ = ('_suggester', '_suggestion', '_refuter', '_shown_card')
+
+    def __init__(self, suggester, suggestion, refuter=None, shown_card=None):
+        self._suggester = suggester # index of the suggesting player
+        self._suggestion = suggestion # (suspect, weapon, room) Cards
+        self._refuter = refuter # index of the player who refuted the suggestion, or None if no one could
+        self._shown_card = shown_card # the Card the refuter showed, or None
+
+    def get_suggester(self):
+        return self._suggester
+
+    def get_suggestion(self):
+        return self._suggestion
+
+    def get_refuter(self):
+        return self._refuter
+
+    def is_refuted(self):
+        return self._refuter is not None
+
+    def get_shown_card(self, viewer_index):
+        """
+        Returns the card shown to the suggester, or None if the viewer is not allowed to see it (or none was shown).
+        """
+        if viewer_index == self._suggester or viewer_index == self._refuter:
+            return self._shown_card
+        return None
+
+
+class AccusationEvent():
+    """
+    The result of an accusation, built once by the game manager and broadcast to all the players.
+    """
+    __slots__ = ('_accuser', '_accusation', '_is_correct')
+
+    def __init__(self, accuser, accusation, is_correct):
+        self._accuser = accuser # index of the accusing player
+        self._accusation = accusation # (suspect, weapon, room) Cards
+        self._is_correct = is_correct
+
+    def get_accuser(self):
+        return self._accuser
+
+    def get_accusation(self):
+        return self._accusation
+
+    def is_correct(self):
+        return self._is_correct
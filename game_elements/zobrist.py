@@ -0,0 +1,47 @@
+import random
+from game_elements.action import Action
+
+# The players' card sets that change during a search (GameState.add_card) and that the evaluation depends on
+# (cards_i_was_asked is left out, so states that only differ in it share a hash), in the order of their keys
+TRACKED_CARD_SETS = ['cards_i_asked', 'cards_rejected_for_me', 'cards_no_one_could_reject_for_me']
+# Fixed, so the keys (and the hashes) are the same in every game and process, and drawing them doesn't consume the
+# game's random.Random
+KEYS_SEED = 0x5EED
+
+
+class ZobristKeys():
+    """
+    Random 64 bit keys for the Zobrist hash of a GameState: the hash of a state is the XOR of the keys of its
+    features (each player's location, the cards in each of the tracked card sets, eliminated players, the current
+    player, last turn and the active suggestion/accusation), so a change of a feature updates it with one XOR.
+    Use get_zobrist_keys, which builds the keys once per game dimensions.
+    """
+    def __init__(self, players_num, board_size, cards_num):
+        rng = random.Random(KEYS_SEED)
+        self._board_size = board_size
+        self.locations = [[rng.getrandbits(64) for _ in range(board_size * board_size)] for _ in range(players_num)]
+        # card_sets[player][set index][card ID]
+        self.card_sets = [[[rng.getrandbits(64) for _ in range(cards_num)] for _ in TRACKED_CARD_SETS]
+                          for _ in range(players_num)]
+        self.eliminated = [rng.getrandbits(64) for _ in range(players_num)]
+        self.current_player = [rng.getrandbits(64) for _ in range(players_num)]
+        self.last_turn = {last_turn: rng.getrandbits(64) for last_turn in [None] + list(Action)}
+        self.suggestion = [rng.getrandbits(64) for _ in range(cards_num)]
+        self.accusation = [rng.getrandbits(64) for _ in range(cards_num)]
+        self.terminal = rng.getrandbits(64)
+
+    def get_location_key(self, player_index, location):
+        return self.locations[player_index][location[0] * self._board_size + location[1]]
+
+
+_keys_cache = {} # (players_num, board_size, cards_num) -> ZobristKeys
+
+def get_zobrist_keys(players_num, board_size, cards_num):
+    """
+    Returns the ZobristKeys for games of the given dimensions, shared by all the states of these games.
+    """
+    dimensions = (players_num, board_size, cards_num)
+    keys = _keys_cache.get(dimensions)
+    if keys is None:
+        keys = _keys_cache[dimensions] = ZobristKeys(players_num, board_size, cards_num)
+    return keys
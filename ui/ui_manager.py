@@ -5,7 +5,6 @@ from game_elements.cluedo_game_manager import CluedoGameManager
 from game_elements.board import Board
 import pygame
 from game_elements.human_player import HumanPlayer
-import random
 from game_elements.action import Action
 from ui.popup_manager import PopupManager
 
@@ -148,7 +147,7 @@ class UIManager:
         self.play_music()
     
     def roll_dice(self):
-        self.dice_roll = random.randint(1, 6)
+        self.dice_roll = self._game_manager.rng.randint(1, 6)
         label = f"You rolled a {self.dice_roll}!"
         self.popup_manager.show_popup(message=label)
 